@@ -0,0 +1,41 @@
+"""add parse_cache_entries
+
+Revision ID: 5d8c1f3a9e42
+Revises: 9b7d2e4c1a08
+Create Date: 2026-03-05 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "5d8c1f3a9e42"
+down_revision: Union[str, None] = "9b7d2e4c1a08"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "parse_cache_entries",
+        sa.Column("key", sa.String(64), nullable=False),
+        sa.Column("parsed_data", postgresql.JSONB(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("key"),
+    )
+    op.create_index(
+        "ix_parse_cache_entries_created_at", "parse_cache_entries", ["created_at"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_parse_cache_entries_created_at", "parse_cache_entries")
+    op.drop_table("parse_cache_entries")
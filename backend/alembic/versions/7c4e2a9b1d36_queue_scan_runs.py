@@ -0,0 +1,40 @@
+"""queue scan_runs for scan workers
+
+Revision ID: 7c4e2a9b1d36
+Revises: 5d8c1f3a9e42
+Create Date: 2026-03-06 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c4e2a9b1d36"
+down_revision: Union[str, None] = "5d8c1f3a9e42"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "scan_runs",
+        sa.Column(
+            "bulk_parse",
+            sa.Boolean(),
+            nullable=False,
+            server_default=sa.text("false"),
+        ),
+    )
+    op.create_index(
+        "ix_scan_runs_queued",
+        "scan_runs",
+        ["started_at"],
+        postgresql_where=sa.text("status = 'queued'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scan_runs_queued", "scan_runs")
+    op.drop_column("scan_runs", "bulk_parse")
@@ -0,0 +1,28 @@
+"""add history_id to gmail_connections
+
+Revision ID: 9b7d2e4c1a08
+Revises: 3f1e9a7c5d20
+Create Date: 2026-03-04 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9b7d2e4c1a08"
+down_revision: Union[str, None] = "3f1e9a7c5d20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "gmail_connections",
+        sa.Column("history_id", sa.String(32), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("gmail_connections", "history_id")
@@ -0,0 +1,44 @@
+"""add resume checkpoint to scan_runs
+
+Revision ID: b3f6d1e8c2a7
+Revises: 7c4e2a9b1d36
+Create Date: 2026-03-06 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "b3f6d1e8c2a7"
+down_revision: Union[str, None] = "7c4e2a9b1d36"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "scan_runs", sa.Column("message_ids", postgresql.JSONB(), nullable=True)
+    )
+    op.add_column(
+        "scan_runs", sa.Column("sync_history_id", sa.String(32), nullable=True)
+    )
+    op.add_column(
+        "scan_runs",
+        sa.Column("sync_started_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "scan_runs",
+        sa.Column(
+            "processed_count", sa.Integer(), nullable=False, server_default="0"
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("scan_runs", "processed_count")
+    op.drop_column("scan_runs", "sync_started_at")
+    op.drop_column("scan_runs", "sync_history_id")
+    op.drop_column("scan_runs", "message_ids")
@@ -0,0 +1,37 @@
+"""add worker leases to scan_runs
+
+Revision ID: d4a7c2e9f510
+Revises: b3f6d1e8c2a7
+Create Date: 2026-03-07 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d4a7c2e9f510"
+down_revision: Union[str, None] = "b3f6d1e8c2a7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("scan_runs", sa.Column("owner_id", sa.String(100), nullable=True))
+    op.add_column(
+        "scan_runs",
+        sa.Column("heartbeat_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index(
+        "ix_scan_runs_running_heartbeat",
+        "scan_runs",
+        ["heartbeat_at"],
+        postgresql_where=sa.text("status = 'running'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scan_runs_running_heartbeat", "scan_runs")
+    op.drop_column("scan_runs", "heartbeat_at")
+    op.drop_column("scan_runs", "owner_id")
@@ -0,0 +1,47 @@
+"""add per-scan sequence number to scan_events
+
+Revision ID: e8b3f5a1c794
+Revises: d4a7c2e9f510
+Create Date: 2026-03-07 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e8b3f5a1c794"
+down_revision: Union[str, None] = "d4a7c2e9f510"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("scan_events", sa.Column("seq", sa.Integer(), nullable=True))
+    # Number existing events in the order streams used to send them
+    op.execute(
+        """
+        UPDATE scan_events
+        SET seq = numbered.seq
+        FROM (
+            SELECT id, row_number() OVER (
+                PARTITION BY scan_run_id ORDER BY created_at, id
+            ) AS seq
+            FROM scan_events
+        ) AS numbered
+        WHERE scan_events.id = numbered.id
+        """
+    )
+    op.alter_column("scan_events", "seq", nullable=False)
+    op.create_index(
+        "ix_scan_events_scan_run_seq",
+        "scan_events",
+        ["scan_run_id", "seq"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_scan_events_scan_run_seq", "scan_events")
+    op.drop_column("scan_events", "seq")
@@ -0,0 +1,142 @@
+"""Per-call latency of a fresh Anthropic client per call vs the shared client.
+
+Runs sequential ``messages.create`` calls against a local stub of the
+Messages API. The stub can delay every new connection by ``--handshake-ms``
+to stand in for the TCP + TLS setup a remote API costs; keep-alive reuse is
+what the shared client saves.
+
+    cd backend && PYTHONPATH=src python benchmarks/llm_client.py --calls 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# The app settings require these; the benchmark never touches them
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("TOKEN_ENCRYPTION_KEY", "benchmark")
+
+import anthropic  # noqa: E402
+
+from travel_planner.llm import create_llm_client  # noqa: E402
+
+_REPLY = json.dumps(
+    {
+        "id": "msg_bench",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-haiku-4-5-20251001",
+        "content": [{"type": "text", "text": '{"not_travel": true}'}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 400, "output_tokens": 8},
+    }
+).encode()
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    handshake_seconds = 0.0
+    connections = 0
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        assert isinstance(self.server, _StubServer)
+        self.server.connections += 1
+        time.sleep(self.server.handshake_seconds)
+
+    def do_POST(self) -> None:  # noqa: N802
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_REPLY)))
+        self.end_headers()
+        self.wfile.write(_REPLY)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+async def _call(client: anthropic.AsyncAnthropic) -> None:
+    await client.messages.create(
+        model="claude-haiku-4-5-20251001",
+        max_tokens=16,
+        messages=[{"role": "user", "content": "Subject: Your flight"}],
+    )
+
+
+async def _per_call_client(calls: int) -> list[float]:
+    """The old behaviour: a new client, and so a new connection, per call."""
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        client = create_llm_client()
+        await _call(client)
+        timings.append(time.perf_counter() - start)
+        await client.close()
+    return timings
+
+
+async def _shared_client(calls: int) -> list[float]:
+    client = create_llm_client()
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await _call(client)
+        timings.append(time.perf_counter() - start)
+    await client.close()
+    return timings
+
+
+def _report(name: str, timings: list[float], connections: int) -> None:
+    ms = sorted(t * 1000 for t in timings)
+    print(
+        f"{name:<16} mean {statistics.mean(ms):7.2f} ms  "
+        f"p50 {ms[len(ms) // 2]:7.2f} ms  "
+        f"p95 {ms[int(len(ms) * 0.95)]:7.2f} ms  "
+        f"connections {connections}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Anthropic client per-call latency benchmark"
+    )
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument(
+        "--handshake-ms",
+        type=float,
+        default=30.0,
+        help="delay added to every new connection (simulated TCP + TLS setup)",
+    )
+    args = parser.parse_args()
+
+    server = _StubServer(("127.0.0.1", 0), _MessagesHandler)
+    server.handshake_seconds = args.handshake_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+
+    try:
+        for name, run in [
+            ("per-call client", _per_call_client),
+            ("shared client", _shared_client),
+        ]:
+            server.connections = 0
+            timings = asyncio.run(run(args.calls))
+            _report(name, timings, server.connections)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
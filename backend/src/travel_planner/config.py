@@ -15,6 +15,67 @@ class Settings(BaseSettings):
     google_oauth_redirect_uri: str = "http://localhost:8000/gmail/callback"
     token_encryption_key: str = ""
     cors_origins: list[str] = ["http://localhost:5173"]
+    # Scan worker (python -m travel_planner.worker): scans run at once per
+    # worker, and how often an idle worker polls the queue
+    scan_worker_concurrency: int = 4
+    scan_worker_poll_seconds: float = 2.0
+    # Scan leases: how often a worker renews the scans it runs, and how long
+    # without a renewal before other workers treat a scan as orphaned
+    scan_heartbeat_seconds: float = 10.0
+    scan_lease_seconds: float = 60.0
+    # Scans running at once across all workers; the rest wait in the queue
+    scan_max_running: int = 16
+    # Requests in flight per worker, shared round-robin by its running scans
+    gmail_max_in_flight_requests: int = 40
+    # Claude requests in flight adapt (AIMD) between min and max, starting
+    # at initial; a rate-limited email is retried for up to the budget
+    llm_min_in_flight_requests: int = 1
+    llm_initial_in_flight_requests: int = 4
+    llm_max_in_flight_requests: int = 16
+    llm_retry_budget_seconds: float = 120.0
+    # Shared Anthropic client: connection pool size and request timeouts
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_seconds: float = 60.0
+    llm_timeout_seconds: float = 60.0
+    llm_connect_timeout_seconds: float = 5.0
+    # Gmail scan pipeline: concurrent fetch/parse workers and queue depth
+    gmail_fetch_concurrency: int = 8
+    gmail_parse_concurrency: int = 4
+    gmail_pipeline_queue_size: int = 32
+    # Message gets per Gmail batch request (max 100); 1 disables batching
+    gmail_fetch_batch_size: int = 50
+    # Date shards a scan's search is split into around trip dates, the
+    # shortest a shard may be, how many are listed at once, and how many
+    # listed pages (up to 500 ids each) a shard buffers ahead of the scan
+    gmail_list_max_shards: int = 8
+    gmail_list_min_shard_days: int = 30
+    gmail_list_concurrency: int = 4
+    gmail_list_buffer_pages: int = 4
+    # Gmail REST connection pool shared by all scans, and request timeouts
+    gmail_http_max_connections: int = 50
+    gmail_http_timeout_seconds: float = 30.0
+    gmail_http_connect_timeout_seconds: float = 5.0
+    # Scan rows are committed every N emails or T ms, whichever comes first
+    gmail_event_flush_size: int = 50
+    gmail_event_flush_ms: int = 500
+    # How often a scan re-reads its ScanRun to see cancels from other processes
+    gmail_cancel_check_seconds: float = 5.0
+    # SSE streams wake on scan NOTIFYs; this is their fallback re-check and
+    # keepalive interval when no notification arrives
+    gmail_stream_poll_seconds: float = 15.0
+    # Progress events buffered per SSE stream; a stream further behind than
+    # this re-reads what it missed from the database
+    gmail_stream_buffer_size: int = 100
+    # Claude parse cache eviction: entries expire after N days, oldest beyond max
+    gmail_parse_cache_ttl_days: int = 90
+    gmail_parse_cache_max_entries: int = 100_000
+    # Seconds between Message Batch status polls in bulk-parse scans
+    gmail_bulk_poll_seconds: float = 30.0
+    # Skip Claude for mail the local rule-based classifier scores as non-travel
+    gmail_travel_classifier: bool = True
+    # Approx. tokens of email text sent to Claude, picked by booking relevance
+    gmail_parse_token_budget: int = 1000
 
     model_config = {"env_file": ".env"}
 
@@ -0,0 +1,45 @@
+"""Application-scoped Anthropic client.
+
+One ``AsyncAnthropic`` is created in the app lifespan and shared by every
+request and background scan, so LLM calls reuse pooled keep-alive connections
+and TLS sessions instead of paying a new handshake per call.
+"""
+
+import anthropic
+import httpx
+
+from travel_planner.config import settings
+
+_client: anthropic.AsyncAnthropic | None = None
+
+
+def create_llm_client() -> anthropic.AsyncAnthropic:
+    return anthropic.AsyncAnthropic(
+        api_key=settings.anthropic_api_key,
+        timeout=anthropic.Timeout(
+            settings.llm_timeout_seconds,
+            connect=settings.llm_connect_timeout_seconds,
+        ),
+        http_client=anthropic.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_seconds,
+            )
+        ),
+    )
+
+
+def get_llm_client() -> anthropic.AsyncAnthropic:
+    """The shared client; created on first use outside the app lifespan."""
+    global _client
+    if _client is None:
+        _client = create_llm_client()
+    return _client
+
+
+async def close_llm_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
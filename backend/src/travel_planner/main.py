@@ -4,11 +4,11 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import update
 
 from travel_planner.config import settings
-from travel_planner.db import async_session
-from travel_planner.models.gmail import ScanRun, ScanRunStatus
+from travel_planner.llm import close_llm_client, get_llm_client
+from travel_planner.routers._gmail_client import close_http_client
+from travel_planner.routers._gmail_notify import close_scan_notifier
 from travel_planner.routers.auth import router as auth_router
 from travel_planner.routers.calendar import router as calendar_router
 from travel_planner.routers.checklist import router as checklist_router
@@ -23,20 +23,13 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Startup/shutdown lifecycle for the FastAPI app."""
+    get_llm_client()
     try:
-        async with async_session() as db:
-            await db.execute(
-                update(ScanRun)
-                .where(ScanRun.status == ScanRunStatus.running)
-                .values(status=ScanRunStatus.failed)
-            )
-            await db.commit()
-    except Exception:
-        logger.exception(
-            "Failed to clean up orphaned scans on startup — "
-            "some scans may be stuck in 'running' state"
-        )
-    yield
+        yield
+    finally:
+        await close_llm_client()
+        await close_http_client()
+        await close_scan_notifier()
 
 
 app = FastAPI(title="Travel Planner API", version="0.1.0", lifespan=lifespan)
@@ -4,6 +4,7 @@ from travel_planner.models.checklist import Checklist, ChecklistItem, ChecklistI
 from travel_planner.models.gmail import (
     GmailConnection,
     ImportRecord,
+    ParseCacheEntry,
     ScanEvent,
     ScanEventSkipReason,
     ScanEventStatus,
@@ -55,4 +56,5 @@ __all__ = [
     "ScanEventStatus",
     "ScanEventSkipReason",
     "UnmatchedImport",
+    "ParseCacheEntry",
 ]
@@ -2,7 +2,7 @@ import enum as _enum
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text, func
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -24,6 +24,8 @@ class GmailConnection(Base, UUIDMixin):
     last_sync_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
     )
+    # Gmail historyId checkpoint taken at the start of the last completed scan
+    history_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
 
 
 class ImportRecord(Base, UUIDMixin, TimestampMixin):
@@ -37,6 +39,7 @@ class ImportRecord(Base, UUIDMixin, TimestampMixin):
 
 
 class ScanRunStatus(_enum.StrEnum):
+    queued = "queued"
     running = "running"
     completed = "completed"
     failed = "failed"
@@ -56,15 +59,33 @@ class ScanEventSkipReason(_enum.StrEnum):
     not_travel = "not_travel"
     no_date = "no_date"
     claude_error = "claude_error"
+    duplicate_thread = "duplicate_thread"
+    classifier_rejected = "classifier_rejected"
 
 
 class ScanRun(Base, UUIDMixin):
+    """A Gmail scan, and the job a scan worker claims to run it."""
+
     __tablename__ = "scan_runs"
+    __table_args__ = (
+        # Workers claim the oldest queued scan
+        Index(
+            "ix_scan_runs_queued",
+            "started_at",
+            postgresql_where=text("status = 'queued'"),
+        ),
+        # Workers look for running scans whose lease has expired
+        Index(
+            "ix_scan_runs_running_heartbeat",
+            "heartbeat_at",
+            postgresql_where=text("status = 'running'"),
+        ),
+    )
 
     user_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("user_profiles.id", ondelete="CASCADE")
     )
-    status: Mapped[str] = mapped_column(String(20), default=ScanRunStatus.running)
+    status: Mapped[str] = mapped_column(String(20), default=ScanRunStatus.queued)
     started_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
@@ -76,14 +97,35 @@ class ScanRun(Base, UUIDMixin):
     skipped_count: Mapped[int] = mapped_column(Integer, default=0)
     unmatched_count: Mapped[int] = mapped_column(Integer, default=0)
     rescan_rejected: Mapped[bool] = mapped_column(default=False)
+    bulk_parse: Mapped[bool] = mapped_column(default=False)
+    # Resume checkpoint: the listed message ids and the Gmail history id they
+    # were listed against; emails with a ScanEvent are done
+    message_ids: Mapped[list[str] | None] = mapped_column(JSONB, nullable=True)
+    sync_history_id: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    sync_started_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    processed_count: Mapped[int] = mapped_column(Integer, default=0)
+    # Lease: the worker running the scan, and when it last renewed its claim
+    owner_id: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    stats: Mapped[dict] = mapped_column(JSONB, default=dict)
 
 
 class ScanEvent(Base, UUIDMixin):
     __tablename__ = "scan_events"
+    __table_args__ = (
+        # Streams read a scan's events in order, resuming after a seq
+        Index("ix_scan_events_scan_run_seq", "scan_run_id", "seq", unique=True),
+    )
 
     scan_run_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("scan_runs.id", ondelete="CASCADE")
     )
+    # Position within the scan, from 1; sent as the SSE event id
+    seq: Mapped[int] = mapped_column(Integer)
     email_id: Mapped[str] = mapped_column(String(255))
     gmail_subject: Mapped[str | None] = mapped_column(Text, nullable=True)
     status: Mapped[str] = mapped_column(String(20))
@@ -115,3 +157,16 @@ class UnmatchedImport(Base, UUIDMixin):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now()
     )
+
+
+class ParseCacheEntry(Base):
+    """Cached Claude parse of an email, keyed by a hash of the prompt input."""
+
+    __tablename__ = "parse_cache_entries"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # NULL records a "not travel" verdict
+    parsed_data: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), index=True
+    )
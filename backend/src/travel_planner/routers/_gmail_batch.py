@@ -0,0 +1,89 @@
+"""Bulk email parsing through the Anthropic Message Batches API.
+
+Large first-time scans spend most of their time in per-email
+``messages.create`` calls and run into rate limits. In bulk mode the scan
+collects every email that needs Claude, submits them as Message Batches,
+polls until the batches end and then hands the replies back to the normal
+matching and write path. Batches are billed at a discount and don't count
+against the synchronous rate limits, at the cost of minutes-to-hours latency.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+
+import anthropic as _anthropic
+from anthropic.types import Message
+from anthropic.types.message_create_params import MessageCreateParamsNonStreaming
+from anthropic.types.messages import MessageBatch
+from anthropic.types.messages.batch_create_params import Request
+
+logger = logging.getLogger(__name__)
+
+# API limit on requests per batch
+_MAX_BATCH_REQUESTS = 100_000
+
+_COUNT_FIELDS = ("processing", "succeeded", "errored", "canceled", "expired")
+
+
+def _total_counts(batches: list[MessageBatch]) -> dict[str, int]:
+    return {
+        field: sum(getattr(b.request_counts, field) for b in batches)
+        for field in _COUNT_FIELDS
+    }
+
+
+async def run_message_batches(
+    client: _anthropic.AsyncAnthropic,
+    requests: dict[str, MessageCreateParamsNonStreaming],
+    *,
+    poll_interval: float,
+    on_progress: Callable[[dict[str, int]], Awaitable[bool]],
+) -> dict[str, Message | None]:
+    """Run ``requests`` (custom_id -> messages.create params) as Message Batches.
+
+    ``on_progress`` receives the summed request counts after submission and
+    after every poll; returning False cancels the outstanding batches and
+    returns no results. Otherwise returns custom_id -> reply, with None for
+    requests that errored, expired or were cancelled.
+    """
+    items = list(requests.items())
+    batches = [
+        await client.messages.batches.create(
+            requests=[
+                Request(custom_id=custom_id, params=params)
+                for custom_id, params in items[i : i + _MAX_BATCH_REQUESTS]
+            ]
+        )
+        for i in range(0, len(items), _MAX_BATCH_REQUESTS)
+    ]
+    logger.info(
+        "Submitted %d parse requests as batches %s",
+        len(items),
+        ", ".join(b.id for b in batches),
+    )
+
+    while True:
+        if not await on_progress(_total_counts(batches)):
+            for batch in batches:
+                if batch.processing_status != "ended":
+                    await client.messages.batches.cancel(batch.id)
+            return {}
+        if all(b.processing_status == "ended" for b in batches):
+            break
+        await asyncio.sleep(poll_interval)
+        batches = [
+            b
+            if b.processing_status == "ended"
+            else await client.messages.batches.retrieve(b.id)
+            for b in batches
+        ]
+
+    replies: dict[str, Message | None] = {}
+    for batch in batches:
+        async for entry in await client.messages.batches.results(batch.id):
+            result = entry.result
+            replies[entry.custom_id] = (
+                result.message if result.type == "succeeded" else None
+            )
+    return replies
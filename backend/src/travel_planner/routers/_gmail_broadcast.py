@@ -0,0 +1,270 @@
+"""Per-scan fan-out of SSE progress to every stream watching a scan.
+
+Each process runs at most one producer per scan, however many tabs follow it:
+the producer waits for the scan's NOTIFYs, reads new ScanEvents once and
+copies them into each subscriber's bounded queue. A subscriber that falls
+more than ``gmail_stream_buffer_size`` events behind has its buffer dropped
+and re-reads the gap from the database, so a slow client costs memory only
+up to that bound and never holds up the others. The same catch-up read
+serves ``Last-Event-ID`` resumption when a stream (re)connects.
+
+While the scan waits in the queue, the producer also follows the queue
+channel and sends ``queued`` events with the scan's current position. While
+it lists the mailbox, ``found`` events carry the growing ``emails_found``.
+Both are state rather than history: a (re)connecting stream gets only the
+latest of each.
+"""
+
+import asyncio
+import contextlib
+import json
+import logging
+from collections.abc import AsyncIterator
+from typing import cast
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from travel_planner.config import settings
+from travel_planner.db import async_session
+from travel_planner.models.gmail import ScanEvent, ScanRun, ScanRunStatus
+from travel_planner.routers._gmail_notify import get_scan_notifier
+from travel_planner.routers._gmail_queue import queue_position
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL_STATUSES = (
+    ScanRunStatus.completed,
+    ScanRunStatus.failed,
+    ScanRunStatus.cancelled,
+)
+
+# Queue markers: re-read missed events from the database / end the stream so
+# the client reconnects
+_RESYNC = object()
+_CLOSED = object()
+
+# Events that report the scan's current state; only the latest matters
+_STATE_EVENTS = ("queued", "found")
+
+
+def _progress_message(ev: ScanEvent) -> dict:
+    payload = {
+        "email_id": ev.email_id,
+        "subject": ev.gmail_subject,
+        "status": ev.status,
+        "skip_reason": ev.skip_reason,
+        "trip_id": str(ev.trip_id) if ev.trip_id else None,
+        "raw_claude_json": ev.raw_claude_json,
+    }
+    return {"event": "progress", "id": str(ev.seq), "data": json.dumps(payload)}
+
+
+def _queued_message(position: int) -> dict:
+    return {"event": "queued", "data": json.dumps({"position": position})}
+
+
+def _found_message(emails_found: int) -> dict:
+    return {"event": "found", "data": json.dumps({"emails_found": emails_found})}
+
+
+def _done_message(scan_run: ScanRun) -> dict:
+    summary = {
+        "imported": scan_run.imported_count,
+        "skipped": scan_run.skipped_count,
+        "unmatched": scan_run.unmatched_count,
+        "status": scan_run.status,
+        "emails_per_second": (scan_run.stats or {}).get("emails_per_second"),
+    }
+    return {"event": "done", "data": json.dumps(summary)}
+
+
+async def _events_after(
+    db: AsyncSession, scan_id: UUID, after: int, upto: int | None = None
+) -> list[ScanEvent]:
+    query = select(ScanEvent).where(
+        ScanEvent.scan_run_id == scan_id, ScanEvent.seq > after
+    )
+    if upto is not None:
+        query = query.where(ScanEvent.seq <= upto)
+    result = await db.execute(query.order_by(ScanEvent.seq))
+    return list(result.scalars().all())
+
+
+class _Subscriber:
+    """One stream's bounded buffer of ``(seq, message)`` items."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.queue: asyncio.Queue[object] = asyncio.Queue(max(2, maxsize))
+
+    def put(self, item: object) -> None:
+        if self.queue.full():
+            # Too far behind: drop the buffer and re-read the gap instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_RESYNC)
+        self.queue.put_nowait(item)
+
+
+class _ScanFeed:
+    """The single producer for one scan in this process."""
+
+    def __init__(self, scan_id: UUID) -> None:
+        self.scan_id = scan_id
+        # Highest seq published to subscribers
+        self.last_seq = 0
+        # Latest state message per event: queue position, emails found
+        self.latest: dict[str, dict] = {}
+        # The done/error message or _CLOSED that ended the feed
+        self.final: object | None = None
+        self.ready = asyncio.Event()
+        self.subscribers: set[_Subscriber] = set()
+        self._task = asyncio.create_task(self._produce())
+
+    def _publish(self, item: object) -> None:
+        for subscriber in self.subscribers:
+            subscriber.put(item)
+
+    def _finish(self, item: object) -> None:
+        """Publish the feed's last item, kept for subscribers that join late.
+
+        The feed leaves the registry first, so a stream that connects while
+        the producer is shutting down starts a fresh feed rather than waiting
+        on this one.
+        """
+        if _feeds.get(self.scan_id) is self:
+            del _feeds[self.scan_id]
+        self.final = item
+        self._publish(item)
+
+    def _publish_state(self, message: dict) -> None:
+        if self.latest.get(message["event"]) != message:
+            self.latest[message["event"]] = message
+            self._publish((None, message))
+
+    def leave(self, subscriber: _Subscriber) -> None:
+        self.subscribers.discard(subscriber)
+        if not self.subscribers:
+            self._task.cancel()
+            if _feeds.get(self.scan_id) is self:
+                del _feeds[self.scan_id]
+
+    async def _produce(self) -> None:
+        try:
+            async with (
+                async_session() as db,
+                get_scan_notifier().subscribe(self.scan_id, queue=True) as wake,
+            ):
+                result = await db.execute(
+                    select(ScanRun).where(ScanRun.id == self.scan_id)
+                )
+                scan_run = result.scalar_one_or_none()
+                if scan_run is None:
+                    error = json.dumps({"code": "scan_not_found"})
+                    self._finish((None, {"event": "error", "data": error}))
+                    return
+                result = await db.execute(
+                    select(func.max(ScanEvent.seq)).where(
+                        ScanEvent.scan_run_id == self.scan_id
+                    )
+                )
+                # Events up to here are read by each subscriber's catch-up
+                self.last_seq = result.scalar() or 0
+                self.ready.set()
+
+                while True:
+                    # Cleared before reading, so a NOTIFY that lands mid-read
+                    # still triggers another pass
+                    wake.clear()
+                    await db.refresh(scan_run)
+                    if scan_run.status == ScanRunStatus.queued:
+                        position = await queue_position(db, scan_run)
+                        self._publish_state(_queued_message(position))
+                    else:
+                        self.latest.pop("queued", None)
+                        if scan_run.emails_found:
+                            self._publish_state(_found_message(scan_run.emails_found))
+                    for ev in await _events_after(db, self.scan_id, self.last_seq):
+                        self._publish((ev.seq, _progress_message(ev)))
+                        self.last_seq = ev.seq
+                    if scan_run.status in _TERMINAL_STATUSES:
+                        self._finish((None, _done_message(scan_run)))
+                        return
+                    # Hand the connection back to the pool while waiting
+                    await db.rollback()
+                    with contextlib.suppress(TimeoutError):
+                        await asyncio.wait_for(
+                            wake.wait(), settings.gmail_stream_poll_seconds
+                        )
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Progress feed for scan %s failed", self.scan_id)
+            self._finish(_CLOSED)
+        finally:
+            self.ready.set()
+            if _feeds.get(self.scan_id) is self:
+                del _feeds[self.scan_id]
+
+
+# Scans with a running producer in this process
+_feeds: dict[UUID, _ScanFeed] = {}
+
+
+async def stream_scan_events(scan_id: UUID, last_seq: int = 0) -> AsyncIterator[dict]:
+    """SSE messages for ``scan_id``, starting after event ``last_seq``."""
+    feed = _feeds.get(scan_id)
+    if feed is None:
+        feed = _feeds[scan_id] = _ScanFeed(scan_id)
+    subscriber = _Subscriber(settings.gmail_stream_buffer_size)
+    feed.subscribers.add(subscriber)
+    # The first pass catches up on everything before the live feed
+    subscriber.queue.put_nowait(_RESYNC)
+    if feed.final is not None:
+        # Joined a feed that has already ended: replay how it ended
+        subscriber.put(feed.final)
+    # Last state message sent per event, so a resync does not repeat them
+    sent: dict[str, dict] = {}
+    try:
+        await feed.ready.wait()
+        while True:
+            try:
+                item = await asyncio.wait_for(
+                    subscriber.queue.get(), settings.gmail_stream_poll_seconds
+                )
+            except TimeoutError:
+                # Keepalive comment to prevent proxy timeouts
+                yield {"comment": "keepalive"}
+                continue
+            if item is _CLOSED:
+                return
+            if item is _RESYNC:
+                if last_seq < feed.last_seq:
+                    async with async_session() as db:
+                        missed = await _events_after(
+                            db, scan_id, last_seq, upto=feed.last_seq
+                        )
+                    for ev in missed:
+                        yield _progress_message(ev)
+                        last_seq = ev.seq
+                for message in list(feed.latest.values()):
+                    if sent.get(message["event"]) != message:
+                        sent[message["event"]] = message
+                        yield message
+                continue
+            seq, message = cast(tuple[int | None, dict], item)
+            if seq is None:
+                if message["event"] in _STATE_EVENTS:
+                    if sent.get(message["event"]) != message:
+                        sent[message["event"]] = message
+                        yield message
+                    continue
+                # done or error: the end of the scan
+                yield message
+                return
+            if seq > last_seq:
+                yield message
+                last_seq = seq
+    finally:
+        feed.leave(subscriber)
@@ -0,0 +1,80 @@
+"""Cancellation signalling for running Gmail scans.
+
+``cancel_scan`` records the request in a process-wide registry, which the scan
+writer checks for free between emails and whenever the pipeline is idle. A
+cancel therefore takes effect within one email or ``gmail_event_flush_ms``,
+whichever is sooner. A cancel issued by another process only shows up through
+the ScanRun row, so the writer also re-reads its status every
+``gmail_cancel_check_seconds``; that interval bounds cross-worker latency.
+The observed latency is logged and recorded as ``cancel_latency_ms`` in the
+scan stats.
+"""
+
+import time
+from datetime import UTC, datetime
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from travel_planner.models.gmail import ScanRun, ScanRunStatus
+
+# Scans running in this process -> time.monotonic() of their cancel request
+_running_scans: dict[UUID, float | None] = {}
+
+
+def request_cancel(scan_id: UUID) -> None:
+    """Flag a scan as cancelled if it is running in this process."""
+    if scan_id in _running_scans and _running_scans[scan_id] is None:
+        _running_scans[scan_id] = time.monotonic()
+
+
+def unregister_scan(scan_id: UUID) -> None:
+    _running_scans.pop(scan_id, None)
+
+
+class CancelCheck:
+    """Answers "was this scan cancelled?" without a query per email.
+
+    The registry is consulted on every call; the ScanRun row is only
+    refreshed once every ``db_interval`` seconds. Creating one registers the
+    scan; call ``unregister_scan`` once it finishes.
+    """
+
+    def __init__(self, db: AsyncSession, scan_run: ScanRun, db_interval: float) -> None:
+        self._db = db
+        self._scan_run = scan_run
+        self._db_interval = db_interval
+        self._last_db_check = time.monotonic()
+        self.latency: float | None = None
+        _running_scans.setdefault(scan_run.id, None)
+
+    async def cancelled(self) -> bool:
+        if self.latency is not None:
+            return True
+        requested_at = _running_scans.get(self._scan_run.id)
+        if requested_at is not None:
+            self.latency = time.monotonic() - requested_at
+            return True
+        if time.monotonic() - self._last_db_check < self._db_interval:
+            return False
+        self._last_db_check = time.monotonic()
+        # Read the columns rather than refresh the row: a refresh would throw
+        # away attribute changes the writer has not flushed yet. No autoflush
+        # either, so those changes only go out with the writer's fenced flush
+        with self._db.no_autoflush:
+            result = await self._db.execute(
+                select(ScanRun.status, ScanRun.finished_at).where(
+                    ScanRun.id == self._scan_run.id
+                )
+            )
+        status, finished_at = result.one()
+        if status != ScanRunStatus.cancelled:
+            return False
+        # cancel_scan stamps finished_at when it flips the status
+        self.latency = (
+            (datetime.now(tz=UTC) - finished_at).total_seconds()
+            if finished_at is not None
+            else 0.0
+        )
+        return True
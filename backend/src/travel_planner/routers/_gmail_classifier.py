@@ -0,0 +1,123 @@
+"""Rule-based travel pre-classifier for Gmail import.
+
+TRAVEL_SEARCH is deliberately broad, so most of what it returns is order
+receipts, gym check-ins and newsletters that Claude rejects as not travel.
+This scores subject, sender domain and body keywords locally and only sends
+probable travel mail on to Claude. The rules are tuned for recall: a wrongly
+rejected booking never reaches the inbox, while a wrongly accepted newsletter
+only costs one LLM call.
+"""
+
+import re
+
+# Score at or above which an email is treated as probable travel
+TRAVEL_THRESHOLD = 3
+
+_TRAVEL_DOMAINS = {
+    "airbnb.com",
+    "booking.com",
+    "vrbo.com",
+    "homeaway.com",
+    "expedia.com",
+    "hotels.com",
+    "tripadvisor.com",
+    "united.com",
+    "delta.com",
+    "aa.com",
+    "southwest.com",
+    "jetblue.com",
+    "alaskaair.com",
+    "ryanair.com",
+    "easyjet.com",
+    "lufthansa.com",
+    "britishairways.com",
+    "qantas.com",
+    "aircanada.com",
+    "marriott.com",
+    "hilton.com",
+    "hyatt.com",
+    "ihg.com",
+    "hertz.com",
+    "enterprise.com",
+    "avis.com",
+    "budget.com",
+    "amtrak.com",
+    "trainline.com",
+    "airportshuttles.com",
+    "viator.com",
+    "getyourguide.com",
+}
+
+_SUBJECT_TRAVEL = re.compile(
+    r"\b(flight|e-?ticket|boarding pass|itinerary|reservation|booking|"
+    r"your (trip|stay)|hotel|check-?in|car rental|rental car|train|ferry|tour)\b",
+    re.IGNORECASE,
+)
+_SUBJECT_NOISE = re.compile(
+    r"(\d+% off|\bsale\b|\bdeals?\b|\bnewsletter\b|\bstatement\b|\bpoints\b|"
+    r"\bmiles (balance|summary)\b|\bsurvey\b|\bshipped\b|\bdelivered\b|"
+    r"\bpassword\b|\bsign-?in\b|\bsecurity alert\b)",
+    re.IGNORECASE,
+)
+
+# Confirmation codes / PNRs: a label followed by an upper-case 5-8 char code
+_BOOKING_CODE = re.compile(
+    r"(?i:\b(confirmation|booking|reservation|record locator|pnr|itinerary)"
+    r"\s*(code|number|no\.?|#|id|reference|ref\.?)?\s*(is|:|#)?)\s*"
+    r"\b[A-Z0-9]{5,8}\b"
+)
+_FLIGHT_NUMBER = re.compile(
+    r"\b(UA|AA|DL|WN|B6|AS|FR|U2|LH|BA|QF|AC|AF|KL|NK|F9)\s?\d{1,4}\b"
+)
+# Airport pair such as "DEN → AUS", "JFK-LHR" or "SFO to SEA"
+_AIRPORT_ROUTE = re.compile(r"\b[A-Z]{3}\s*(→|->|–|-|to)\s*[A-Z]{3}\b")
+_TRAVEL_PHRASES = re.compile(
+    r"\b(check-?in (date|time)|check-?out|departure|departing|arrival|"
+    r"boarding|gate|seat \d|terminal|pick-?up (date|location)|drop-?off|"
+    r"\d+ nights?|guests?:|your host|room type|round trip|one way)\b",
+    re.IGNORECASE,
+)
+_NOISE_PHRASES = re.compile(
+    r"\b(tracking number|has shipped|out for delivery|order total|"
+    r"items? in your order|add to cart|your class|studio|membership|"
+    r"table for \d|your table|delivery (fee|address)|subtotal)\b",
+    re.IGNORECASE,
+)
+
+
+def _sender_domain(sender: str) -> str:
+    match = re.search(r"<([^>]+)>", sender)
+    email = match.group(1) if match else sender
+    return email.split("@")[-1].lower().strip().rstrip(">")
+
+
+def _is_travel_domain(domain: str) -> bool:
+    # Matches subdomains too, e.g. email.united.com
+    return any(domain == d or domain.endswith("." + d) for d in _TRAVEL_DOMAINS)
+
+
+def _distinct_matches(pattern: re.Pattern[str], text: str) -> int:
+    return len({m.group(0).lower() for m in pattern.finditer(text)})
+
+
+def travel_score(subject: str, sender: str, body: str) -> int:
+    """Heuristic travel score; higher means more likely a travel booking."""
+    score = 0
+    if _is_travel_domain(_sender_domain(sender)):
+        score += 2
+    if _SUBJECT_TRAVEL.search(subject):
+        score += 1
+    if _SUBJECT_NOISE.search(subject):
+        score -= 2
+    if _BOOKING_CODE.search(body):
+        score += 2
+    if _FLIGHT_NUMBER.search(body) or _AIRPORT_ROUTE.search(body):
+        score += 2
+    score += min(_distinct_matches(_TRAVEL_PHRASES, body), 2)
+    score -= min(_distinct_matches(_NOISE_PHRASES, body), 2)
+    return score
+
+
+def is_probable_travel(subject: str, sender: str, body: str) -> bool:
+    """True when an email is worth sending to Claude for parsing."""
+    return travel_score(subject, sender, body) >= TRAVEL_THRESHOLD
@@ -0,0 +1,333 @@
+"""Async Gmail REST client on a shared httpx connection pool.
+
+googleapiclient is synchronous, so every scan request used to hop to a worker
+thread, which capped a scan at the default thread pool size and cost a thread
+handoff per call. ``GmailClient`` speaks the Gmail REST API directly on the
+event loop over one pooled ``httpx.AsyncClient`` per process. It refreshes
+the scan's OAuth token in place and retries rate limits, 5xx responses and
+network errors with exponential backoff.
+"""
+
+import asyncio
+import itertools
+import json
+import random
+import re
+from collections.abc import AsyncIterator, Hashable
+from datetime import UTC, datetime, timedelta
+from email import message_from_bytes
+from urllib.parse import quote
+
+import httpx
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+
+from travel_planner.config import settings
+from travel_planner.routers._gmail_scheduler import gmail_requests
+
+_API_URL = "https://gmail.googleapis.com/gmail/v1/users/me"
+_TOKEN_URL = "https://oauth2.googleapis.com/token"
+_BATCH_URL = "https://gmail.googleapis.com/batch/gmail/v1"
+_BATCH_PATH = "/gmail/v1/users/me/messages"
+
+# Retries per request for rate limits, 5xx and network errors, and the
+# longest wait between them whatever ``Retry-After`` asks for
+_MAX_RETRIES = 4
+_MAX_RETRY_DELAY = 60.0
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Legacy ``errors[].reason`` values and the newer ErrorInfo ``details`` reason
+_RATE_LIMIT_REASONS = {
+    "rateLimitExceeded",
+    "userRateLimitExceeded",
+    "RATE_LIMIT_EXCEEDED",
+}
+
+
+class GmailApiError(Exception):
+    """An error response from the Gmail API."""
+
+    def __init__(self, status: int, message: str, reasons: set[str] | None = None):
+        super().__init__(f"Gmail API error {status}: {message}")
+        self.status = status
+        self.reasons = reasons or set()
+
+    @property
+    def rate_limited(self) -> bool:
+        """True for quota errors (429, or 403 with a rate-limit reason)."""
+        return self.status == 429 or (
+            self.status == 403 and bool(self.reasons & _RATE_LIMIT_REASONS)
+        )
+
+    @classmethod
+    def from_response(cls, status: int, body: bytes | str) -> "GmailApiError":
+        try:
+            error = json.loads(body).get("error", {})
+        except (ValueError, AttributeError):
+            error = {}
+        if not isinstance(error, dict):
+            error = {}
+        reasons = {
+            d["reason"]
+            for d in [*error.get("errors", []), *error.get("details", [])]
+            if isinstance(d, dict) and "reason" in d
+        }
+        return cls(status, error.get("message", ""), reasons)
+
+
+_http: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The process-wide Gmail connection pool, created on first use."""
+    global _http
+    if _http is None:
+        _http = httpx.AsyncClient(
+            timeout=httpx.Timeout(
+                settings.gmail_http_timeout_seconds,
+                connect=settings.gmail_http_connect_timeout_seconds,
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.gmail_http_max_connections,
+                max_keepalive_connections=settings.gmail_http_max_connections,
+            ),
+        )
+    return _http
+
+
+async def close_http_client() -> None:
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+
+def _retry_delay(attempt: int, retry_after: str | None) -> float:
+    """``Retry-After`` if the reply had one, else exponential; plus jitter."""
+    try:
+        delay = float(retry_after) if retry_after is not None else None
+    except ValueError:
+        delay = None
+    if delay is None:
+        delay = 2.0**attempt
+    delay = min(delay, _MAX_RETRY_DELAY)
+    return delay + random.uniform(0, delay / 2)
+
+
+class GmailClient:
+    """Gmail API calls for one user, authorised with their ``Credentials``.
+
+    A token refreshed here is written back to ``creds`` so the caller can
+    persist it. Requests take a slot from the process-wide Gmail limiter,
+    shared fairly with other clients by ``share_key`` (the scan id).
+    """
+
+    def __init__(
+        self,
+        creds: Credentials,
+        http: httpx.AsyncClient | None = None,
+        max_retries: int = _MAX_RETRIES,
+        share_key: Hashable = None,
+    ) -> None:
+        self.creds = creds
+        self._http = http or get_http_client()
+        self._max_retries = max_retries
+        self._share_key = share_key
+        self._refresh_lock = asyncio.Lock()
+
+    async def refresh(self, stale_token: str | None = None) -> None:
+        """Exchange the refresh token for a new access token.
+
+        Concurrent callers that saw the same ``stale_token`` share one refresh.
+        """
+        async with self._refresh_lock:
+            creds = self.creds
+            if stale_token is not None and creds.token != stale_token:
+                return
+            if not creds.refresh_token:
+                raise RefreshError("Gmail access token expired and no refresh token")
+            resp = await self._http.post(
+                creds.token_uri or _TOKEN_URL,
+                data={
+                    "grant_type": "refresh_token",
+                    "refresh_token": creds.refresh_token,
+                    "client_id": creds.client_id,
+                    "client_secret": creds.client_secret,
+                },
+            )
+            if resp.status_code != 200:
+                raise RefreshError(
+                    f"Gmail token refresh failed ({resp.status_code}): "
+                    f"{resp.text[:200]}"
+                )
+            data = resp.json()
+            creds.token = data["access_token"]
+            # google.auth compares expiry as naive UTC
+            creds.expiry = datetime.now(tz=UTC).replace(tzinfo=None) + timedelta(
+                seconds=data.get("expires_in", 3600)
+            )
+
+    async def _token(self) -> str:
+        if not self.creds.token or self.creds.expired:
+            await self.refresh(self.creds.token)
+        return self.creds.token or ""
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        headers = kwargs.pop("headers", {})
+        refreshed = False
+        for attempt in itertools.count():
+            token = await self._token()
+            try:
+                async with gmail_requests().slot(self._share_key):
+                    resp = await self._http.request(
+                        method,
+                        url,
+                        headers={**headers, "Authorization": f"Bearer {token}"},
+                        **kwargs,
+                    )
+            except httpx.TransportError:
+                if attempt >= self._max_retries:
+                    raise
+                await asyncio.sleep(_retry_delay(attempt, None))
+                continue
+            if resp.is_success:
+                return resp
+            if resp.status_code == 401 and not refreshed:
+                # Revoked or clock-skewed token: refresh once and resend
+                refreshed = True
+                await self.refresh(token)
+                continue
+            error = GmailApiError.from_response(resp.status_code, resp.content)
+            retryable = resp.status_code in _RETRY_STATUSES or error.rate_limited
+            if not retryable or attempt >= self._max_retries:
+                raise error
+            await asyncio.sleep(_retry_delay(attempt, resp.headers.get("Retry-After")))
+        raise AssertionError("unreachable")
+
+    async def _get_json(self, path: str, params: dict | None = None) -> dict:
+        resp = await self._send("GET", f"{_API_URL}{path}", params=params)
+        return resp.json()
+
+    async def get_profile(self) -> dict:
+        return await self._get_json("/profile")
+
+    async def iter_message_ids(self, query: str) -> AsyncIterator[list[str]]:
+        """Yield the ids of messages matching a Gmail search query by page.
+
+        Pages hold up to 500 ids; callers can start on the first page while
+        the rest are still being listed.
+        """
+        params: dict = {"q": query, "maxResults": 500}
+        while True:
+            result = await self._get_json("/messages", params)
+            yield [m["id"] for m in result.get("messages", [])]
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return
+            params = {**params, "pageToken": page_token}
+
+    async def list_added_message_ids(self, start_history_id: str) -> set[str] | None:
+        """Ids of messages added since a history checkpoint.
+
+        Returns None when Gmail no longer has history that far back (404), in
+        which case the caller must fall back to a full scan.
+        """
+        message_ids: set[str] = set()
+        params: dict = {
+            "startHistoryId": start_history_id,
+            "historyTypes": ["messageAdded"],
+            "maxResults": 500,
+        }
+        while True:
+            try:
+                result = await self._get_json("/history", params)
+            except GmailApiError as exc:
+                if exc.status == 404:
+                    return None
+                raise
+            for record in result.get("history", []):
+                for added in record.get("messagesAdded", []):
+                    message_ids.add(added["message"]["id"])
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return message_ids
+            params = {**params, "pageToken": page_token}
+
+    async def get_message(self, email_id: str, params: dict) -> dict:
+        return await self._get_json(f"/messages/{quote(email_id, safe='')}", params)
+
+    async def get_messages(
+        self, email_ids: list[str], params: dict
+    ) -> dict[str, dict | Exception]:
+        """Fetch messages by id with ``messages.get`` params.
+
+        A single id is a plain ``messages.get``; several go out as one Gmail
+        batch request. Per-message failures are returned in place of the
+        message; a failure of the request as a whole is raised.
+        """
+        if len(email_ids) == 1:
+            email_id = email_ids[0]
+            try:
+                return {email_id: await self.get_message(email_id, params)}
+            except GmailApiError as exc:
+                return {email_id: exc}
+
+        boundary = f"batch_{random.getrandbits(64):016x}"
+        query = httpx.QueryParams(params)
+        body = "".join(
+            f"--{boundary}\r\n"
+            "Content-Type: application/http\r\n"
+            f"Content-ID: <item{i}>\r\n\r\n"
+            f"GET {_BATCH_PATH}/{quote(email_id, safe='')}?{query} HTTP/1.1\r\n\r\n"
+            for i, email_id in enumerate(email_ids)
+        )
+        resp = await self._send(
+            "POST",
+            _BATCH_URL,
+            content=f"{body}--{boundary}--\r\n".encode(),
+            headers={"Content-Type": f"multipart/mixed; boundary={boundary}"},
+        )
+        return _parse_batch_response(
+            resp.headers.get("Content-Type", ""), resp.content, email_ids
+        )
+
+
+def _parse_batch_response(
+    content_type: str, body: bytes, email_ids: list[str]
+) -> dict[str, dict | Exception]:
+    """Split a multipart/mixed batch reply into per-message results."""
+    envelope = message_from_bytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    results: dict[str, dict | Exception] = {}
+    for part in envelope.walk():
+        match = re.search(r"item(\d+)", part.get("Content-ID", ""))
+        if (
+            part.is_multipart()
+            or match is None
+            or int(match.group(1)) >= len(email_ids)
+        ):
+            continue
+        email_id = email_ids[int(match.group(1))]
+        raw = part.get_payload(decode=True)
+        if not isinstance(raw, bytes):
+            continue
+        status_line, _, rest = raw.decode(errors="replace").lstrip().partition("\n")
+        payload = re.split(r"\r?\n\r?\n", rest, maxsplit=1)[-1]
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            results[email_id] = GmailApiError(502, f"Bad batch part: {status_line}")
+            continue
+        if 200 <= status < 300:
+            try:
+                results[email_id] = json.loads(payload)
+            except ValueError:
+                results[email_id] = GmailApiError(502, "Malformed batch part body")
+        else:
+            results[email_id] = GmailApiError.from_response(status, payload)
+    for email_id in email_ids:
+        results.setdefault(
+            email_id, GmailApiError(502, f"No batch response for {email_id}")
+        )
+    return results
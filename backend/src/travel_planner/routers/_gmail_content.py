@@ -0,0 +1,115 @@
+"""Relevance-aware trimming of email text before it is sent to Claude.
+
+Sending the first N characters of an email wastes the budget on headers,
+marketing blocks and legal footers, and cuts off itineraries that sit further
+down. ``select_relevant_text`` instead scores each paragraph for booking
+signals (dates, times, confirmation codes, flight numbers, addresses) and
+packs the best ones into a token budget, keeping their original order.
+"""
+
+import re
+
+# Rough chars-per-token ratio for English prose; good enough for budgeting
+_CHARS_PER_TOKEN = 4
+
+_SIGNALS: list[tuple[re.Pattern[str], int]] = [
+    # Dates: 2026-03-15, Mar 15, 15 March
+    (
+        re.compile(
+            r"\b(\d{4}-\d{2}-\d{2}|(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)"
+            r"[a-z]*\.?\s+\d{1,2}|\d{1,2}\s+(jan|feb|mar|apr|may|jun|jul|aug|sep|"
+            r"oct|nov|dec)[a-z]*)\b",
+            re.IGNORECASE,
+        ),
+        3,
+    ),
+    (re.compile(r"\b\d{1,2}:\d{2}\s*([ap]\.?m\.?)?", re.IGNORECASE), 2),
+    # Confirmation codes and their labels
+    (
+        re.compile(
+            r"(?i:confirmation|booking|reservation|record locator|pnr|itinerary)"
+            r"[^\n]{0,20}?\b[A-Z0-9]{5,10}\b"
+        ),
+        4,
+    ),
+    # Flight numbers and airport pairs
+    (re.compile(r"\b[A-Z][A-Z0-9]\s?\d{1,4}\b"), 2),
+    (re.compile(r"\b[A-Z]{3}\s*(→|->|–|-|to)\s*[A-Z]{3}\b"), 3),
+    # Street addresses: "1220 Pearl St", "401 Carrer de Mallorca"
+    (
+        re.compile(
+            r"\b\d{1,5}\s+[A-Z][a-z]+(\s+[A-Z][a-z]+)*\s+(st|street|ave|avenue|"
+            r"rd|road|blvd|way|dr|drive|lane|ln)\b|\b(carrer|calle|rue|via)\s",
+            re.IGNORECASE,
+        ),
+        2,
+    ),
+    (
+        re.compile(
+            r"\b(check-?in|check-?out|depart\w*|arriv\w*|pick-?up|drop-?off|"
+            r"nights?|guests?|passengers?|seat|gate|terminal|room|hotel|flight)\b",
+            re.IGNORECASE,
+        ),
+        1,
+    ),
+]
+_BOILERPLATE = re.compile(
+    r"\b(unsubscribe|privacy|terms (and|&) conditions|terms of (use|service)|"
+    r"all rights reserved|copyright|©|do not reply|view (it )?in (your )?browser|"
+    r"manage (your )?preferences|this email was sent|liability|arbitration)\b",
+    re.IGNORECASE,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def _paragraphs(text: str) -> list[str]:
+    blocks = [p.strip() for p in re.split(r"\n\s*\n", text)]
+    # Plain-text mails often use single newlines; split long blocks further
+    out: list[str] = []
+    for block in blocks:
+        if len(block) > 600:
+            out.extend(line.strip() for line in block.splitlines())
+        else:
+            out.append(block)
+    return [p for p in out if p]
+
+
+def score_paragraph(paragraph: str) -> int:
+    """Booking-signal score of one paragraph; boilerplate scores negative."""
+    score = sum(
+        weight * min(len(pattern.findall(paragraph)), 3) for pattern, weight in _SIGNALS
+    )
+    if _BOILERPLATE.search(paragraph):
+        score -= 5
+    return score
+
+
+def select_relevant_text(text: str, token_budget: int) -> str:
+    """The highest-scoring paragraphs of ``text`` that fit in ``token_budget``.
+
+    Text that already fits is returned unchanged. Paragraphs keep their
+    original order; ties go to the earlier paragraph, so mail without any
+    booking signal degrades to plain truncation. Boilerplate (footers, legal
+    notices) is dropped even when there is room for it.
+    """
+    if estimate_tokens(text) <= token_budget:
+        return text
+    paragraphs = _paragraphs(text)
+    scores = [score_paragraph(p) for p in paragraphs]
+    ranked = sorted(range(len(paragraphs)), key=lambda i: (-scores[i], i))
+    budget = token_budget * _CHARS_PER_TOKEN
+    chosen: list[int] = []
+    used = 0
+    for i in ranked:
+        # +2 for the paragraph separator
+        size = len(paragraphs[i]) + 2
+        if used + size > budget or scores[i] < 0:
+            continue
+        chosen.append(i)
+        used += size
+    if not chosen:
+        return text[:budget]
+    return "\n\n".join(paragraphs[i] for i in sorted(chosen))
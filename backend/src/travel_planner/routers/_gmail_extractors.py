@@ -0,0 +1,298 @@
+"""Deterministic booking extractors for high-volume travel senders.
+
+Airline and hotel confirmations are highly regular, so for known sender
+domains the booking fields can be read straight from the email text instead of
+asking Claude. Extractors return the same dict shape as ``_parse_with_claude``
+(title, category, date, start_time, end_time, location, confirmation_number,
+notes) or None when the email doesn't look like a confirmation they
+understand, in which case the scan falls back to Claude. They are deliberately
+strict: a missing date, code or location means None, never a guess.
+
+Register new senders with ``register(domain, extractor)``.
+"""
+
+import logging
+import re
+from collections.abc import Callable
+from datetime import date, datetime
+
+logger = logging.getLogger(__name__)
+
+Extractor = Callable[[str, str, date | None], dict | None]
+"""(subject, body, received) -> parsed booking or None."""
+
+_EXTRACTORS: dict[str, Extractor] = {}
+
+
+def register(domain: str, extractor: Extractor) -> None:
+    """Use ``extractor`` for mail from ``domain`` and its subdomains."""
+    _EXTRACTORS[domain] = extractor
+
+
+def _sender_domain(sender: str) -> str:
+    match = re.search(r"<([^>]+)>", sender)
+    email = match.group(1) if match else sender
+    return email.split("@")[-1].lower().strip()
+
+
+def find_extractor(sender: str) -> Extractor | None:
+    domain = _sender_domain(sender)
+    while domain:
+        if domain in _EXTRACTORS:
+            return _EXTRACTORS[domain]
+        _, _, domain = domain.partition(".")
+    return None
+
+
+def extract_booking(
+    subject: str, sender: str, body: str, received: date | None = None
+) -> dict | None:
+    """Parse a booking with the sender's extractor, or None to fall back."""
+    extractor = find_extractor(sender)
+    if extractor is None:
+        return None
+    try:
+        return extractor(subject, body, received)
+    except Exception:
+        logger.warning("Extractor failed for %s: %s", sender, subject, exc_info=True)
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Field parsers
+# ---------------------------------------------------------------------------
+
+_MONTHS = {
+    m: i
+    for i, names in enumerate(
+        [
+            ("jan", "january"),
+            ("feb", "february"),
+            ("mar", "march"),
+            ("apr", "april"),
+            ("may",),
+            ("jun", "june"),
+            ("jul", "july"),
+            ("aug", "august"),
+            ("sep", "sept", "september"),
+            ("oct", "october"),
+            ("nov", "november"),
+            ("dec", "december"),
+        ],
+        start=1,
+    )
+    for m in names
+}
+_MONTH = r"(?P<month>[A-Za-z]{3,9})\.?"
+_DATE_PATTERNS = [
+    re.compile(r"\b(?P<year>\d{4})-(?P<mnum>\d{2})-(?P<day>\d{2})\b"),
+    # Mar 15, 2026 / March 15 / Sat, Mar 15
+    re.compile(
+        rf"\b{_MONTH}\s+(?P<day>\d{{1,2}})(?:st|nd|rd|th)?"
+        rf"(?:,?\s+(?P<year>\d{{4}}))?\b"
+    ),
+    # 12 June 2026 / 3 July
+    re.compile(rf"\b(?P<day>\d{{1,2}})\s+{_MONTH}(?:,?\s+(?P<year>\d{{4}}))?\b"),
+]
+_TIME = re.compile(r"\b(\d{1,2}):(\d{2})\s*([AaPp]\.?[Mm]\.?)?")
+_CONFIRMATION = re.compile(
+    r"(?i:\b(?:confirmation|booking|reservation|record locator|pnr)"
+    r"\s*(?:code|number|no\.?|#|id|reference|ref\.?)?\s*(?:is|:|#)?:?)\s*"
+    r"\b(?P<code>[A-Z0-9][A-Z0-9-]{4,14})\b"
+)
+_NIGHTS = re.compile(r"\b(\d{1,2})\s+nights?\b", re.IGNORECASE)
+
+
+def find_date(text: str, received: date | None) -> date | None:
+    """First calendar date in ``text``; a missing year is taken from ``received``.
+
+    A yearless date more than a month before ``received`` is assumed to be
+    next year (a December email about a January trip).
+    """
+    for pattern in _DATE_PATTERNS:
+        for m in pattern.finditer(text):
+            groups = m.groupdict()
+            if groups.get("mnum"):
+                month = int(groups["mnum"])
+            else:
+                month = _MONTHS.get(groups["month"].lower(), 0)
+            if not month:
+                continue
+            year = groups.get("year")
+            try:
+                if year:
+                    return date(int(year), month, int(groups["day"]))
+                if received is None:
+                    return None
+                found = date(received.year, month, int(groups["day"]))
+                if (received - found).days > 31:
+                    found = found.replace(year=received.year + 1)
+                return found
+            except ValueError:
+                continue
+    return None
+
+
+def parse_received(email_date: str | None) -> date | None:
+    """The scan's ``YYYY-MM-DD`` email date as a date."""
+    if not email_date:
+        return None
+    try:
+        return datetime.strptime(email_date, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def find_time(text: str) -> str | None:
+    """First clock time in ``text`` as HH:MM (24h)."""
+    m = _TIME.search(text)
+    if m is None:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2))
+    meridiem = (m.group(3) or "").lower().replace(".", "")
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return None
+    return f"{hour:02d}:{minute:02d}"
+
+
+def find_confirmation(text: str) -> str | None:
+    m = _CONFIRMATION.search(text)
+    return m.group("code") if m else None
+
+
+def _after(label: str, text: str, span: int = 80) -> str | None:
+    """The ``span`` characters that follow the first ``label`` match."""
+    m = re.search(label, text, re.IGNORECASE)
+    return text[m.end() : m.end() + span] if m else None
+
+
+def _booking(
+    title: str,
+    category: str,
+    day: date,
+    location: str,
+    confirmation: str,
+    start_time: str | None = None,
+    end_time: str | None = None,
+    notes: str | None = None,
+) -> dict:
+    return {
+        "title": title,
+        "category": category,
+        "date": day.isoformat(),
+        "start_time": start_time,
+        "end_time": end_time,
+        "location": location,
+        "confirmation_number": confirmation,
+        "notes": notes,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Extractors
+# ---------------------------------------------------------------------------
+
+# Confirmations only; schedule changes, credits and status mail go to Claude
+_FLIGHT_SUBJECT = re.compile(
+    r"(confirmation|e-?ticket|itinerary|receipt|is booked|your trip)", re.IGNORECASE
+)
+_NOT_A_BOOKING = re.compile(
+    r"(change|cancel|credit|delay|statement|miles|points|survey|offer|sale)",
+    re.IGNORECASE,
+)
+_ROUTE = re.compile(r"\b([A-Z]{3})\s*(?:→|->|–|-|to)\s*([A-Z]{3})\b")
+
+
+def flight_extractor(airline: str) -> Extractor:
+    """Extractor for an airline whose flight numbers start with ``airline``."""
+    flight_no = re.compile(rf"\b{airline}\s?(\d{{1,4}})\b")
+
+    def extract(subject: str, body: str, received: date | None) -> dict | None:
+        if not _FLIGHT_SUBJECT.search(subject) or _NOT_A_BOOKING.search(subject):
+            return None
+        number, route = flight_no.search(body), _ROUTE.search(body)
+        confirmation = find_confirmation(body)
+        if number is None or route is None or confirmation is None:
+            return None
+        departure = _after(r"\bdepart(?:ure|ing|s)?\b", body) or body[route.end() :]
+        day = find_date(departure, received) or find_date(body, received)
+        if day is None:
+            return None
+        origin, dest = route.groups()
+        arrival = _after(r"\barriv(?:al|es|ing)\b", body)
+        return _booking(
+            title=f"Flight {airline}{number.group(1)} {origin}→{dest}",
+            category="transport",
+            day=day,
+            location=dest,
+            confirmation=confirmation,
+            start_time=find_time(departure),
+            end_time=find_time(arrival) if arrival else None,
+        )
+
+    return extract
+
+
+_LODGING_SUBJECT = re.compile(r"(confirm|reservation|booking|your stay)", re.IGNORECASE)
+# "You're going to Boulder!" -> Boulder; the place itself must be capitalised,
+# bar name particles like "de" in "Gare de Lyon". Greetings ("Welcome to
+# Marriott Bonvoy") name the brand, not the stay, so they are not used
+_LODGING_PLACE = re.compile(
+    r"(?i:you're going to|reservation (?:confirmed )?for|your stay at|booking at)"
+    r"\s+(?P<place>[A-Z][\w'&.-]*"
+    r"(?:\s+(?:(?:de|du|des|la|le|di|da|del|of|the)\s+)?[A-Z][\w'&.-]*){0,4})"
+)
+
+
+def lodging_extractor(brand: str) -> Extractor:
+    """Extractor for hotel and rental confirmations from ``brand``."""
+
+    def extract(subject: str, body: str, received: date | None) -> dict | None:
+        if not _LODGING_SUBJECT.search(subject) or _NOT_A_BOOKING.search(subject):
+            return None
+        check_in = _after(r"\bcheck-?in(?: date)?\s*:?", body)
+        confirmation = find_confirmation(body)
+        place = _LODGING_PLACE.search(subject) or _LODGING_PLACE.search(body)
+        if check_in is None or confirmation is None or place is None:
+            return None
+        day = find_date(check_in, received)
+        if day is None:
+            return None
+        location = place.group("place").rstrip(".")
+        nights = _NIGHTS.search(body)
+        stay = f" {nights.group(1)}-night stay" if nights else ""
+        return _booking(
+            title=f"{brand} {location}{stay}",
+            category="lodging",
+            day=day,
+            location=location,
+            confirmation=confirmation,
+            start_time=find_time(check_in),
+        )
+
+    return extract
+
+
+for _domain, _airline in [
+    ("united.com", "UA"),
+    ("delta.com", "DL"),
+    ("aa.com", "AA"),
+    ("southwest.com", "WN"),
+    ("jetblue.com", "B6"),
+    ("alaskaair.com", "AS"),
+]:
+    register(_domain, flight_extractor(_airline))
+
+for _domain, _brand in [
+    ("airbnb.com", "Airbnb"),
+    ("vrbo.com", "Vrbo"),
+    ("marriott.com", "Marriott"),
+    ("email-marriott.com", "Marriott"),
+    ("hilton.com", "Hilton"),
+    ("hyatt.com", "Hyatt"),
+]:
+    register(_domain, lodging_extractor(_brand))
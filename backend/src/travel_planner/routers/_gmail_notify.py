@@ -0,0 +1,174 @@
+"""Scan progress notifications over Postgres LISTEN/NOTIFY.
+
+Scan writers call ``notify_scan`` inside the transaction that records new
+ScanEvents or a status change, so the notification is delivered exactly when
+those rows become visible. Each API process keeps one dedicated connection
+that LISTENs on the channels of the scans its SSE streams follow, and wakes
+those streams instead of having them poll the database every second.
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import AsyncIterator
+from typing import cast
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from travel_planner.db import engine
+
+logger = logging.getLogger(__name__)
+
+
+# Notified when scans are claimed, cancelled or requeued, which moves the
+# queue position of every scan still waiting
+QUEUE_CHANNEL = "scan_queue"
+
+
+def scan_channel(scan_id: UUID) -> str:
+    return f"scan_{scan_id.hex}"
+
+
+async def _driver_connection(conn: AsyncConnection) -> asyncpg.Connection:
+    raw = await conn.get_raw_connection()
+    return cast(asyncpg.Connection, raw.driver_connection)
+
+
+async def notify_scan(db: AsyncSession, scan_id: UUID) -> None:
+    """Queue a notification for ``scan_id``; it is sent when ``db`` commits."""
+    await db.execute(select(func.pg_notify(scan_channel(scan_id), "")))
+
+
+async def notify_queue(db: AsyncSession) -> None:
+    """Queue a notification that the scan queue changed; sent on commit."""
+    await db.execute(select(func.pg_notify(QUEUE_CHANNEL, "")))
+
+
+class ScanNotifier:
+    """Fans NOTIFYs on scan channels out to the streams waiting on them.
+
+    The LISTEN connection is opened on first use and reopened after it
+    drops; while it is down, subscribers are woken so they re-read the
+    database themselves.
+    """
+
+    def __init__(self) -> None:
+        self._conn: AsyncConnection | None = None
+        self._lock = asyncio.Lock()
+        self._waiters: dict[str, set[asyncio.Event]] = {}
+        self._reconnect_task: asyncio.Task[None] | None = None
+
+    def _on_notify(self, connection, pid, channel: str, payload: str) -> None:
+        for event in self._waiters.get(channel, ()):
+            event.set()
+
+    def _on_terminate(self, connection) -> None:
+        logger.warning("Scan notification connection lost")
+        dead, self._conn = self._conn, None
+        for events in self._waiters.values():
+            for event in events:
+                event.set()
+        self._reconnect_task = asyncio.get_running_loop().create_task(
+            self._reconnect(dead)
+        )
+
+    async def _reconnect(self, dead: AsyncConnection | None) -> None:
+        if dead is not None:
+            with contextlib.suppress(Exception):
+                await dead.invalidate()
+        async with self._lock:
+            if not self._waiters:
+                return
+            try:
+                await self._listener()
+            except Exception:
+                logger.warning(
+                    "Scan notification reconnect failed; streams poll until "
+                    "the next subscription",
+                    exc_info=True,
+                )
+
+    async def _listener(self) -> asyncpg.Connection:
+        """The asyncpg connection to LISTEN on, connecting if needed.
+
+        A new connection re-LISTENs on every channel that has subscribers.
+        """
+        if self._conn is None:
+            conn = await engine.connect()
+            driver = await _driver_connection(conn)
+            driver.add_termination_listener(self._on_terminate)
+            for channel in self._waiters:
+                await driver.add_listener(channel, self._on_notify)
+            self._conn = conn
+        return await _driver_connection(self._conn)
+
+    @contextlib.asynccontextmanager
+    async def subscribe(
+        self, scan_id: UUID, queue: bool = False
+    ) -> AsyncIterator[asyncio.Event]:
+        """Yield an event that is set whenever ``scan_id`` is notified.
+
+        With ``queue``, changes to the scan queue set it as well. If the
+        database cannot be reached for LISTEN, the event is simply never set
+        and the caller falls back to its poll interval.
+        """
+        channels = [scan_channel(scan_id)]
+        if queue:
+            channels.append(QUEUE_CHANNEL)
+        event = asyncio.Event()
+        async with self._lock:
+            for channel in channels:
+                first = channel not in self._waiters
+                self._waiters.setdefault(channel, set()).add(event)
+                if first:
+                    try:
+                        driver = await self._listener()
+                        await driver.add_listener(channel, self._on_notify)
+                    except Exception:
+                        logger.warning(
+                            "LISTEN on %s failed; stream falls back to polling",
+                            channel,
+                            exc_info=True,
+                        )
+        try:
+            yield event
+        finally:
+            async with self._lock:
+                for channel in channels:
+                    waiters = self._waiters.get(channel, set())
+                    waiters.discard(event)
+                    if waiters:
+                        continue
+                    self._waiters.pop(channel, None)
+                    if self._conn is not None:
+                        with contextlib.suppress(Exception):
+                            driver = await self._listener()
+                            await driver.remove_listener(channel, self._on_notify)
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._conn is not None:
+                conn, self._conn = self._conn, None
+                with contextlib.suppress(Exception):
+                    await conn.close()
+
+
+_notifier: ScanNotifier | None = None
+
+
+def get_scan_notifier() -> ScanNotifier:
+    """The process-wide notifier, created on first use."""
+    global _notifier
+    if _notifier is None:
+        _notifier = ScanNotifier()
+    return _notifier
+
+
+async def close_scan_notifier() -> None:
+    global _notifier
+    if _notifier is not None:
+        await _notifier.close()
+        _notifier = None
@@ -0,0 +1,95 @@
+"""Persistent cache of Claude parse results for Gmail scans.
+
+Re-sent confirmations, forwarded copies and ``rescan_rejected`` runs feed the
+same text to Claude again. Results are cached under a sha256 of the prompt
+version and the exact prompt input (subject, sender, truncated body), so a hit
+skips the LLM call and a prompt change invalidates every entry. Both travel
+parses and "not travel" verdicts are cached; errors are not.
+
+Parse workers run concurrently, so every lookup and insert uses its own short
+session instead of the scan's. Cache failures are logged and treated as
+misses; they never fail a parse.
+"""
+
+import hashlib
+import logging
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from travel_planner.models.gmail import ParseCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+def parse_cache_key(
+    prompt_version: str, subject: str, sender: str, content: str
+) -> str:
+    h = hashlib.sha256()
+    for part in (prompt_version, subject, sender, content):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ParseCache:
+    """Counts hits and misses for one scan."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> tuple[bool, dict | None]:
+        """Return ``(hit, parsed)``; ``parsed`` is None for a not-travel hit."""
+        try:
+            async with self._session_factory() as db:
+                result = await db.execute(
+                    select(ParseCacheEntry.parsed_data).where(
+                        ParseCacheEntry.key == key
+                    )
+                )
+                row = result.first()
+        except Exception:
+            logger.warning("Parse cache lookup failed", exc_info=True)
+            row = None
+        if row is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, row[0]
+
+    async def put(self, key: str, parsed: dict | None) -> None:
+        try:
+            async with self._session_factory() as db:
+                await db.execute(
+                    insert(ParseCacheEntry)
+                    .values(key=key, parsed_data=parsed)
+                    .on_conflict_do_nothing(index_elements=["key"])
+                )
+                await db.commit()
+        except Exception:
+            logger.warning("Parse cache insert failed", exc_info=True)
+
+    async def evict(self, ttl: timedelta, max_entries: int) -> None:
+        """Drop entries older than ``ttl``, then the oldest beyond ``max_entries``."""
+        overflow = (
+            select(ParseCacheEntry.key)
+            .order_by(ParseCacheEntry.created_at.desc())
+            .offset(max_entries)
+        )
+        try:
+            async with self._session_factory() as db:
+                await db.execute(
+                    delete(ParseCacheEntry).where(
+                        ParseCacheEntry.created_at < datetime.now(tz=UTC) - ttl
+                    )
+                )
+                await db.execute(
+                    delete(ParseCacheEntry).where(ParseCacheEntry.key.in_(overflow))
+                )
+                await db.commit()
+        except Exception:
+            logger.warning("Parse cache eviction failed", exc_info=True)
@@ -0,0 +1,143 @@
+"""Bounded-concurrency pipeline for Gmail scans.
+
+Items flow fetch → parse → write through bounded queues. Fetch and parse run
+with a configurable number of workers each; the writer is a single task, so it
+can safely own the (non-concurrent) database session. Fetch takes one source
+item (e.g. a chunk of message ids) and may fan it out into several items for
+the parse stage. The source may be an async iterable, so items can start
+flowing while it is still producing them (e.g. listing). The writer returns False
+to stop the pipeline early (e.g. the scan was cancelled); any other exception
+raised by a stage aborts the whole pipeline and is re-raised to the caller.
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+_DONE: Any = object()
+
+
+class _StopRequestedError(Exception):
+    """Raised by the writer task to tear down the pipeline on early stop."""
+
+
+@dataclass
+class PipelineStats:
+    """Throughput counters for a single pipeline run."""
+
+    processed: int = 0
+    stopped: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    first_result_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished_at if self.finished_at is not None else time.monotonic()
+        return end - self.started_at
+
+    @property
+    def emails_per_second(self) -> float:
+        return self.processed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+async def run_pipeline(
+    source: Iterable[Any] | AsyncIterable[Any],
+    fetch: Callable[[Any], Awaitable[Iterable[Any]]],
+    parse: Callable[[Any], Awaitable[Any]],
+    write: Callable[[Any], Awaitable[bool]],
+    *,
+    fetch_workers: int,
+    parse_workers: int,
+    queue_size: int,
+    on_idle: Callable[[], Awaitable[bool]] | None = None,
+    idle_interval: float = 1.0,
+) -> PipelineStats:
+    """Run every item in ``source`` through fetch, parse and write.
+
+    ``on_idle`` runs in the writer task whenever no item has arrived for
+    ``idle_interval`` seconds (e.g. to flush buffered writes); like ``write``,
+    it returns False to stop the pipeline.
+
+    Returns throughput stats; ``stats.stopped`` is True when the writer asked
+    the pipeline to stop before the source was exhausted.
+    """
+    fetch_workers = max(1, fetch_workers)
+    parse_workers = max(1, parse_workers)
+    fetch_q: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+    parse_q: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+    write_q: asyncio.Queue[Any] = asyncio.Queue(maxsize=queue_size)
+    remaining = {"fetch": fetch_workers, "parse": parse_workers}
+    stats = PipelineStats()
+
+    async def feed() -> None:
+        if isinstance(source, AsyncIterable):
+            async for item in source:
+                await fetch_q.put(item)
+        else:
+            for item in source:
+                await fetch_q.put(item)
+        for _ in range(fetch_workers):
+            await fetch_q.put(_DONE)
+
+    async def worker(
+        stage: str,
+        inbox: asyncio.Queue[Any],
+        outbox: asyncio.Queue[Any],
+        fn: Callable[[Any], Awaitable[Any]],
+        downstream: int,
+        fan_out: bool = False,
+    ) -> None:
+        while (item := await inbox.get()) is not _DONE:
+            result = await fn(item)
+            for out in result if fan_out else (result,):
+                await outbox.put(out)
+        # The last worker of a stage to finish tells the next stage to wind down
+        remaining[stage] -= 1
+        if remaining[stage] == 0:
+            for _ in range(downstream):
+                await outbox.put(_DONE)
+
+    async def next_item() -> Any:
+        if on_idle is None:
+            return await write_q.get()
+        # Keep one pending get across idle ticks; cancelling and re-issuing
+        # it on every timeout could drop an item
+        get = asyncio.ensure_future(write_q.get())
+        try:
+            while not (await asyncio.wait({get}, timeout=idle_interval))[0]:
+                if not await on_idle():
+                    stats.stopped = True
+                    raise _StopRequestedError
+        finally:
+            get.cancel()
+        return get.result()
+
+    async def writer() -> None:
+        while (item := await next_item()) is not _DONE:
+            if not await write(item):
+                stats.stopped = True
+                raise _StopRequestedError
+            if stats.first_result_at is None:
+                stats.first_result_at = time.monotonic()
+            stats.processed += 1
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(feed())
+            for _ in range(fetch_workers):
+                tg.create_task(
+                    worker("fetch", fetch_q, parse_q, fetch, parse_workers, True)
+                )
+            for _ in range(parse_workers):
+                tg.create_task(worker("parse", parse_q, write_q, parse, 1))
+            tg.create_task(writer())
+    except ExceptionGroup as eg:
+        errors = [e for e in eg.exceptions if not isinstance(e, _StopRequestedError)]
+        if errors:
+            raise errors[0] from None
+    finally:
+        stats.finished_at = time.monotonic()
+    return stats
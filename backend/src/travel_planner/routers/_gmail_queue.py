@@ -0,0 +1,181 @@
+"""Postgres-backed queue of Gmail scans.
+
+A ScanRun row doubles as the job: ``start_scan`` inserts it as ``queued`` and
+scan workers (``python -m travel_planner.worker``) claim the oldest queued
+row with ``SELECT ... FOR UPDATE SKIP LOCKED``. Concurrent workers therefore
+never claim the same scan and never wait on each other's claims.
+
+A claimed scan carries a lease: the claiming worker's ``owner_id`` and a
+``heartbeat_at`` the worker renews while the scan runs. Only scans whose
+lease has expired are handed back to the queue, so a worker starting up or
+shutting down never touches scans owned by its healthy siblings. Every
+transaction that writes scan output first checks the lease in the same
+transaction (``check_lease``), so a worker that lost one cannot write
+alongside the scan's new owner.
+
+At most ``max_running`` scans run at once across all workers: claims take a
+transaction-scoped advisory lock, so two workers cannot both see room for
+the last slot.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from travel_planner.models.gmail import ScanRun, ScanRunStatus
+from travel_planner.routers._gmail_notify import notify_queue
+
+# pg_advisory_xact_lock key serialising scan claims
+_CLAIM_LOCK_ID = 0x5CA9_C1A1
+
+
+class LeaseLostError(Exception):
+    """The scan is no longer leased to this worker; it must stop writing."""
+
+
+@dataclass(frozen=True)
+class ScanJob:
+    scan_run_id: UUID
+    user_id: UUID
+    rescan_rejected: bool
+    bulk_parse: bool
+
+
+async def claim_scan(
+    db: AsyncSession, owner_id: str, max_running: int | None = None
+) -> ScanJob | None:
+    """Lease the oldest queued scan to ``owner_id`` and return it, if any.
+
+    Returns None without claiming while ``max_running`` scans are running.
+    """
+    if max_running is not None:
+        await db.execute(select(func.pg_advisory_xact_lock(_CLAIM_LOCK_ID)))
+        running = await db.execute(
+            select(func.count())
+            .select_from(ScanRun)
+            .where(ScanRun.status == ScanRunStatus.running)
+        )
+        if running.scalar_one() >= max_running:
+            await db.commit()
+            return None
+    next_queued = (
+        select(ScanRun.id)
+        .where(ScanRun.status == ScanRunStatus.queued)
+        .order_by(ScanRun.started_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(ScanRun)
+        .where(ScanRun.id == next_queued)
+        .values(
+            status=ScanRunStatus.running,
+            # A scan requeued after its lease expired keeps its start time
+            started_at=func.coalesce(ScanRun.started_at, func.now()),
+            owner_id=owner_id,
+            heartbeat_at=func.now(),
+        )
+        .returning(
+            ScanRun.id, ScanRun.user_id, ScanRun.rescan_rejected, ScanRun.bulk_parse
+        )
+        .execution_options(synchronize_session=False)
+    )
+    row = result.first()
+    if row is not None:
+        await notify_queue(db)
+    await db.commit()
+    return ScanJob(*row) if row is not None else None
+
+
+async def queue_position(db: AsyncSession, scan_run: ScanRun) -> int:
+    """1-based position of a queued scan among those waiting to be claimed."""
+    result = await db.execute(
+        select(func.count())
+        .select_from(ScanRun)
+        .where(
+            ScanRun.status == ScanRunStatus.queued,
+            ScanRun.started_at <= scan_run.started_at,
+        )
+    )
+    return max(1, result.scalar_one())
+
+
+async def renew_leases(
+    db: AsyncSession, owner_id: str, scan_ids: list[UUID]
+) -> set[UUID]:
+    """Extend ``owner_id``'s leases on ``scan_ids``; return the ones it still holds.
+
+    A scan missing from the result was reclaimed after its lease expired and
+    must no longer be run by this owner.
+    """
+    result = await db.execute(
+        update(ScanRun)
+        .where(ScanRun.id.in_(scan_ids), ScanRun.owner_id == owner_id)
+        .values(heartbeat_at=func.now())
+        .returning(ScanRun.id)
+        .execution_options(synchronize_session=False)
+    )
+    held = set(result.scalars().all())
+    await db.commit()
+    return held
+
+
+async def check_lease(db: AsyncSession, scan_id: UUID, owner_id: str) -> None:
+    """Raise LeaseLostError unless ``owner_id`` still holds ``scan_id``.
+
+    Locks the scan's row until the transaction ends, so the lease cannot be
+    taken over between this check and the caller's commit.
+    """
+    result = await db.execute(
+        select(ScanRun.id)
+        .where(ScanRun.id == scan_id, ScanRun.owner_id == owner_id)
+        .with_for_update()
+    )
+    if result.scalar_one_or_none() is None:
+        raise LeaseLostError(scan_id)
+
+
+async def release_scans(db: AsyncSession, owner_id: str, scan_ids: list[UUID]) -> None:
+    """Put ``owner_id``'s unfinished ``scan_ids`` back in the queue."""
+    await db.execute(
+        update(ScanRun)
+        .where(
+            ScanRun.id.in_(scan_ids),
+            ScanRun.owner_id == owner_id,
+            ScanRun.status == ScanRunStatus.running,
+        )
+        .values(status=ScanRunStatus.queued, owner_id=None, heartbeat_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await notify_queue(db)
+    await db.commit()
+
+
+async def requeue_expired_scans(db: AsyncSession, lease: timedelta) -> list[UUID]:
+    """Requeue running scans whose owner has not renewed them within ``lease``.
+
+    Scans claimed before leases existed have no heartbeat and count as
+    expired. The next worker to claim them resumes from their checkpoint.
+    """
+    result = await db.execute(
+        update(ScanRun)
+        .where(
+            ScanRun.status == ScanRunStatus.running,
+            or_(
+                ScanRun.heartbeat_at.is_(None),
+                ScanRun.heartbeat_at < func.now() - lease,
+            ),
+        )
+        .values(status=ScanRunStatus.queued, owner_id=None, heartbeat_at=None)
+        .returning(ScanRun.id)
+        .execution_options(synchronize_session=False)
+    )
+    expired = list(result.scalars().all())
+    if expired:
+        await notify_queue(db)
+    await db.commit()
+    return expired
@@ -0,0 +1,214 @@
+"""Fair sharing of a worker's Gmail and Claude capacity across its scans.
+
+Each scan already bounds its own fetch and parse concurrency, but several
+scans in one worker used to add up to whatever those bounds multiplied out
+to. ``FairLimiter`` caps the requests in flight for the whole process and,
+when scans are waiting, hands freed slots out round-robin by scan, so a scan
+of 20k emails cannot starve one of 50 that started a second later.
+
+Claude calls go through ``call_llm``, whose limiter is an ``AdaptiveLimiter``:
+its window grows while calls succeed and halves on 429/529, and rate-limited
+calls are retried after ``retry-after`` (plus jitter) instead of failing the
+email.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import math
+import random
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable, Mapping
+
+import anthropic
+
+from travel_planner.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Claude replies that mean "slow down": rate limited, overloaded
+_RATE_LIMIT_STATUSES = {429, 529}
+# Transient failures retried without shrinking the window
+_RETRY_STATUSES = {500, 502, 503, 504}
+# Upper bound on a single backoff, whatever retry-after asks for
+_MAX_RETRY_DELAY = 60.0
+
+
+class FairLimiter:
+    """A semaphore that grants free slots round-robin across keys."""
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = max(1, capacity)
+        self.in_use = 0
+        self._waiters: OrderedDict[Hashable, deque[asyncio.Future[None]]] = (
+            OrderedDict()
+        )
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._waiters.values())
+
+    async def acquire(self, key: Hashable = None) -> None:
+        if self.in_use < self.capacity and not self._waiters:
+            self.in_use += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: pass the slot on
+                self.release()
+            else:
+                queue = self._waiters.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiters[key]
+            raise
+
+    def release(self) -> None:
+        self.in_use -= 1
+        self._grant()
+
+    def _grant(self) -> None:
+        while self.in_use < self.capacity and self._waiters:
+            key, queue = next(iter(self._waiters.items()))
+            future = queue.popleft()
+            if queue:
+                # This key has had its turn; the next waiting key goes first
+                self._waiters.move_to_end(key)
+            else:
+                del self._waiters[key]
+            if not future.done():
+                self.in_use += 1
+                future.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key: Hashable = None) -> AsyncIterator[None]:
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class AdaptiveLimiter(FairLimiter):
+    """A FairLimiter whose capacity follows AIMD between ``floor`` and ``ceiling``.
+
+    Each success grows ``window`` by ``1 / window``, about one slot per
+    window's worth of successful calls. A rate-limited call halves it, at
+    most once per round: calls that started before the last cut were sent
+    under the old window and do not cut it again.
+    """
+
+    def __init__(self, initial: int, ceiling: int, floor: int = 1) -> None:
+        super().__init__(ceiling)
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.window = float(min(max(initial, self.floor), self.ceiling))
+        self.capacity = int(self.window)
+        self.rate_limits = 0
+        self._last_cut = -math.inf
+
+    def on_success(self) -> None:
+        self.window = min(self.ceiling, self.window + 1 / self.window)
+        self._resize()
+
+    def on_rate_limited(self, started_at: float) -> None:
+        """Record a 429/529 for a call sent at ``started_at`` (monotonic)."""
+        self.rate_limits += 1
+        if started_at < self._last_cut:
+            return
+        self.window = max(self.floor, self.window / 2)
+        self._last_cut = time.monotonic()
+        logger.info("LLM rate limited; concurrency window now %.1f", self.window)
+        self._resize()
+
+    def _resize(self) -> None:
+        self.capacity = int(self.window)
+        self._grant()
+
+
+def _retry_delay(attempt: int, headers: Mapping[str, str] | None) -> float:
+    """``retry-after`` if the reply had one, else exponential; plus jitter."""
+    delay = None
+    if headers is not None:
+        for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+            try:
+                delay = float(headers[name]) * scale
+                break
+            except (KeyError, ValueError):
+                continue
+    if delay is None:
+        delay = 2.0**attempt
+    delay = min(delay, _MAX_RETRY_DELAY)
+    # Spread out the emails that were all told to come back at once
+    return delay + random.uniform(0, delay / 2)
+
+
+async def call_llm(
+    call: Callable[[], Awaitable[anthropic.types.Message]],
+    share_key: Hashable = None,
+    on_retry: Callable[[], None] | None = None,
+) -> anthropic.types.Message:
+    """Run a Claude request under the adaptive LLM limiter, with retries.
+
+    ``call`` must not retry by itself (use a client with ``max_retries=0``),
+    or the limiter never sees the rate limits. 429/529 replies shrink the
+    window; they, 5xx replies and connection errors are retried until
+    ``llm_retry_budget_seconds`` is spent, after which the error is raised.
+    """
+    limiter = llm_requests()
+    deadline = time.monotonic() + settings.llm_retry_budget_seconds
+    for attempt in itertools.count():
+        started = time.monotonic()
+        async with limiter.slot(share_key):
+            try:
+                result = await call()
+            except anthropic.APIStatusError as exc:
+                if exc.status_code in _RATE_LIMIT_STATUSES:
+                    limiter.on_rate_limited(started)
+                elif exc.status_code not in _RETRY_STATUSES:
+                    raise
+                delay = _retry_delay(attempt, exc.response.headers)
+                if time.monotonic() + delay > deadline:
+                    raise
+            except anthropic.APIConnectionError:
+                delay = _retry_delay(attempt, None)
+                if time.monotonic() + delay > deadline:
+                    raise
+            else:
+                limiter.on_success()
+                return result
+        if on_retry is not None:
+            on_retry()
+        await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+_gmail_requests: FairLimiter | None = None
+_llm_requests: AdaptiveLimiter | None = None
+
+
+def gmail_requests() -> FairLimiter:
+    """Process-wide limit on Gmail API requests in flight."""
+    global _gmail_requests
+    if _gmail_requests is None:
+        _gmail_requests = FairLimiter(settings.gmail_max_in_flight_requests)
+    return _gmail_requests
+
+
+def llm_requests() -> AdaptiveLimiter:
+    """Process-wide, rate-limit-adaptive limit on Claude requests in flight."""
+    global _llm_requests
+    if _llm_requests is None:
+        _llm_requests = AdaptiveLimiter(
+            settings.llm_initial_in_flight_requests,
+            settings.llm_max_in_flight_requests,
+            settings.llm_min_in_flight_requests,
+        )
+    return _llm_requests
@@ -0,0 +1,161 @@
+"""Date-sharded, concurrent listing of a scan's Gmail search.
+
+A scan's search covers everything from 90 days before the user's earliest
+trip until now, which for a user with years of trips is tens of thousands of
+ids listed 500 per page, one page after another. ``plan_shards`` splits that
+window into ``after:``/``before:`` ranges at the edges of each trip's booking
+window, and ``list_shards`` lists them concurrently.
+
+Pages come out in shard priority order: ranges overlapping the booking window
+of a trip that has not ended yet come first, newest first, then the rest
+newest first. Later shards keep listing into a bounded buffer meanwhile, so
+the scan works through mail about upcoming trips before the archive without
+the archive piling up in memory.
+"""
+
+import asyncio
+import contextlib
+import itertools
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import cast
+
+from travel_planner.routers._gmail_client import GmailClient
+
+# Booking mail for a trip arrives up to this long before it starts
+BOOKING_LEAD = timedelta(days=90)
+
+_DONE = object()
+
+
+@dataclass
+class ListShard:
+    """A date range of the search: ``after`` inclusive, ``before`` exclusive.
+
+    ``before`` is None for the newest shard, which is open-ended like the
+    unsharded query.
+    """
+
+    after: date
+    before: date | None
+    upcoming: bool = False
+
+    def query(self, search: str, first: bool) -> str:
+        # Gmail's date filters are day-granular in the mailbox's timezone, so
+        # each shard but the first reaches a day back; overlaps are deduped
+        after = self.after if first else self.after - timedelta(days=1)
+        query = f"{search} after:{after.strftime('%Y/%m/%d')}"
+        if self.before is not None:
+            query += f" before:{self.before.strftime('%Y/%m/%d')}"
+        return query
+
+
+def plan_shards(
+    since: date,
+    trips: Sequence[tuple[date, date]],
+    today: date,
+    max_shards: int,
+    min_days: int,
+) -> list[ListShard]:
+    """Split the search window from ``since`` into shards, in listing order.
+
+    ``trips`` are (start, end) dates. Shards are cut where trip booking
+    windows begin and end, then the shortest are merged into a neighbour
+    until there are at most ``max_shards``, each at least ``min_days`` long.
+    """
+    until = today + timedelta(days=1)
+    if since >= until:
+        return [ListShard(after=since, before=None)]
+    edges = {since, until}
+    for start, end in trips:
+        edges.update((start - BOOKING_LEAD, end + timedelta(days=1)))
+    bounded = sorted(edge for edge in edges if since <= edge <= until)
+    spans = list(itertools.pairwise(bounded))
+
+    def days(i: int) -> int:
+        return (spans[i][1] - spans[i][0]).days
+
+    while len(spans) > 1:
+        shortest = min(range(len(spans)), key=days)
+        if len(spans) <= max(1, max_shards) and days(shortest) >= min_days:
+            break
+        # Merge into the shorter neighbour
+        if shortest == 0 or (
+            shortest < len(spans) - 1 and days(shortest + 1) < days(shortest - 1)
+        ):
+            left = shortest
+        else:
+            left = shortest - 1
+        spans[left : left + 2] = [(spans[left][0], spans[left + 1][1])]
+
+    shards = [
+        ListShard(
+            after=after,
+            before=before,
+            upcoming=any(
+                end >= today and after <= end and start - BOOKING_LEAD < before
+                for start, end in trips
+            ),
+        )
+        for after, before in spans
+    ]
+    # The newest shard stays open-ended, like the unsharded query
+    shards[-1].before = None
+    shards.sort(key=lambda shard: (not shard.upcoming, -shard.after.toordinal()))
+    return shards
+
+
+async def list_shards(
+    gmail: GmailClient,
+    search: str,
+    shards: Sequence[ListShard],
+    concurrency: int,
+    max_buffered: int = 4,
+) -> AsyncIterator[list[str]]:
+    """Yield pages of ids for ``search`` across ``shards``, in shard order.
+
+    Up to ``concurrency`` shards are listed at once, started in shard order.
+    A shard stops listing once ``max_buffered`` of its pages are waiting to be
+    yielded. Ids in the overlap between shards may be yielded twice.
+    """
+    earliest = min(shard.after for shard in shards)
+    slots = asyncio.Semaphore(max(1, concurrency))
+    buffers: list[asyncio.Queue[object]] = [
+        asyncio.Queue(maxsize=max(1, max_buffered)) for _ in shards
+    ]
+    tasks: list[asyncio.Task[None]] = []
+
+    async def produce(shard: ListShard, buffer: asyncio.Queue[object]) -> None:
+        last: object = _DONE
+        try:
+            query = shard.query(search, first=shard.after == earliest)
+            async for page in gmail.iter_message_ids(query):
+                await buffer.put(page)
+        except Exception as exc:
+            last = exc
+        finally:
+            slots.release()
+        await buffer.put(last)
+
+    async def launch() -> None:
+        # Slots are taken in shard order, so a shard whose buffer is being
+        # drained is always listing or done, never waiting behind later
+        # shards that are blocked on full buffers
+        for shard, buffer in zip(shards, buffers, strict=True):
+            await slots.acquire()
+            tasks.append(asyncio.create_task(produce(shard, buffer)))
+
+    tasks.append(asyncio.create_task(launch()))
+    try:
+        for buffer in buffers:
+            while (page := await buffer.get()) is not _DONE:
+                if isinstance(page, Exception):
+                    raise page
+                yield cast(list[str], page)
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
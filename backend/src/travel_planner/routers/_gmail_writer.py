@@ -0,0 +1,89 @@
+"""Buffered writer for Gmail scan output rows.
+
+The scan used to commit once per email. ScanEventWriter instead collects the
+rows for each email (ScanEvent plus any ImportRecord, UnmatchedImport,
+ItineraryDay and Activity) and writes them in one add_all + commit, which the
+asyncpg dialect sends as multi-row INSERTs. Given a scan id, each flush also
+NOTIFYs the scan's channel so SSE streams pick the new rows up at once. Given
+the worker's lease owner id too, each flush first checks the lease in its own
+transaction and writes nothing if the scan was handed to another worker.
+"""
+
+import time
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from travel_planner.routers._gmail_notify import notify_scan
+from travel_planner.routers._gmail_queue import LeaseLostError, check_lease
+
+
+class ScanEventWriter:
+    """Buffers scan rows and commits them every ``max_events`` or ``max_delay``.
+
+    Rows are kept in memory rather than added to the session straight away, so
+    unrelated queries on the same session don't autoflush them. A flush is due
+    once ``max_events`` emails are buffered or the oldest buffered email is
+    ``max_delay`` seconds old; a crash loses at most one buffer.
+    """
+
+    def __init__(
+        self,
+        db: AsyncSession,
+        max_events: int,
+        max_delay: float,
+        scan_id: UUID | None = None,
+        owner_id: str | None = None,
+    ) -> None:
+        self._db = db
+        self._scan_id = scan_id
+        self._owner_id = owner_id
+        self._max_events = max(1, max_events)
+        self._max_delay = max_delay
+        self._rows: list[object] = []
+        self._events = 0
+        self._oldest: float | None = None
+        self.flushes = 0
+
+    def add(self, *rows: object) -> None:
+        """Buffer all rows produced for one email."""
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._rows.extend(rows)
+        self._events += 1
+
+    @property
+    def due(self) -> bool:
+        if self._oldest is None:
+            return False
+        return (
+            self._events >= self._max_events
+            or time.monotonic() - self._oldest >= self._max_delay
+        )
+
+    async def maybe_flush(self) -> None:
+        if self.due:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write every buffered row in a single transaction.
+
+        Raises LeaseLostError, after rolling back, if the lease is gone; the
+        buffered rows are dropped, since the scan's new owner redoes them.
+        """
+        if not self._rows:
+            return
+        rows, self._rows = self._rows, []
+        self._events = 0
+        self._oldest = None
+        if self._scan_id is not None and self._owner_id is not None:
+            try:
+                await check_lease(self._db, self._scan_id, self._owner_id)
+            except LeaseLostError:
+                await self._db.rollback()
+                raise
+        self._db.add_all(rows)
+        if self._scan_id is not None:
+            await notify_scan(self._db, self._scan_id)
+        await self._db.commit()
+        self.flushes += 1
@@ -1,6 +1,7 @@
 import asyncio
 import base64
 import contextlib
+import functools
 import hashlib
 import hmac
 import json as _json
@@ -8,27 +9,31 @@ import logging
 import re
 import time
 import uuid as _uuid
-from datetime import UTC, datetime
-from email.utils import parsedate_to_datetime
+from collections import Counter
+from collections.abc import AsyncGenerator, Hashable, Sequence
+from dataclasses import asdict, dataclass
+from datetime import UTC, date, datetime, timedelta
+from email.utils import parseaddr, parsedate_to_datetime
 from uuid import UUID
 
 import anthropic as _anthropic
-from fastapi import APIRouter, Depends, HTTPException
+from anthropic.types.message_create_params import MessageCreateParamsNonStreaming
+from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import RedirectResponse
 from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from sqlalchemy import select
 from sqlalchemy import update as sa_update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 from sse_starlette.sse import EventSourceResponse
 
 from travel_planner.auth import CurrentUserId
 from travel_planner.config import settings
 from travel_planner.db import get_db
+from travel_planner.llm import get_llm_client
 from travel_planner.models.gmail import (
     GmailConnection,
     ScanEvent,
@@ -39,6 +44,32 @@ from travel_planner.models.gmail import (
     UnmatchedImport,
 )
 from travel_planner.models.trip import TripMember
+from travel_planner.routers._gmail_batch import run_message_batches
+from travel_planner.routers._gmail_broadcast import stream_scan_events
+from travel_planner.routers._gmail_cancel import (
+    CancelCheck,
+    request_cancel,
+    unregister_scan,
+)
+from travel_planner.routers._gmail_classifier import is_probable_travel
+from travel_planner.routers._gmail_client import GmailApiError, GmailClient
+from travel_planner.routers._gmail_content import (
+    estimate_tokens,
+    select_relevant_text,
+)
+from travel_planner.routers._gmail_extractors import extract_booking, parse_received
+from travel_planner.routers._gmail_notify import notify_queue, notify_scan
+from travel_planner.routers._gmail_parse_cache import ParseCache, parse_cache_key
+from travel_planner.routers._gmail_pipeline import run_pipeline
+from travel_planner.routers._gmail_queue import LeaseLostError, check_lease
+from travel_planner.routers._gmail_scheduler import call_llm, llm_requests
+from travel_planner.routers._gmail_shards import (
+    BOOKING_LEAD,
+    ListShard,
+    list_shards,
+    plan_shards,
+)
+from travel_planner.routers._gmail_writer import ScanEventWriter
 from travel_planner.schemas.gmail import (
     AssignUnmatchedBody,
     GmailScanStart,
@@ -52,9 +83,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/gmail", tags=["gmail"])
 SCOPES = ["https://www.googleapis.com/auth/gmail.readonly"]
 
-# Store references to background tasks to prevent garbage collection
-_background_tasks: set[asyncio.Task[None]] = set()
-
 
 def _make_flow() -> Flow:
     return Flow.from_client_config(
@@ -232,6 +260,12 @@ def _sender_is_blocked(sender: str) -> bool:
     return domain in _SKIP_SENDER_DOMAINS
 
 
+_PARSE_MODEL = "claude-haiku-4-5-20251001"
+# Characters of email body sent to Claude
+_PARSE_CONTENT_CHARS = 6000
+
+# Fixed instructions, sent as a cacheable system block; only the email itself
+# (PARSE_EMAIL_TEMPLATE) varies per request
 PARSE_PROMPT = """Extract travel booking details from this email.
 
 TRAVEL emails include:
@@ -260,17 +294,21 @@ For travel emails, return ONLY valid JSON with these fields:
 - confirmation_number: PNR, booking reference, or confirmation number (or null)
 - notes: any extra relevant details or null
 
-If this is NOT a travel booking confirmation, return exactly: {{"not_travel": true}}
+If this is NOT a travel booking confirmation, return exactly: {"not_travel": true}"""
 
-Subject: {subject}
+PARSE_EMAIL_TEMPLATE = """Subject: {subject}
 From: {sender}
 
 Email body:
 {content}"""
+# Changes whenever the model or prompt does, invalidating cached parses
+_PARSE_PROMPT_VERSION = hashlib.sha256(
+    (_PARSE_MODEL + PARSE_PROMPT + PARSE_EMAIL_TEMPLATE).encode()
+).hexdigest()[:16]
 
 
-async def _build_service(conn: GmailConnection):
-    """Build authenticated Gmail service, auto-refreshing token if expired."""
+async def _load_credentials(conn: GmailConnection) -> Credentials:
+    """Build Gmail OAuth credentials, auto-refreshing the token if expired."""
     # google.auth uses naive UTC datetimes for expiry comparison; strip tzinfo
     expiry = conn.token_expiry
     if expiry is not None and expiry.tzinfo is not None:
@@ -285,16 +323,35 @@ async def _build_service(conn: GmailConnection):
     )
     if creds.expired and creds.refresh_token:
         await asyncio.to_thread(creds.refresh, Request())
-        conn.access_token = creds.token
-        if creds.expiry is not None:
-            # Store as naive UTC (google.auth expiry is naive UTC by convention)
-            raw = creds.expiry
-            conn.token_expiry = (
-                raw.replace(tzinfo=None)
-                if raw.tzinfo is None
-                else raw.astimezone(UTC).replace(tzinfo=None)
-            )
-    return build("gmail", "v1", credentials=creds)
+        _store_token(conn, creds)
+    return creds
+
+
+def _store_token(conn: GmailConnection, creds: Credentials) -> None:
+    """Copy a refreshed access token back onto the connection."""
+    conn.access_token = creds.token
+    if creds.expiry is not None:
+        # Store as naive UTC (google.auth expiry is naive UTC by convention)
+        raw = creds.expiry
+        conn.token_expiry = (
+            raw.replace(tzinfo=None)
+            if raw.tzinfo is None
+            else raw.astimezone(UTC).replace(tzinfo=None)
+        )
+
+
+def _is_rate_limited(exc: Exception) -> bool:
+    """True for Gmail quota errors (429, or 403 with a rate-limit reason)."""
+    return isinstance(exc, GmailApiError) and exc.rate_limited
+
+
+def _is_auth_error(exc: Exception) -> bool:
+    """True for Gmail errors that mean the whole scan must abort."""
+    return isinstance(exc, RefreshError) or (
+        isinstance(exc, GmailApiError)
+        and exc.status in (401, 403)
+        and not exc.rate_limited
+    )
 
 
 def _extract_text(msg: dict) -> str:
@@ -345,27 +402,84 @@ def _extract_text(msg: dict) -> str:
     return text
 
 
-async def _parse_with_claude(
-    content: str,
-    subject: str | None = None,
-    sender: str = "",
-) -> dict | None:
-    """Use Claude Haiku to extract structured booking data from email text."""
-    client = _anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
-    msg = await client.messages.create(
-        model="claude-haiku-4-5-20251001",
-        max_tokens=512,
-        messages=[
+@dataclass
+class _TokenUsage:
+    """Claude token totals for one scan, summed from each reply's ``usage``.
+
+    ``rate_limited_retries`` counts requests retried after a 429/529 or a
+    transient error.
+    """
+
+    input_tokens: int = 0  # uncached input
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    output_tokens: int = 0
+    rate_limited_retries: int = 0
+
+    def add(self, usage: _anthropic.types.Usage) -> None:
+        self.input_tokens += usage.input_tokens
+        self.cache_read_input_tokens += usage.cache_read_input_tokens or 0
+        self.cache_creation_input_tokens += usage.cache_creation_input_tokens or 0
+        self.output_tokens += usage.output_tokens
+
+
+def _parse_request(
+    content: str, subject: str | None, sender: str
+) -> MessageCreateParamsNonStreaming:
+    """``messages.create`` params for parsing one email."""
+    return {
+        "model": _PARSE_MODEL,
+        "max_tokens": 512,
+        "system": [
+            {
+                "type": "text",
+                "text": PARSE_PROMPT,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
+        "messages": [
             {
                 "role": "user",
-                "content": PARSE_PROMPT.format(
+                "content": PARSE_EMAIL_TEMPLATE.format(
                     subject=subject or "(no subject)",
                     sender=sender or "(unknown)",
-                    content=content[:6000],
+                    content=content[:_PARSE_CONTENT_CHARS],
                 ),
             }
         ],
+    }
+
+
+async def _parse_with_claude(
+    content: str,
+    subject: str | None = None,
+    sender: str = "",
+    usage: _TokenUsage | None = None,
+    share_key: Hashable = None,
+) -> dict | None:
+    """Use Claude Haiku to extract structured booking data from email text.
+
+    The call waits for a slot from the process-wide adaptive LLM limiter,
+    shared round-robin by ``share_key`` (the scan id). Rate limits are retried
+    by ``call_llm`` rather than the SDK, so they shrink the limiter's window.
+    """
+    client = get_llm_client().with_options(max_retries=0)
+    params = _parse_request(content, subject, sender)
+
+    def count_retry() -> None:
+        if usage is not None:
+            usage.rate_limited_retries += 1
+
+    msg = await call_llm(
+        lambda: client.messages.create(**params), share_key, on_retry=count_retry
     )
+    if usage is not None:
+        usage.add(msg.usage)
+    return _read_parse_reply(msg)
+
+
+def _read_parse_reply(msg: _anthropic.types.Message) -> dict | None:
+    """Booking data from a Claude parse reply, or None if it isn't travel."""
     block = msg.content[0]
     if not isinstance(block, _anthropic.types.TextBlock):
         logger.debug("Claude returned non-text block type: %s", type(block).__name__)
@@ -383,13 +497,277 @@ async def _parse_with_claude(
         return None
 
 
+# A user has at most one scan in these states at a time
+_ACTIVE_SCAN_STATUSES = (ScanRunStatus.queued, ScanRunStatus.running)
+
+# Skips worth retrying on the next incremental scan
+_RETRYABLE_SKIP_REASONS = (
+    ScanEventSkipReason.fetch_error,
+    ScanEventSkipReason.claude_error,
+)
+
+
+@dataclass
+class _ScanItem:
+    """One email moving through the scan pipeline.
+
+    Stages fill in fields as they go; once ``skip_reason`` is set, later stages
+    pass the item straight through to the writer.
+    """
+
+    email_id: str
+    message: dict | None = None
+    subject: str | None = None
+    sender: str = ""
+    email_date: str | None = None
+    parsed: dict | None = None
+    skip_reason: ScanEventSkipReason | None = None
+    # Parsed by a sender template extractor rather than Claude
+    extracted: bool = False
+    # Estimated tokens of email text sent to Claude (0 when it wasn't called)
+    content_tokens: int = 0
+    # Email text left for a bulk (Message Batches) parse
+    content: str | None = None
+    cache_key: str | None = None
+
+
+# Rounds of retries for messages rate-limited inside a Gmail batch reply
+_FETCH_RATE_LIMIT_RETRIES = 3
+
+_METADATA_PARAMS = {
+    "format": "metadata",
+    "metadataHeaders": ["From", "Subject", "Date"],
+}
+_FULL_PARAMS = {"format": "full"}
+
+
+async def _get_with_retries(
+    items: list[_ScanItem], gmail: GmailClient, params: dict
+) -> dict[str, dict]:
+    """Fetch ``items`` from Gmail, returning the messages that succeeded.
+
+    Messages rate-limited inside a batch reply are retried with exponential
+    backoff. A single-message fetch or a whole batch request has already been
+    retried by ``GmailClient``, so its failure is final. Failures mark the
+    item as a ``fetch_error`` skip, and auth failures abort the scan.
+    """
+    messages: dict[str, dict] = {}
+    pending = items
+    for attempt in range(_FETCH_RATE_LIMIT_RETRIES + 1):
+        if not pending:
+            break
+        if attempt:
+            await asyncio.sleep(2 ** (attempt - 1))
+        # Only the parts of a batch reply skip GmailClient's own retries
+        retryable = len(pending) > 1 and attempt < _FETCH_RATE_LIMIT_RETRIES
+        try:
+            results = await gmail.get_messages(
+                [item.email_id for item in pending], params
+            )
+        except Exception as exc:
+            # The whole batch request failed, so every message in it did too
+            results = {item.email_id: exc for item in pending}
+            retryable = False
+
+        retry: list[_ScanItem] = []
+        for item in pending:
+            result = results.get(item.email_id)
+            if isinstance(result, dict):
+                messages[item.email_id] = result
+                continue
+            if isinstance(result, Exception):
+                if retryable and _is_rate_limited(result):
+                    retry.append(item)
+                    continue
+                if _is_auth_error(result):
+                    logger.error(
+                        "Gmail auth failed mid-scan for email %s — aborting",
+                        item.email_id,
+                    )
+                    raise result
+            logger.error(
+                "  [fetch_error] Failed to fetch email %s",
+                item.email_id,
+                exc_info=result,
+            )
+            item.skip_reason = ScanEventSkipReason.fetch_error
+        pending = retry
+    return messages
+
+
+def _normalize_subject(subject: str | None) -> str:
+    """Lower-case a subject and strip any leading Re:/Fwd: prefixes."""
+    stripped = re.sub(r"^((re|fwd?)\s*:\s*)+", "", (subject or "").strip(), flags=re.I)
+    return stripped.lower()
+
+
+async def _fetch_items(
+    items: list[_ScanItem],
+    gmail: GmailClient,
+    seen_threads: set[tuple[str, str, str]],
+) -> list[_ScanItem]:
+    """Pipeline fetch stage: two-phase download for a chunk of messages.
+
+    Phase one pulls only the From/Subject/Date headers and drops blocked
+    senders and duplicate copies within a thread; phase two downloads full
+    bodies for the survivors. ``seen_threads`` is shared across fetch workers
+    for the whole scan.
+    """
+    pending = [item for item in items if item.skip_reason is None]
+    metadata = await _get_with_retries(pending, gmail, _METADATA_PARAMS)
+
+    survivors: list[_ScanItem] = []
+    for item in pending:
+        meta = metadata.get(item.email_id)
+        if meta is None:
+            continue
+        headers = {
+            h["name"].lower(): h["value"]
+            for h in meta.get("payload", {}).get("headers", [])
+        }
+        item.subject = subject = headers.get("subject")
+        item.sender = sender = headers.get("from", "")
+        if raw_date := headers.get("date"):
+            with contextlib.suppress(ValueError, TypeError):
+                item.email_date = parsedate_to_datetime(raw_date).strftime("%Y-%m-%d")
+
+        # Skip known non-travel senders (gym, food delivery, etc.)
+        if _sender_is_blocked(sender):
+            logger.info("  [blocked_sender] %s from=%s", subject, sender)
+            item.skip_reason = ScanEventSkipReason.not_travel
+            continue
+
+        # Re:/Fwd: copies of a booking from the same sender in the same
+        # thread carry the same details. Which copy arrives first depends on
+        # fetch and listing order, so only copies from one sender count:
+        # the user's own reply never stands in for the confirmation
+        if thread_id := meta.get("threadId"):
+            thread_key = (
+                thread_id,
+                _normalize_subject(subject),
+                parseaddr(sender)[1].lower(),
+            )
+            if thread_key in seen_threads:
+                logger.info("  [duplicate_thread] %s from=%s", subject, sender)
+                item.skip_reason = ScanEventSkipReason.duplicate_thread
+                continue
+            seen_threads.add(thread_key)
+        survivors.append(item)
+
+    full = await _get_with_retries(survivors, gmail, _FULL_PARAMS)
+    for item in survivors:
+        item.message = full.get(item.email_id)
+    return items
+
+
+async def _parse_item(
+    item: _ScanItem,
+    cache: ParseCache | None = None,
+    defer: bool = False,
+    usage: _TokenUsage | None = None,
+    share_key: Hashable = None,
+) -> _ScanItem:
+    """Pipeline parse stage: extract booking data from a fetched message.
+
+    With ``defer``, cache misses keep their text in ``item.content`` instead of
+    calling Claude, for a later bulk parse.
+    """
+    msg = item.message
+    if item.skip_reason is not None or msg is None:
+        return item
+    item.message = None  # the writer only needs the parsed fields
+    subject, sender = item.subject, item.sender
+
+    content = _extract_text(msg)
+    if not content:
+        logger.info("  [no_text] %s from=%s", subject, sender)
+        item.skip_reason = ScanEventSkipReason.no_text
+        return item
+
+    extracted = extract_booking(
+        subject or "", sender, content, parse_received(item.email_date)
+    )
+    if extracted is not None:
+        logger.info("  [template] %s from=%s", subject, sender)
+        item.parsed, item.extracted = extracted, True
+        return item
+
+    if settings.gmail_travel_classifier and not is_probable_travel(
+        subject or "", sender, content
+    ):
+        logger.info("  [classifier_rejected] %s from=%s", subject, sender)
+        item.skip_reason = ScanEventSkipReason.classifier_rejected
+        return item
+
+    # Claude only sees the paragraphs most likely to hold the booking
+    content = select_relevant_text(content, settings.gmail_parse_token_budget)
+    content = content[:_PARSE_CONTENT_CHARS]
+    cache_key = parse_cache_key(_PARSE_PROMPT_VERSION, subject or "", sender, content)
+    hit = False
+    if cache is not None:
+        hit, item.parsed = await cache.get(cache_key)
+    if not hit:
+        item.content_tokens = estimate_tokens(content)
+    if not hit and defer:
+        item.content = content
+        item.cache_key = cache_key
+        return item
+    if not hit:
+        try:
+            item.parsed = await _parse_with_claude(
+                content, subject, sender, usage=usage, share_key=share_key
+            )
+        except Exception:
+            logger.exception("  [claude_error] %s from=%s", subject, sender)
+            item.skip_reason = ScanEventSkipReason.claude_error
+            return item
+        if cache is not None:
+            await cache.put(cache_key, item.parsed)
+
+    if item.parsed is None:
+        logger.info("  [not_travel] %s from=%s", subject, sender)
+        item.skip_reason = ScanEventSkipReason.not_travel
+    return item
+
+
+async def _settle_bulk_items(
+    items: list[_ScanItem],
+    replies: dict[str, _anthropic.types.Message | None],
+    cache: ParseCache | None = None,
+    usage: _TokenUsage | None = None,
+) -> None:
+    """Fill in parse results for items that went through a Message Batch."""
+    for item in items:
+        subject, sender = item.subject, item.sender
+        item.content = None
+        reply = replies.get(item.email_id)
+        try:
+            if reply is None:
+                raise RuntimeError("batch request did not succeed")
+            if usage is not None:
+                usage.add(reply.usage)
+            item.parsed = _read_parse_reply(reply)
+        except Exception:
+            logger.exception("  [claude_error] %s from=%s", subject, sender)
+            item.skip_reason = ScanEventSkipReason.claude_error
+            continue
+        if cache is not None and item.cache_key is not None:
+            await cache.put(item.cache_key, item.parsed)
+        if item.parsed is None:
+            logger.info("  [not_travel] %s from=%s", subject, sender)
+            item.skip_reason = ScanEventSkipReason.not_travel
+
+
 @router.post("/scan", response_model=ScanStartResponse)
 async def start_scan(
     body: GmailScanStart,
     user_id: CurrentUserId,
     db: AsyncSession = Depends(get_db),
 ) -> ScanStartResponse:
-    """Start a background Gmail scan for all trips. Returns scan_id immediately."""
+    """Queue a Gmail scan for all trips. Returns scan_id immediately.
+
+    The scan itself runs in a scan worker (``python -m travel_planner.worker``).
+    """
     # Verify Gmail connected
     result = await db.execute(
         select(GmailConnection).where(GmailConnection.user_id == user_id)
@@ -398,11 +776,11 @@ async def start_scan(
     if conn is None:
         raise HTTPException(status_code=400, detail="Gmail not connected")
 
-    # 409 if already running
+    # 409 if already queued or running
     result = await db.execute(
         select(ScanRun).where(
             ScanRun.user_id == user_id,
-            ScanRun.status == ScanRunStatus.running,
+            ScanRun.status.in_(_ACTIVE_SCAN_STATUSES),
         )
     )
     existing = result.scalar_one_or_none()
@@ -414,28 +792,185 @@ async def start_scan(
 
     scan_run = ScanRun(
         user_id=user_id,
+        status=ScanRunStatus.queued,
         rescan_rejected=body.rescan_rejected,
+        bulk_parse=body.bulk_parse,
     )
     db.add(scan_run)
     await db.commit()
     await db.refresh(scan_run)
 
-    # Spawn background task (runs in the same event loop)
-    task = asyncio.create_task(
-        _run_scan_background(scan_run.id, user_id, body.rescan_rejected)
+    return ScanStartResponse(scan_id=scan_run.id)
+
+
+async def _start_listing(
+    db: AsyncSession,
+    gmail: GmailClient,
+    scan_run: ScanRun,
+    conn: GmailConnection,
+    cutoff: date,
+    rescan_rejected: bool,
+    trip_dates: Sequence[tuple[date, date]],
+    owner_id: str | None = None,
+) -> AsyncGenerator[list[str], None]:
+    """Set up the listing of the emails a scan will process.
+
+    Records the history checkpoint the listing is taken against and commits
+    it, then returns the pages of ids from ``_listed_pages`` for the pipeline
+    to consume while listing continues. The search is split into date shards
+    around ``trip_dates`` (start, end) so mail about upcoming trips is listed
+    and processed first.
+    """
+    # Snapshot the mailbox history id before listing, so mail that
+    # arrives mid-scan is picked up by the next incremental scan
+    profile = await gmail.get_profile()
+    scan_run.sync_history_id = str(profile["historyId"])
+    scan_run.sync_started_at = datetime.now(tz=UTC)
+
+    added_ids: set[str] | None = None
+    since = cutoff
+    if conn.history_id and conn.last_sync_at and not rescan_rejected:
+        added_ids = await gmail.list_added_message_ids(conn.history_id)
+        # A day of slack: Gmail's after: filter is date-granular
+        since = max(cutoff, (conn.last_sync_at - timedelta(days=1)).date())
+        if added_ids is None:
+            logger.info(
+                "Scan %s: history checkpoint %s expired — full scan",
+                scan_run.id,
+                conn.history_id,
+            )
+
+    retry_ids: list[str] = []
+    if added_ids is not None:
+        # Incremental scan: only travel-search hits added since the
+        # checkpoint, plus retryable failures from the last full pass
+        last_completed = (
+            select(ScanRun.id)
+            .where(
+                ScanRun.user_id == scan_run.user_id,
+                ScanRun.status == ScanRunStatus.completed,
+            )
+            .order_by(ScanRun.started_at.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        retry_result = await db.execute(
+            select(ScanEvent.email_id).where(
+                ScanEvent.scan_run_id == last_completed,
+                ScanEvent.skip_reason.in_(_RETRYABLE_SKIP_REASONS),
+            )
+        )
+        retry_ids = list(retry_result.scalars().all())
+
+    shards = plan_shards(
+        since if added_ids is not None else cutoff,
+        trip_dates,
+        date.today(),
+        settings.gmail_list_max_shards,
+        settings.gmail_list_min_shard_days,
+    )
+    scan_run.emails_found = 0
+    scan_run.stats = {
+        **(scan_run.stats or {}),
+        "incremental": added_ids is not None,
+        "bulk_parse": scan_run.bulk_parse,
+        "list_shards": len(shards),
+    }
+    if owner_id is not None:
+        await check_lease(db, scan_run.id, owner_id)
+    await db.commit()
+    return _listed_pages(gmail, scan_run, shards, added_ids, retry_ids, owner_id)
+
+
+async def _listed_pages(
+    gmail: GmailClient,
+    scan_run: ScanRun,
+    shards: Sequence[ListShard],
+    added_ids: set[str] | None,
+    retry_ids: list[str],
+    owner_id: str | None = None,
+) -> AsyncGenerator[list[str], None]:
+    """Yield new email ids a Gmail list page at a time, in shard order.
+
+    Ids listed by more than one shard are yielded once.
+
+    ``scan_run.emails_found`` grows with each page; this runs alongside the
+    pipeline's writer, which owns the session, so the count is only set on
+    the object and goes out with the writer's next flush. The full listing
+    is committed to ``message_ids`` in a session of its own once done, so an
+    interrupted scan resumes with exactly the same work. Given ``owner_id``,
+    that write is fenced on the lease and raises LeaseLostError once lost.
+    """
+    from travel_planner.db import async_session
+
+    listed: list[str] = []
+    seen: set[str] = set()
+
+    def record(page: list[str]) -> list[str]:
+        new = [eid for eid in page if eid not in seen]
+        seen.update(new)
+        listed.extend(new)
+        scan_run.emails_found = len(listed)
+        return new
+
+    # An incremental scan with nothing added has nothing to list
+    if added_ids is None or added_ids:
+        pages = list_shards(
+            gmail,
+            TRAVEL_SEARCH,
+            shards,
+            settings.gmail_list_concurrency,
+            settings.gmail_list_buffer_pages,
+        )
+        async for page in pages:
+            if added_ids is not None:
+                page = [eid for eid in page if eid in added_ids]
+            if new := record(page):
+                yield new
+    if new := record(retry_ids):
+        yield new
+
+    fence = [ScanRun.owner_id == owner_id] if owner_id is not None else []
+    async with async_session() as db:
+        result = await db.execute(
+            sa_update(ScanRun)
+            .where(ScanRun.id == scan_run.id, *fence)
+            .values(message_ids=listed, emails_found=len(listed))
+            .returning(ScanRun.id)
+        )
+        if result.scalar_one_or_none() is None:
+            raise LeaseLostError(scan_run.id)
+        await db.commit()
+    # Already stored: keep the writer's session from sending it again
+    set_committed_value(scan_run, "message_ids", listed)
+    logger.info(
+        "Scan %s: found %d emails in %d shards%s",
+        scan_run.id,
+        len(listed),
+        len(shards),
+        " (incremental)" if added_ids is not None else "",
     )
-    _background_tasks.add(task)
-    task.add_done_callback(_background_tasks.discard)
 
-    return ScanStartResponse(scan_id=scan_run.id)
 
+async def _stored_pages(message_ids: list[str]) -> AsyncGenerator[list[str], None]:
+    """A resumed scan's stored listing, as a single page."""
+    yield message_ids
 
-async def _run_scan_background(
+
+async def run_scan(
     scan_run_id: _uuid.UUID,
     user_id: _uuid.UUID,
     rescan_rejected: bool,
+    bulk_parse: bool = False,
+    owner_id: str | None = None,
 ) -> None:
-    """Background task: scan Gmail and write scan_events to DB."""
+    """Run a claimed scan: scan Gmail and write scan_events to DB.
+
+    With ``bulk_parse``, emails that need Claude are parsed through the
+    Message Batches API after the fetch pass instead of one call at a time.
+    Given the worker's lease ``owner_id``, every commit of scan output is
+    fenced on the lease, and the scan stops once another worker holds it.
+    """
     from datetime import date as _date
 
     from travel_planner.db import async_session
@@ -451,9 +986,14 @@ async def _run_scan_background(
 
     async with async_session() as db:
         try:
+            scan_started = time.monotonic()
             # Load scan_run
             result = await db.execute(select(ScanRun).where(ScanRun.id == scan_run_id))
             scan_run = result.scalar_one()
+            # Registers the scan so cancel_scan can signal it in-process
+            cancel = CancelCheck(db, scan_run, settings.gmail_cancel_check_seconds)
+            parse_cache = ParseCache(async_session)
+            token_usage = _TokenUsage()
 
             # Load Gmail connection
             result = await db.execute(
@@ -503,202 +1043,102 @@ async def _run_scan_background(
 
             if trips:
                 earliest = min(t.start_date for t in trips)
-                cutoff = earliest - timedelta(days=90)
+                cutoff = earliest - BOOKING_LEAD
             else:
                 from datetime import date as _today_date
 
                 cutoff = _today_date.today() - timedelta(days=365)
-            search_query = f"{TRAVEL_SEARCH} after:{cutoff.strftime('%Y/%m/%d')}"
-
-            # Fetch all emails from Gmail (paginated, up to 500 per page)
-            service = await _build_service(conn)
-            messages: list[dict] = []
-            page_token: str | None = None
-            while True:
-                kwargs: dict = {"userId": "me", "q": search_query, "maxResults": 500}
-                if page_token:
-                    kwargs["pageToken"] = page_token
-                msgs_result = await asyncio.to_thread(
-                    lambda kw=kwargs: service.users().messages().list(**kw).execute()
+
+            creds = await _load_credentials(conn)
+            gmail = GmailClient(creds, share_key=scan_run_id)
+
+            if scan_run.message_ids is not None:
+                # Resuming an interrupted scan: keep its listing and checkpoint
+                pages = _stored_pages(list(scan_run.message_ids))
+                logger.info(
+                    "Scan %s: resuming with %d listed emails",
+                    scan_run_id,
+                    len(scan_run.message_ids),
                 )
-                messages.extend(msgs_result.get("messages", []))
-                page_token = msgs_result.get("nextPageToken")
-                if not page_token:
-                    break
-            scan_run.emails_found = len(messages)
-            await db.commit()
-            logger.info(
-                "Scan %s: search=%r found %d emails",
+            else:
+                # Listing runs as the pipeline's source, so the first emails
+                # are fetched while later pages are still being listed
+                pages = await _start_listing(
+                    db,
+                    gmail,
+                    scan_run,
+                    conn,
+                    cutoff,
+                    rescan_rejected,
+                    [(t.start_date, t.end_date) for t in trips],
+                    owner_id,
+                )
+            sync_history_id = scan_run.sync_history_id
+            sync_started_at = scan_run.sync_started_at
+
+            # Emails an interrupted attempt already recorded are not redone;
+            # their events also restore the running counts
+            done_result = await db.execute(
+                select(ScanEvent.email_id, ScanEvent.status, ScanEvent.seq).where(
+                    ScanEvent.scan_run_id == scan_run_id
+                )
+            )
+            done = done_result.tuples().all()
+            processed = {email_id for email_id, _, _ in done}
+            counts = Counter(status for _, status, _ in done)
+            scan_run.processed_count = len(processed)
+            # Last event sequence number; new events continue after it
+            seq = max((event_seq for _, _, event_seq in done), default=0)
+
+            await parse_cache.evict(
+                timedelta(days=settings.gmail_parse_cache_ttl_days),
+                settings.gmail_parse_cache_max_entries,
+            )
+            imported = counts[ScanEventStatus.imported]
+            skipped = counts[ScanEventStatus.skipped]
+            unmatched = counts[ScanEventStatus.unmatched]
+            template_parses = llm_emails = llm_content_tokens = 0
+            flush_interval = settings.gmail_event_flush_ms / 1000
+            events = ScanEventWriter(
+                db,
+                settings.gmail_event_flush_size,
+                flush_interval,
                 scan_run_id,
-                search_query,
-                len(messages),
+                owner_id,
             )
 
-            imported = skipped = unmatched = 0
-
-            for meta in messages:
-                # Check cancellation
-                await db.refresh(scan_run)
-                if scan_run.status == ScanRunStatus.cancelled:
-                    break
-
-                email_id = meta["id"]
-
-                if email_id in already_imported:
-                    skipped += 1
-                    db.add(
-                        ScanEvent(
-                            scan_run_id=scan_run_id,
-                            email_id=email_id,
-                            status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.already_imported,
-                        )
-                    )
-                    await db.commit()
-                    continue
-
-                # Fetch full message
-                try:
-                    msg = await asyncio.to_thread(
-                        lambda eid=email_id: (
-                            service.users()
-                            .messages()
-                            .get(userId="me", id=eid, format="full")
-                            .execute()
-                        )
-                    )
-                except (RefreshError, HttpError) as exc:
-                    if isinstance(exc, RefreshError) or (
-                        isinstance(exc, HttpError) and exc.resp.status in (401, 403)
-                    ):
-                        logger.error(
-                            "Gmail auth failed mid-scan for email %s — aborting",
-                            email_id,
-                        )
-                        raise
-                    logger.exception(
-                        "  [fetch_error] Failed to fetch email %s", email_id
-                    )
-                    skipped += 1
-                    db.add(
-                        ScanEvent(
-                            scan_run_id=scan_run_id,
-                            email_id=email_id,
-                            status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.fetch_error,
-                        )
-                    )
-                    await db.commit()
-                    continue
-                except Exception:
-                    logger.exception(
-                        "  [fetch_error] Failed to fetch email %s", email_id
-                    )
-                    skipped += 1
-                    db.add(
-                        ScanEvent(
-                            scan_run_id=scan_run_id,
-                            email_id=email_id,
-                            status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.fetch_error,
-                        )
-                    )
-                    await db.commit()
-                    continue
-
-                # Extract subject, sender, and date for display/logging
-                headers = {
-                    h["name"].lower(): h["value"]
-                    for h in msg.get("payload", {}).get("headers", [])
-                }
-                subject = headers.get("subject")
-                sender = headers.get("from", "")
-                email_date_str: str | None = None
-                if raw_date := headers.get("date"):
-                    with contextlib.suppress(ValueError, TypeError):
-                        email_date_str = parsedate_to_datetime(raw_date).strftime(
-                            "%Y-%m-%d"
-                        )
-
-                # Skip known non-travel senders (gym, food delivery, etc.)
-                if _sender_is_blocked(sender):
-                    skipped += 1
-                    logger.info(
-                        "  [blocked_sender] %s from=%s",
-                        subject,
-                        sender,
-                    )
-                    db.add(
-                        ScanEvent(
-                            scan_run_id=scan_run_id,
-                            email_id=email_id,
-                            gmail_subject=subject,
-                            status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.not_travel,
-                        )
-                    )
-                    await db.commit()
-                    continue
-
-                content = _extract_text(msg)
-                if not content:
-                    skipped += 1
-                    logger.info(
-                        "  [no_text] %s from=%s",
-                        subject,
-                        sender,
-                    )
-                    db.add(
-                        ScanEvent(
-                            scan_run_id=scan_run_id,
-                            email_id=email_id,
-                            gmail_subject=subject,
-                            status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.no_text,
-                        )
-                    )
-                    await db.commit()
-                    continue
-
-                try:
-                    parsed = await _parse_with_claude(content, subject, sender)
-                except Exception:
-                    skipped += 1
-                    logger.exception(
-                        "  [claude_error] %s from=%s",
-                        subject,
-                        sender,
-                    )
-                    db.add(
-                        ScanEvent(
-                            scan_run_id=scan_run_id,
-                            email_id=email_id,
-                            gmail_subject=subject,
-                            status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.claude_error,
-                        )
-                    )
-                    await db.commit()
-                    continue
-
+            async def write(item: _ScanItem) -> bool:
+                """Pipeline writer: record one ScanEvent (and any import rows)."""
+                nonlocal imported, skipped, unmatched, template_parses
+                nonlocal llm_emails, llm_content_tokens, seq
+
+                await events.maybe_flush()
+                if await cancel.cancelled():
+                    return False
+                # Committed with the item's rows by the next flush
+                scan_run.processed_count += 1
+                seq += 1
+                template_parses += item.extracted
+                if item.content_tokens:
+                    llm_emails += 1
+                    llm_content_tokens += item.content_tokens
+
+                email_id = item.email_id
+                subject = item.subject
+                parsed = item.parsed
                 if parsed is None:
                     skipped += 1
-                    logger.info(
-                        "  [not_travel] %s from=%s",
-                        subject,
-                        sender,
-                    )
-                    db.add(
+                    events.add(
                         ScanEvent(
                             scan_run_id=scan_run_id,
+                            seq=seq,
                             email_id=email_id,
                             gmail_subject=subject,
                             status=ScanEventStatus.skipped,
-                            skip_reason=ScanEventSkipReason.not_travel,
+                            skip_reason=item.skip_reason,
                         )
                     )
-                    await db.commit()
-                    continue
+                    return True
 
                 try:
                     activity_date = _date.fromisoformat(parsed.get("date", ""))
@@ -707,35 +1147,33 @@ async def _run_scan_background(
 
                 if activity_date is None:
                     # No date — save as unmatched with email date fallback
-                    if email_date_str:
-                        parsed["email_date"] = email_date_str
+                    if item.email_date:
+                        parsed["email_date"] = item.email_date
                     logger.info(
                         "  [no_date→unmatched] %s from=%s parsed=%s",
                         subject,
-                        sender,
+                        item.sender,
                         parsed,
                     )
                     unmatched += 1
-                    db.add(
+                    events.add(
                         UnmatchedImport(
                             user_id=user_id,
                             scan_run_id=scan_run_id,
                             email_id=email_id,
                             parsed_data=parsed,
-                        )
-                    )
-                    db.add(
+                        ),
                         ScanEvent(
                             scan_run_id=scan_run_id,
+                            seq=seq,
                             email_id=email_id,
                             gmail_subject=subject,
                             status=ScanEventStatus.unmatched,
                             skip_reason=ScanEventSkipReason.no_date,
                             raw_claude_json=parsed,
-                        )
+                        ),
                     )
-                    await db.commit()
-                    continue
+                    return True
 
                 matched_trip_id = match_to_trip(
                     parsed_date=activity_date,
@@ -747,54 +1185,55 @@ async def _run_scan_background(
                     logger.info(
                         "  [unmatched] %s from=%s date=%s loc=%s",
                         subject,
-                        sender,
+                        item.sender,
                         activity_date,
                         parsed.get("location"),
                     )
                     unmatched += 1
-                    db.add(
+                    events.add(
                         UnmatchedImport(
                             user_id=user_id,
                             scan_run_id=scan_run_id,
                             email_id=email_id,
                             parsed_data=parsed,
-                        )
-                    )
-                    db.add(
+                        ),
                         ScanEvent(
                             scan_run_id=scan_run_id,
+                            seq=seq,
                             email_id=email_id,
                             gmail_subject=subject,
                             status=ScanEventStatus.unmatched,
                             raw_claude_json=parsed,
-                        )
+                        ),
                     )
-                    await db.commit()
-                    continue
+                    return True
 
                 # Find the itinerary day for this trip + date
+                new_rows: list[object] = []
                 day = days_by_trip_date.get((matched_trip_id, activity_date))
                 if day is None:
+                    # Assign the id up front so the Activity can reference the
+                    # day before the buffered rows are flushed
                     day = ItineraryDay(
+                        id=_uuid.uuid4(),
                         trip_id=_uuid.UUID(matched_trip_id),
                         date=activity_date,
                     )
-                    db.add(day)
-                    await db.flush()
+                    new_rows.append(day)
+                    days_by_trip_date[(matched_trip_id, activity_date)] = day
 
                 try:
                     category = ActivityCategory(parsed.get("category", "activity"))
                 except ValueError:
                     category = ActivityCategory.activity
 
-                db.add(
+                events.add(
+                    *new_rows,
                     ImportRecord(
                         user_id=user_id,
                         email_id=email_id,
                         parsed_data=parsed,
-                    )
-                )
-                db.add(
+                    ),
                     Activity(
                         itinerary_day_id=day.id,
                         title=parsed.get("title", "Imported booking"),
@@ -806,48 +1245,184 @@ async def _run_scan_background(
                         source_ref=email_id,
                         import_status=ImportStatus.pending_review,
                         sort_order=999,
-                    )
-                )
-                db.add(
+                    ),
                     ScanEvent(
                         scan_run_id=scan_run_id,
+                        seq=seq,
                         email_id=email_id,
                         gmail_subject=subject,
                         status=ScanEventStatus.imported,
                         trip_id=_uuid.UUID(matched_trip_id),
                         raw_claude_json=parsed,
-                    )
+                    ),
                 )
                 imported += 1
+                return True
+
+            # Batch size 1 means one messages.get per email (no batching)
+            batch_size = max(1, min(settings.gmail_fetch_batch_size, 100))
+
+            async def chunks() -> AsyncGenerator[list[_ScanItem], None]:
+                """Fetch-sized chunks of the unprocessed emails, page by page."""
+                async with contextlib.aclosing(pages):
+                    async for page in pages:
+                        items = [
+                            _ScanItem(
+                                email_id=email_id,
+                                skip_reason=(
+                                    ScanEventSkipReason.already_imported
+                                    if email_id in already_imported
+                                    else None
+                                ),
+                            )
+                            for email_id in page
+                            if email_id not in processed
+                        ]
+                        # A page's last chunk may be short rather than wait on
+                        # the next page
+                        for i in range(0, len(items), batch_size):
+                            yield items[i : i + batch_size]
+
+            async def on_idle() -> bool:
+                await events.maybe_flush()
+                return not await cancel.cancelled()
+
+            # Bulk mode: emails waiting on a batch parse
+            pending: list[_ScanItem] = []
+
+            async def collect(item: _ScanItem) -> bool:
+                """Bulk-mode writer: hold back emails that still need Claude."""
+                if item.content is None:
+                    return await write(item)
+                pending.append(item)
+                return not await cancel.cancelled()
+
+            async def report_bulk(counts: dict[str, int]) -> bool:
+                scan_run.stats = {**(scan_run.stats or {}), "bulk": counts}
+                if owner_id is not None:
+                    await check_lease(db, scan_run_id, owner_id)
                 await db.commit()
+                return not await cancel.cancelled()
+
+            source = chunks()
+            try:
+                pipeline_stats = await run_pipeline(
+                    source,
+                    functools.partial(_fetch_items, gmail=gmail, seen_threads=set()),
+                    functools.partial(
+                        _parse_item,
+                        cache=parse_cache,
+                        defer=bulk_parse,
+                        usage=token_usage,
+                        share_key=scan_run_id,
+                    ),
+                    collect if bulk_parse else write,
+                    fetch_workers=settings.gmail_fetch_concurrency,
+                    parse_workers=settings.gmail_parse_concurrency,
+                    queue_size=settings.gmail_pipeline_queue_size,
+                    on_idle=on_idle,
+                    idle_interval=flush_interval,
+                )
+                if pending and not pipeline_stats.stopped:
+                    await events.flush()
+                    replies = await run_message_batches(
+                        get_llm_client(),
+                        {
+                            item.email_id: _parse_request(
+                                item.content or "", item.subject, item.sender
+                            )
+                            for item in pending
+                        },
+                        poll_interval=settings.gmail_bulk_poll_seconds,
+                        on_progress=report_bulk,
+                    )
+                    if replies:
+                        await _settle_bulk_items(
+                            pending, replies, parse_cache, token_usage
+                        )
+                        for item in pending:
+                            if not await write(item):
+                                break
+            finally:
+                # Stops listing if the pipeline ended before it did
+                await source.aclose()
+                # Whatever was processed before a stop or error still lands,
+                # unless the lease is gone (e.g. the heartbeat cancelled the
+                # scan for it): then the fenced flush writes nothing
+                with contextlib.suppress(LeaseLostError):
+                    await events.flush()
 
             # Finalize scan_run
             scan_run.imported_count = imported
             scan_run.skipped_count = skipped
             scan_run.unmatched_count = unmatched
+            scan_run.stats = {
+                **(scan_run.stats or {}),
+                "elapsed_seconds": round(pipeline_stats.elapsed, 2),
+                "emails_per_second": round(pipeline_stats.emails_per_second, 2),
+                "time_to_first_result_seconds": (
+                    round(pipeline_stats.first_result_at - scan_started, 2)
+                    if pipeline_stats.first_result_at is not None
+                    else None
+                ),
+                "event_flushes": events.flushes,
+                "parse_cache_hits": parse_cache.hits,
+                "parse_cache_misses": parse_cache.misses,
+                "template_parses": template_parses,
+                "llm_emails": llm_emails,
+                "llm_usage": asdict(token_usage),
+                "llm_window": round(llm_requests().window, 2),
+                "llm_content_tokens_per_email": (
+                    round(llm_content_tokens / llm_emails, 1) if llm_emails else 0
+                ),
+            }
+            if cancel.latency is not None:
+                scan_run.status = ScanRunStatus.cancelled
+                scan_run.stats["cancel_latency_ms"] = round(cancel.latency * 1000)
+                logger.info(
+                    "Scan %s cancelled; stopped %.0f ms after the request",
+                    scan_run_id,
+                    cancel.latency * 1000,
+                )
             if scan_run.status != ScanRunStatus.cancelled:
                 scan_run.status = ScanRunStatus.completed
+                # Only a finished pass advances the incremental-scan checkpoint
+                conn.history_id = sync_history_id
+                conn.last_sync_at = sync_started_at
+            if creds.token != conn.access_token:
+                # GmailClient refreshed the token mid-scan
+                _store_token(conn, creds)
             scan_run.finished_at = datetime.now(tz=UTC)
+            if owner_id is not None:
+                await check_lease(db, scan_run_id, owner_id)
+            await notify_scan(db, scan_run_id)
             await db.commit()
             logger.info(
-                "Scan %s complete: imported=%d skipped=%d unmatched=%d",
+                "Scan %s complete: imported=%d skipped=%d unmatched=%d (%.1f emails/s)",
                 scan_run_id,
                 imported,
                 skipped,
                 unmatched,
+                pipeline_stats.emails_per_second,
             )
 
+        except LeaseLostError:
+            # Another worker resumed the scan; it finishes the job
+            logger.warning("Scan %s: lease lost, stopping", scan_run_id)
+            await db.rollback()
         except Exception:
             logger.exception("Scan %s failed", scan_run_id)
+            fence = [ScanRun.owner_id == owner_id] if owner_id is not None else []
             try:
                 await db.execute(
                     sa_update(ScanRun)
-                    .where(ScanRun.id == scan_run_id)
+                    .where(ScanRun.id == scan_run_id, *fence)
                     .values(
                         status=ScanRunStatus.failed,
                         finished_at=datetime.now(tz=UTC),
                     )
                 )
+                await notify_scan(db, scan_run_id)
                 await db.commit()
             except Exception:
                 logger.exception(
@@ -855,6 +1430,8 @@ async def _run_scan_background(
                     "scan may be stuck in 'running' state",
                     scan_run_id,
                 )
+        finally:
+            unregister_scan(scan_run_id)
 
 
 @router.get("/scan/{scan_id}/stream")
@@ -862,9 +1439,14 @@ async def stream_scan(
     scan_id: _uuid.UUID,
     user_id: CurrentUserId,
     db: AsyncSession = Depends(get_db),
+    last_event_id: str | None = Header(default=None),
 ) -> EventSourceResponse:
-    """SSE stream of scan_events for a running or completed scan."""
-    from travel_planner.db import async_session
+    """SSE stream of scan_events for a running or completed scan.
+
+    Each progress event carries the ScanEvent's ``seq`` as its SSE id. A
+    client reconnecting with ``Last-Event-ID`` only receives the events after
+    it, so a long scan can be followed across any number of reconnects.
+    """
 
     # Verify scan belongs to user before starting the SSE stream so that
     # a missing/unauthorised scan_id returns a proper 404 HTTP status.
@@ -877,81 +1459,12 @@ async def stream_scan(
     if result.scalar_one_or_none() is None:
         raise HTTPException(status_code=404, detail="Scan not found")
 
-    async def event_generator():
-        max_duration = 300  # 5 minutes
-        start_time = time.monotonic()
-        last_created_at: datetime | None = None
-        last_batch_ids: set[str] = set()
-
-        async with async_session() as stream_db:
-            result = await stream_db.execute(
-                select(ScanRun).where(ScanRun.id == scan_id)
-            )
-            scan_run = result.scalar_one_or_none()
-            if scan_run is None:
-                yield {
-                    "event": "error",
-                    "data": _json.dumps({"code": "scan_not_found"}),
-                }
-                return
+    try:
+        last_seq = max(0, int(last_event_id or 0))
+    except ValueError:
+        last_seq = 0
 
-            while True:
-                if time.monotonic() - start_time > max_duration:
-                    yield {
-                        "event": "error",
-                        "data": _json.dumps({"code": "timeout"}),
-                    }
-                    break
-
-                await stream_db.refresh(scan_run)
-
-                # Fetch new events using cursor-based pagination
-                query = select(ScanEvent).where(ScanEvent.scan_run_id == scan_id)
-                if last_created_at is not None:
-                    query = query.where(ScanEvent.created_at >= last_created_at)
-                query = query.order_by(ScanEvent.created_at, ScanEvent.id)
-                result = await stream_db.execute(query)
-                all_events = result.scalars().all()
-
-                # Deduplicate against the last batch to handle identical timestamps
-                new_events = [e for e in all_events if str(e.id) not in last_batch_ids]
-
-                for ev in new_events:
-                    payload = {
-                        "email_id": ev.email_id,
-                        "subject": ev.gmail_subject,
-                        "status": ev.status,
-                        "skip_reason": ev.skip_reason,
-                        "trip_id": str(ev.trip_id) if ev.trip_id else None,
-                        "raw_claude_json": ev.raw_claude_json,
-                    }
-                    yield {"event": "progress", "data": _json.dumps(payload)}
-
-                if new_events:
-                    last_created_at = new_events[-1].created_at
-                    last_batch_ids = {
-                        str(e.id) for e in new_events if e.created_at == last_created_at
-                    }
-
-                if scan_run.status in (
-                    ScanRunStatus.completed,
-                    ScanRunStatus.failed,
-                    ScanRunStatus.cancelled,
-                ):
-                    summary = {
-                        "imported": scan_run.imported_count,
-                        "skipped": scan_run.skipped_count,
-                        "unmatched": scan_run.unmatched_count,
-                        "status": scan_run.status,
-                    }
-                    yield {"event": "done", "data": _json.dumps(summary)}
-                    break
-
-                # Keepalive comment to prevent proxy timeouts
-                yield {"comment": "keepalive"}
-                await asyncio.sleep(1)
-
-    return EventSourceResponse(event_generator())
+    return EventSourceResponse(stream_scan_events(scan_id, last_seq))
 
 
 @router.post("/scan/{scan_id}/cancel", status_code=200)
@@ -970,12 +1483,19 @@ async def cancel_scan(
     scan_run = result.scalar_one_or_none()
     if scan_run is None:
         raise HTTPException(status_code=404, detail="Scan not found")
-    if scan_run.status != ScanRunStatus.running:
+    if scan_run.status not in _ACTIVE_SCAN_STATUSES:
         raise HTTPException(status_code=409, detail="Scan is not running")
 
+    was_queued = scan_run.status == ScanRunStatus.queued
     scan_run.status = ScanRunStatus.cancelled
     scan_run.finished_at = datetime.now(tz=UTC)
+    await notify_scan(db, scan_id)
+    if was_queued:
+        await notify_queue(db)
     await db.commit()
+    # Wakes the scan straight away if it runs in this process; scans in a
+    # worker pick the status up from the database, queued ones are never claimed
+    request_cancel(scan_id)
     return {"status": "cancelled"}
 
 
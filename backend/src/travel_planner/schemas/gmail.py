@@ -8,6 +8,8 @@ from travel_planner.models.gmail import ScanRunStatus
 
 class GmailScanStart(BaseModel):
     rescan_rejected: bool = False
+    # Parse through the Message Batches API (slower to finish, no rate limits)
+    bulk_parse: bool = False
 
 
 class ScanStartResponse(BaseModel):
@@ -22,10 +24,12 @@ class ScanRunResponse(BaseModel):
     started_at: datetime
     finished_at: datetime | None
     emails_found: int
+    processed_count: int = 0
     imported_count: int
     skipped_count: int
     unmatched_count: int
     rescan_rejected: bool
+    stats: dict = {}
 
 
 class UnmatchedImportResponse(BaseModel):
@@ -0,0 +1,154 @@
+"""Gmail scan worker.
+
+    uv run python -m travel_planner.worker
+
+API processes only queue scans; workers claim queued ScanRuns (see
+``routers._gmail_queue``) and run up to ``scan_worker_concurrency`` of them at
+once. Scale workers independently of the web processes: each queued scan is
+claimed by exactly one worker. A worker renews the lease on its scans every
+``scan_heartbeat_seconds``; scans whose lease lapses for
+``scan_lease_seconds`` (their worker died or lost the database) go back to
+the queue, as do scans a worker stops in the middle of, and resume where they
+left off.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+from travel_planner.config import settings
+from travel_planner.db import async_session
+from travel_planner.llm import close_llm_client
+from travel_planner.routers._gmail_client import close_http_client
+from travel_planner.routers._gmail_queue import (
+    claim_scan,
+    release_scans,
+    renew_leases,
+    requeue_expired_scans,
+)
+from travel_planner.routers.gmail import run_scan
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_id() -> str:
+    """Lease owner id: unique per worker process, readable in the database."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+
+async def _requeue_scans(owner_id: str, scan_ids: list[UUID]) -> None:
+    """Hand this worker's unfinished scans back to the queue."""
+    async with async_session() as db:
+        await release_scans(db, owner_id, scan_ids)
+
+
+async def _heartbeat(
+    owner_id: str, running: dict[asyncio.Task[None], UUID], stop: asyncio.Event
+) -> None:
+    """Renew the leases on ``running`` scans and requeue other expired ones.
+
+    A scan whose lease was taken over by another worker is cancelled here.
+    If renewals keep failing for a whole lease, every scan is cancelled,
+    since other workers are about to reclaim them.
+    """
+    lease = timedelta(seconds=settings.scan_lease_seconds)
+    renewed_at = time.monotonic()
+    while not stop.is_set():
+        try:
+            async with async_session() as db:
+                scan_ids = list(running.values())
+                if scan_ids:
+                    held = await renew_leases(db, owner_id, scan_ids)
+                    for task, scan_id in list(running.items()):
+                        if scan_id in scan_ids and scan_id not in held:
+                            logger.warning("Lost the lease on scan %s", scan_id)
+                            task.cancel()
+                renewed_at = time.monotonic()
+                expired = await requeue_expired_scans(db, lease)
+            if expired:
+                logger.warning("Requeued %d scans with expired leases", len(expired))
+        except Exception:
+            logger.exception("Failed to renew scan leases")
+            if time.monotonic() - renewed_at > settings.scan_lease_seconds:
+                for task in running:
+                    task.cancel()
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(stop.wait(), settings.scan_heartbeat_seconds)
+
+
+async def run_worker(stop: asyncio.Event, owner_id: str | None = None) -> None:
+    """Claim and run queued scans until ``stop`` is set."""
+    owner_id = owner_id or _worker_id()
+    running: dict[asyncio.Task[None], UUID] = {}
+    heartbeat = asyncio.create_task(_heartbeat(owner_id, running, stop))
+    try:
+        while not stop.is_set():
+            job = None
+            if len(running) < settings.scan_worker_concurrency:
+                try:
+                    async with async_session() as db:
+                        job = await claim_scan(db, owner_id, settings.scan_max_running)
+                except Exception:
+                    logger.exception("Failed to claim a queued scan")
+            if job is not None:
+                logger.info("Claimed scan %s", job.scan_run_id)
+                task = asyncio.create_task(
+                    run_scan(
+                        job.scan_run_id,
+                        job.user_id,
+                        job.rescan_rejected,
+                        job.bulk_parse,
+                        owner_id,
+                    )
+                )
+                running[task] = job.scan_run_id
+                task.add_done_callback(running.pop)
+                continue
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(stop.wait(), settings.scan_worker_poll_seconds)
+    finally:
+        stop.set()
+        interrupted = list(running.values())
+        for task in list(running):
+            task.cancel()
+        await asyncio.gather(heartbeat, *running, return_exceptions=True)
+        if interrupted:
+            logger.warning("Stopping with %d scans in progress", len(interrupted))
+            await _requeue_scans(owner_id, interrupted)
+
+
+async def _main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    owner_id = _worker_id()
+    logger.info(
+        "Scan worker %s started (concurrency %d)",
+        owner_id,
+        settings.scan_worker_concurrency,
+    )
+    try:
+        await run_worker(stop, owner_id)
+    finally:
+        await close_llm_client()
+        await close_http_client()
+    logger.info("Scan worker stopped")
+
+
+def main() -> None:
+    logging.basicConfig(
+        level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(_main())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from datetime import UTC, datetime
+from datetime import UTC, date, datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -18,6 +18,7 @@ def _make_conn():
     conn.refresh_token = "refresh_tok"
     conn.token_expiry = datetime(2030, 1, 1, tzinfo=UTC)
     conn.last_sync_at = None
+    conn.history_id = None
     return conn
 
 
@@ -146,7 +147,7 @@ def test_post_scan_returns_scan_id(
     client, auth_headers, override_get_db, mock_db_session
 ):
     """POST /gmail/scan creates a scan_run and returns its ID."""
-    from unittest.mock import AsyncMock, MagicMock, patch
+    from unittest.mock import AsyncMock, MagicMock
     from uuid import uuid4
 
     scan_run_id = uuid4()
@@ -167,24 +168,26 @@ def test_post_scan_returns_scan_id(
 
     mock_db_session.refresh = AsyncMock(side_effect=_mock_refresh)
 
-    with patch("travel_planner.routers.gmail.asyncio.create_task"):
-        response = client.post(
-            "/gmail/scan",
-            json={"rescan_rejected": False},
-            headers=auth_headers,
-        )
+    response = client.post(
+        "/gmail/scan",
+        json={"rescan_rejected": False, "bulk_parse": True},
+        headers=auth_headers,
+    )
 
     assert response.status_code == 200
     data = response.json()
     assert "scan_id" in data
-    assert mock_db_session.add.called  # ScanRun was added
+    # The scan is only queued; a scan worker claims and runs it
+    (scan_run,) = mock_db_session.add.call_args.args
+    assert scan_run.status == "queued"
+    assert scan_run.bulk_parse is True
 
 
 def test_post_scan_409_when_already_running(
     client, auth_headers, override_get_db, mock_db_session
 ):
     """POST /gmail/scan returns 409 when a scan is already running for user."""
-    from unittest.mock import MagicMock, patch
+    from unittest.mock import MagicMock
     from uuid import uuid4
 
     conn_mock = MagicMock()
@@ -197,12 +200,11 @@ def test_post_scan_409_when_already_running(
 
     mock_db_session.execute.side_effect = [conn_mock, running_mock]
 
-    with patch("travel_planner.routers.gmail.asyncio.create_task"):
-        response = client.post(
-            "/gmail/scan",
-            json={"rescan_rejected": False},
-            headers=auth_headers,
-        )
+    response = client.post(
+        "/gmail/scan",
+        json={"rescan_rejected": False},
+        headers=auth_headers,
+    )
 
     assert response.status_code == 409
     assert "scan_id" in response.json()["detail"]
@@ -288,6 +290,7 @@ def test_get_scan_latest_returns_most_recent(
     scan.skipped_count = 45
     scan.unmatched_count = 2
     scan.rescan_rejected = False
+    scan.stats = {"emails_per_second": 4.2}
 
     r = MagicMock()
     r.scalar_one_or_none.return_value = scan
@@ -298,6 +301,7 @@ def test_get_scan_latest_returns_most_recent(
     data = response.json()
     assert data["imported_count"] == 3
     assert data["status"] == "completed"
+    assert data["stats"]["emails_per_second"] == 4.2
 
 
 # ---------------------------------------------------------------------------
@@ -322,15 +326,41 @@ def test_scan_stream_404_for_unknown_scan(
     assert response.status_code == 404
 
 
+def test_scan_stream_resumes_after_last_event_id(
+    client, auth_headers, override_get_db, mock_db_session
+):
+    """A reconnect with Last-Event-ID only asks for the events after it."""
+    owned = MagicMock()
+    owned.scalar_one_or_none.return_value = MagicMock()
+    mock_db_session.execute.return_value = owned
+    calls: list = []
+
+    async def stream(scan_id, last_seq):
+        calls.append(last_seq)
+        yield {"event": "progress", "id": "6", "data": "{}"}
+        yield {"event": "done", "data": "{}"}
+
+    with patch("travel_planner.routers.gmail.stream_scan_events", stream):
+        response = client.get(
+            "/gmail/scan/00000000-0000-0000-0000-000000000001/stream",
+            headers={**auth_headers, "Last-Event-ID": "5"},
+        )
+
+    assert response.status_code == 200
+    assert calls == [5]
+    assert "id: 6" in response.text
+    assert "event: done" in response.text
+
+
 # ---------------------------------------------------------------------------
-# _build_service — token refresh unit test
+# _load_credentials — token refresh unit test
 # ---------------------------------------------------------------------------
 
 
 @pytest.mark.asyncio
-async def test_build_service_refreshes_expired_token():
-    """_build_service updates conn.access_token when credentials have expired."""
-    from travel_planner.routers.gmail import _build_service
+async def test_load_credentials_refreshes_expired_token():
+    """_load_credentials updates conn.access_token when credentials have expired."""
+    from travel_planner.routers.gmail import _load_credentials
 
     conn = MagicMock()
     conn.access_token = "old_token"
@@ -346,13 +376,12 @@ async def test_build_service_refreshes_expired_token():
     with (
         patch("travel_planner.routers.gmail.Credentials", return_value=mock_creds),
         patch("travel_planner.routers.gmail.Request"),
-        patch("travel_planner.routers.gmail.build"),
         patch(
             "travel_planner.routers.gmail.asyncio",
         ) as mock_asyncio,
     ):
         mock_asyncio.to_thread = AsyncMock(return_value=None)
-        await _build_service(conn)
+        await _load_credentials(conn)
 
     assert conn.access_token == "new_token"
     mock_asyncio.to_thread.assert_called_once()
@@ -477,6 +506,727 @@ def test_extract_text_returns_empty_for_no_content():
     assert result == ""
 
 
+# ---------------------------------------------------------------------------
+# Scan pipeline stages
+# ---------------------------------------------------------------------------
+
+
+def _make_message(
+    email_id="m1",
+    subject="Your flight",
+    sender="United <no-reply@united.com>",
+    thread_id=None,
+):
+    import base64
+
+    body = base64.urlsafe_b64encode(b"Flight UA1 on 2026-03-15").decode()
+    return {
+        "id": email_id,
+        "threadId": thread_id or f"t-{email_id}",
+        "payload": {
+            "mimeType": "text/plain",
+            "headers": [
+                {"name": "Subject", "value": subject},
+                {"name": "From", "value": sender},
+                {"name": "Date", "value": "Mon, 02 Feb 2026 10:00:00 +0000"},
+            ],
+            "body": {"data": body},
+        },
+    }
+
+
+def _http_error(status: int, reason: str = "") -> Exception:
+    from travel_planner.routers._gmail_client import GmailApiError
+
+    return GmailApiError(status, reason, {reason})
+
+
+def _make_gmail_client(responses: dict):
+    """Mock GmailClient answering get_messages (single or batched).
+
+    ``responses`` maps message id → message dict, exception, or a list of
+    those consumed one per request (to simulate retries). Every HTTP round
+    trip is recorded in ``gmail.round_trips`` as ``(format, [ids])``.
+    """
+    gmail = MagicMock()
+    gmail.round_trips = []
+
+    def _respond(email_id):
+        value = responses[email_id]
+        return value.pop(0) if isinstance(value, list) else value
+
+    async def _get_messages(email_ids, params):
+        gmail.round_trips.append((params["format"], list(email_ids)))
+        return {email_id: _respond(email_id) for email_id in email_ids}
+
+    gmail.get_messages.side_effect = _get_messages
+    return gmail
+
+
+async def _fetch(gmail, *items):
+    from travel_planner.routers.gmail import _fetch_items
+
+    return await _fetch_items(list(items), gmail, seen_threads=set())
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_single_message_metadata_then_full():
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client({"a": _make_message("a")})
+
+    (item,) = await _fetch(gmail, _ScanItem(email_id="a"))
+
+    assert gmail.round_trips == [("metadata", ["a"]), ("full", ["a"])]
+    assert item.subject == "Your flight"
+    assert item.sender == "United <no-reply@united.com>"
+    assert item.email_date == "2026-02-02"
+    assert item.message is not None
+    assert item.skip_reason is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_marks_fetch_error():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client({"a": RuntimeError("boom")})
+
+    (item,) = await _fetch(gmail, _ScanItem(email_id="a"))
+
+    assert item.skip_reason == ScanEventSkipReason.fetch_error
+    assert item.message is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_reraises_auth_errors():
+    from travel_planner.routers._gmail_client import GmailApiError
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client({"a": _http_error(401)})
+
+    with pytest.raises(GmailApiError):
+        await _fetch(gmail, _ScanItem(email_id="a"))
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_skips_already_imported():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client({})
+    item = _ScanItem(email_id="a", skip_reason=ScanEventSkipReason.already_imported)
+
+    await _fetch(gmail, item)
+
+    assert gmail.round_trips == []
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_uses_one_batch_request_per_phase():
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client({eid: _make_message(eid) for eid in ("a", "b", "c")})
+    items = [_ScanItem(email_id=eid) for eid in ("a", "b", "c")]
+
+    await _fetch(gmail, *items)
+
+    assert gmail.round_trips == [
+        ("metadata", ["a", "b", "c"]),
+        ("full", ["a", "b", "c"]),
+    ]
+    assert all(i.message is not None for i in items)
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_blocked_sender_never_downloads_body():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client(
+        {
+            "a": _make_message("a"),
+            "b": _make_message("b", sender="DoorDash <orders@doordash.com>"),
+        }
+    )
+    items = [_ScanItem(email_id="a"), _ScanItem(email_id="b")]
+
+    await _fetch(gmail, *items)
+
+    assert gmail.round_trips[-1] == ("full", ["a"])
+    assert items[1].skip_reason == ScanEventSkipReason.not_travel
+    assert items[1].message is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_skips_duplicate_copies_in_thread():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _fetch_items, _ScanItem
+
+    gmail = _make_gmail_client(
+        {
+            "a": _make_message("a", subject="Fwd: Your booking", thread_id="t1"),
+            "b": _make_message("b", subject="Your booking", thread_id="t1"),
+            "c": _make_message("c", subject="Your booking", thread_id="t2"),
+            "d": _make_message("d", subject="RE: your booking", thread_id="t1"),
+        }
+    )
+    seen: set[tuple[str, str, str]] = set()
+    first = [_ScanItem(email_id="a"), _ScanItem(email_id="b")]
+    second = [_ScanItem(email_id="c"), _ScanItem(email_id="d")]
+
+    # Two chunks share the seen-thread set, as fetch workers do within a scan
+    await _fetch_items(first, gmail, seen_threads=seen)
+    await _fetch_items(second, gmail, seen_threads=seen)
+
+    assert [i.skip_reason for i in first + second] == [
+        None,
+        ScanEventSkipReason.duplicate_thread,
+        None,
+        ScanEventSkipReason.duplicate_thread,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_reply_in_thread_never_replaces_the_confirmation():
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client(
+        {
+            "reply": _make_message(
+                "reply", subject="Re: Your booking", thread_id="t1", sender="me@x.com"
+            ),
+            "confirmation": _make_message(
+                "confirmation", subject="Your booking", thread_id="t1"
+            ),
+        }
+    )
+    # The reply is fetched first, as concurrent or sharded listing may do
+    items = [_ScanItem(email_id="reply"), _ScanItem(email_id="confirmation")]
+
+    await _fetch(gmail, *items)
+
+    assert [i.skip_reason for i in items] == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_batch_item_failure_is_fetch_error():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client(
+        {"a": _make_message("a"), "b": _http_error(404, "notFound")}
+    )
+    items = [_ScanItem(email_id="a"), _ScanItem(email_id="b")]
+
+    await _fetch(gmail, *items)
+
+    assert items[0].skip_reason is None
+    assert items[1].skip_reason == ScanEventSkipReason.fetch_error
+    assert gmail.round_trips[-1] == ("full", ["a"])
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_batch_item_auth_error_aborts():
+    from travel_planner.routers._gmail_client import GmailApiError
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client(
+        {"a": _make_message("a"), "b": _http_error(403, "forbidden")}
+    )
+    items = [_ScanItem(email_id="a"), _ScanItem(email_id="b")]
+
+    with pytest.raises(GmailApiError):
+        await _fetch(gmail, *items)
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_retries_rate_limited_batch_items():
+    from travel_planner.routers.gmail import _ScanItem
+
+    gmail = _make_gmail_client(
+        {
+            "a": _make_message("a"),
+            "b": [_http_error(403, "userRateLimitExceeded")] + [_make_message("b")] * 2,
+            "c": [_http_error(429, "rateLimitExceeded")] + [_make_message("c")] * 2,
+        }
+    )
+    items = [_ScanItem(email_id=eid) for eid in ("a", "b", "c")]
+
+    with patch("travel_planner.routers.gmail.asyncio.sleep", AsyncMock()):
+        await _fetch(gmail, *items)
+
+    assert gmail.round_trips[:2] == [
+        ("metadata", ["a", "b", "c"]),
+        ("metadata", ["b", "c"]),
+    ]
+    assert all(i.skip_reason is None for i in items)
+
+
+@pytest.mark.asyncio
+async def test_fetch_items_does_not_retry_what_the_client_retried():
+    """Single fetches and whole batch requests were retried by GmailClient."""
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _ScanItem
+
+    single = _make_gmail_client(
+        {"a": [_http_error(429, "rateLimitExceeded"), _make_message("a")]}
+    )
+    batch = _make_gmail_client({})
+    batch.get_messages.side_effect = _http_error(429, "rateLimitExceeded")
+    items = [_ScanItem(email_id=eid) for eid in ("a", "b", "c")]
+
+    with patch("travel_planner.routers.gmail.asyncio.sleep", AsyncMock()):
+        await _fetch(single, items[0])
+        await _fetch(batch, *items[1:])
+
+    assert single.round_trips == [("metadata", ["a"])]
+    assert batch.get_messages.call_count == 1
+    assert all(i.skip_reason == ScanEventSkipReason.fetch_error for i in items)
+
+
+@pytest.mark.asyncio
+async def test_parse_item_extracts_booking():
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    parsed = {"title": "Flight UA1", "date": "2026-03-15"}
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    mock_parse = AsyncMock(return_value=parsed)
+    with patch("travel_planner.routers.gmail._parse_with_claude", mock_parse):
+        item = await _parse_item(item)
+
+    assert item.parsed == parsed
+    assert item.skip_reason is None
+    assert item.message is None
+    assert mock_parse.call_args.args[1] == "Flight"
+    assert item.content_tokens == 6  # "Flight UA1 on 2026-03-15"
+
+
+@pytest.mark.asyncio
+async def test_parse_item_claude_error():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    with patch(
+        "travel_planner.routers.gmail._parse_with_claude",
+        AsyncMock(side_effect=RuntimeError("overloaded")),
+    ):
+        item = await _parse_item(item)
+
+    assert item.skip_reason == ScanEventSkipReason.claude_error
+
+
+@pytest.mark.asyncio
+async def test_parse_item_classifier_rejects_without_claude():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    item = _ScanItem(
+        email_id=EMAIL_ID,
+        message=_make_message(),
+        subject="Order confirmation #112-4829301",
+        sender="Amazon.com <auto-confirm@amazon.com>",
+    )
+    mock_parse = AsyncMock()
+    with patch("travel_planner.routers.gmail._parse_with_claude", mock_parse):
+        item = await _parse_item(item)
+
+    assert item.skip_reason == ScanEventSkipReason.classifier_rejected
+    mock_parse.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_parse_item_uses_sender_template_without_claude():
+    import base64
+
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    message = _make_message()
+    message["payload"]["body"]["data"] = base64.urlsafe_b64encode(
+        b"Confirmation number: K7XQ2P. Flight UA 1234 DEN to AUS. "
+        b"Departing Mar 15 at 8:05 AM."
+    ).decode()
+    item = _ScanItem(
+        email_id=EMAIL_ID,
+        message=message,
+        subject="Your flight confirmation",
+        sender="United <no-reply@united.com>",
+        email_date="2026-02-20",
+    )
+    mock_parse = AsyncMock()
+    with patch("travel_planner.routers.gmail._parse_with_claude", mock_parse):
+        item = await _parse_item(item)
+
+    mock_parse.assert_not_awaited()
+    assert item.extracted is True
+    assert item.parsed is not None
+    assert item.parsed["title"] == "Flight UA1234 DEN→AUS"
+    assert item.parsed["date"] == "2026-03-15"
+
+
+def _make_parse_cache(hit: bool, parsed: dict | None = None):
+    cache = MagicMock()
+    cache.get = AsyncMock(return_value=(hit, parsed))
+    cache.put = AsyncMock()
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_parse_item_cache_hit_skips_claude():
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    parsed = {"title": "Flight UA1", "date": "2026-03-15"}
+    cache = _make_parse_cache(hit=True, parsed=parsed)
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    mock_parse = AsyncMock()
+    with patch("travel_planner.routers.gmail._parse_with_claude", mock_parse):
+        item = await _parse_item(item, cache=cache)
+
+    assert item.parsed == parsed
+    mock_parse.assert_not_awaited()
+    cache.put.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_parse_item_cache_hit_not_travel():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    cache = _make_parse_cache(hit=True, parsed=None)
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    mock_parse = AsyncMock()
+    with patch("travel_planner.routers.gmail._parse_with_claude", mock_parse):
+        item = await _parse_item(item, cache=cache)
+
+    assert item.skip_reason == ScanEventSkipReason.not_travel
+    mock_parse.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_parse_item_cache_miss_stores_result():
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    parsed = {"title": "Flight UA1", "date": "2026-03-15"}
+    cache = _make_parse_cache(hit=False)
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    with patch(
+        "travel_planner.routers.gmail._parse_with_claude",
+        AsyncMock(return_value=parsed),
+    ):
+        item = await _parse_item(item, cache=cache)
+
+    assert item.parsed == parsed
+    key = cache.get.call_args.args[0]
+    cache.put.assert_awaited_once_with(key, parsed)
+
+
+@pytest.mark.asyncio
+async def test_parse_item_does_not_cache_claude_errors():
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    cache = _make_parse_cache(hit=False)
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    with patch(
+        "travel_planner.routers.gmail._parse_with_claude",
+        AsyncMock(side_effect=RuntimeError("overloaded")),
+    ):
+        await _parse_item(item, cache=cache)
+
+    cache.put.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_parse_item_defers_cache_misses_in_bulk_mode():
+    from travel_planner.routers.gmail import _parse_item, _ScanItem
+
+    cache = _make_parse_cache(hit=False)
+    item = _ScanItem(email_id=EMAIL_ID, message=_make_message(), subject="Flight")
+    mock_parse = AsyncMock()
+    with patch("travel_planner.routers.gmail._parse_with_claude", mock_parse):
+        item = await _parse_item(item, cache=cache, defer=True)
+
+    mock_parse.assert_not_awaited()
+    assert item.content
+    assert item.cache_key == cache.get.call_args.args[0]
+    assert item.skip_reason is None
+
+
+def _claude_reply(text: str, cache_read: int = 0):
+    from anthropic.types import Message, TextBlock, Usage
+
+    return Message(
+        id="msg_1",
+        type="message",
+        role="assistant",
+        model="claude-haiku-4-5-20251001",
+        content=[TextBlock(type="text", text=text)],
+        stop_reason="end_turn",
+        stop_sequence=None,
+        usage=Usage(
+            input_tokens=10, output_tokens=10, cache_read_input_tokens=cache_read
+        ),
+    )
+
+
+def test_parse_request_caches_static_instructions():
+    from travel_planner.routers.gmail import PARSE_PROMPT, _parse_request
+
+    params = _parse_request("Flight UA1", "Your flight", "a@united.com")
+
+    assert params.get("system") == [
+        {
+            "type": "text",
+            "text": PARSE_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+    # Only the email itself varies per request
+    (message,) = params["messages"]
+    assert message["content"] == (
+        "Subject: Your flight\nFrom: a@united.com\n\nEmail body:\nFlight UA1"
+    )
+
+
+@pytest.mark.asyncio
+async def test_parse_with_claude_accounts_cached_tokens():
+    from travel_planner.routers.gmail import _parse_with_claude, _TokenUsage
+
+    client = MagicMock()
+    client.messages.create = AsyncMock(
+        side_effect=[
+            _claude_reply('{"not_travel": true}'),
+            _claude_reply('{"not_travel": true}', cache_read=400),
+        ]
+    )
+    client.with_options.return_value = client
+    usage = _TokenUsage()
+    with patch("travel_planner.routers.gmail.get_llm_client", return_value=client):
+        await _parse_with_claude("a", usage=usage)
+        await _parse_with_claude("b", usage=usage)
+
+    assert usage == _TokenUsage(
+        input_tokens=20, cache_read_input_tokens=400, output_tokens=20
+    )
+
+
+@pytest.mark.asyncio
+async def test_settle_bulk_items_applies_batch_replies():
+    from travel_planner.models.gmail import ScanEventSkipReason
+    from travel_planner.routers.gmail import (
+        _ScanItem,
+        _settle_bulk_items,
+        _TokenUsage,
+    )
+
+    booking = _ScanItem(email_id="e1", content="text", cache_key="k1")
+    newsletter = _ScanItem(email_id="e2", content="text", cache_key="k2")
+    failed = _ScanItem(email_id="e3", content="text", cache_key="k3")
+    cache = _make_parse_cache(hit=False)
+    replies = {
+        "e1": _claude_reply('{"title": "Flight UA1", "date": "2026-03-15"}'),
+        "e2": _claude_reply('{"not_travel": true}'),
+        "e3": None,
+    }
+
+    usage = _TokenUsage()
+    await _settle_bulk_items([booking, newsletter, failed], replies, cache, usage)
+
+    assert booking.parsed == {"title": "Flight UA1", "date": "2026-03-15"}
+    assert booking.skip_reason is None
+    assert newsletter.skip_reason == ScanEventSkipReason.not_travel
+    assert failed.skip_reason == ScanEventSkipReason.claude_error
+    assert all(i.content is None for i in (booking, newsletter, failed))
+    # Errored requests are not cached
+    assert [c.args[0] for c in cache.put.await_args_list] == ["k1", "k2"]
+    assert usage.input_tokens == 20
+
+
+@pytest.mark.asyncio
+async def test_listed_pages_record_progress_on_the_scan():
+    """Listing yields page by page, growing emails_found as it goes."""
+    import uuid
+    from contextlib import asynccontextmanager
+
+    from travel_planner.models.gmail import ScanRun
+    from travel_planner.routers._gmail_shards import ListShard
+    from travel_planner.routers.gmail import _listed_pages
+
+    scan_run = ScanRun(id=uuid.uuid4(), emails_found=0, message_ids=None)
+    checkpoint = AsyncMock()
+    checkpoint.execute.return_value = MagicMock()
+
+    @asynccontextmanager
+    async def session():
+        yield checkpoint
+
+    async def pages(query):
+        yield ["a", "b", "x"]
+        yield ["c", "y"]
+
+    gmail = MagicMock()
+    gmail.iter_message_ids = pages
+    # Incremental: only ids added since the checkpoint, then retries
+    listing = _listed_pages(
+        gmail,
+        scan_run,
+        [ListShard(after=date(2026, 1, 1), before=None)],
+        added_ids={"a", "b", "c"},
+        retry_ids=["b", "r"],
+    )
+
+    received, found = [], []
+    with patch("travel_planner.db.async_session", session):
+        async for page in listing:
+            received.append(page)
+            found.append(scan_run.emails_found)
+
+    assert received == [["a", "b"], ["c"], ["r"]]
+    assert found == [2, 3, 4]
+    # The finished listing is committed right away, not left to the writer
+    (stmt,) = checkpoint.execute.await_args.args
+    assert stmt.compile().params["message_ids"] == ["a", "b", "c", "r"]
+    checkpoint.commit.assert_awaited_once()
+    assert scan_run.message_ids == ["a", "b", "c", "r"]
+
+
+@pytest.mark.asyncio
+async def test_listed_pages_fence_the_listing_on_the_lease():
+    """A worker that lost its lease cannot overwrite the new owner's listing."""
+    import uuid
+    from contextlib import asynccontextmanager
+
+    from travel_planner.models.gmail import ScanRun
+    from travel_planner.routers._gmail_queue import LeaseLostError
+    from travel_planner.routers._gmail_shards import ListShard
+    from travel_planner.routers.gmail import _listed_pages
+
+    scan_run = ScanRun(id=uuid.uuid4(), emails_found=0, message_ids=None)
+    checkpoint = AsyncMock()
+    # No row matched the owner: the lease has moved on
+    checkpoint.execute.return_value = MagicMock(
+        scalar_one_or_none=MagicMock(return_value=None)
+    )
+
+    @asynccontextmanager
+    async def session():
+        yield checkpoint
+
+    async def pages(query):
+        yield ["a"]
+
+    gmail = MagicMock()
+    gmail.iter_message_ids = pages
+    listing = _listed_pages(
+        gmail,
+        scan_run,
+        [ListShard(after=date(2026, 1, 1), before=None)],
+        added_ids=None,
+        retry_ids=[],
+        owner_id="worker-1",
+    )
+
+    with (
+        patch("travel_planner.db.async_session", session),
+        pytest.raises(LeaseLostError),
+    ):
+        async for _ in listing:
+            pass
+
+    (stmt,) = checkpoint.execute.await_args.args
+    assert stmt.compile().params["owner_id_1"] == "worker-1"
+    checkpoint.commit.assert_not_awaited()
+    assert scan_run.message_ids is None
+
+
+@pytest.mark.asyncio
+async def test_run_scan_resumes_from_checkpoint():
+    """A requeued scan reuses its listing and skips emails it already recorded."""
+    import uuid
+    from contextlib import asynccontextmanager
+
+    from travel_planner.models.gmail import ScanRun, ScanRunStatus
+    from travel_planner.routers._gmail_pipeline import PipelineStats
+    from travel_planner.routers.gmail import run_scan
+
+    user_id = uuid.uuid4()
+    scan_run = ScanRun(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        status=ScanRunStatus.running,
+        bulk_parse=False,
+        message_ids=["a", "b", "c"],
+        sync_history_id="42",
+        stats={},
+        processed_count=0,
+    )
+    conn = _make_conn()
+    conn.access_token = "tok"
+
+    def _result(**attrs):
+        result = MagicMock()
+        for name, value in attrs.items():
+            setattr(result, name, MagicMock(return_value=value))
+        return result
+
+    def _rows(rows):
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = rows
+        return result
+
+    done = MagicMock()
+    done.tuples.return_value.all.return_value = [
+        ("a", "imported", 1),
+        ("b", "skipped", 2),
+    ]
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.execute.side_effect = [
+        _result(scalar_one=scan_run),
+        _result(scalar_one_or_none=conn),
+        _rows([]),  # trips
+        _rows([]),  # itinerary days
+        _rows([]),  # already imported
+        done,
+    ]
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    seen: list[str] = []
+    processed_before: list[int] = []
+
+    async def pipeline(chunks, *args, **kwargs):
+        processed_before.append(scan_run.processed_count)
+        seen.extend([item.email_id async for chunk in chunks for item in chunk])
+        return PipelineStats(finished_at=0.0, started_at=0.0)
+
+    gmail = MagicMock()
+    gmail.get_profile = AsyncMock()
+    creds = MagicMock(token="tok")
+    with (
+        patch("travel_planner.db.async_session", session),
+        patch("travel_planner.routers.gmail.ParseCache") as cache_cls,
+        patch(
+            "travel_planner.routers.gmail._load_credentials",
+            AsyncMock(return_value=creds),
+        ),
+        patch("travel_planner.routers.gmail.GmailClient", return_value=gmail),
+        patch("travel_planner.routers.gmail.run_pipeline", pipeline),
+    ):
+        cache_cls.return_value.evict = AsyncMock()
+        await run_scan(scan_run.id, user_id, rescan_rejected=False)
+
+    assert seen == ["c"]
+    assert processed_before == [2]
+    gmail.get_profile.assert_not_awaited()
+    assert scan_run.status == ScanRunStatus.completed
+    assert scan_run.imported_count == 1
+    assert scan_run.skipped_count == 1
+    assert conn.history_id == "42"
+
+
 # ---------------------------------------------------------------------------
 # Cancel scan endpoint
 # ---------------------------------------------------------------------------
@@ -502,6 +1252,53 @@ def test_cancel_scan_success(client, auth_headers, override_get_db, mock_db_sess
     assert scan.status == ScanRunStatus.cancelled
 
 
+def test_cancel_scan_queued(client, auth_headers, override_get_db, mock_db_session):
+    """A queued scan can be cancelled before any worker claims it."""
+    from travel_planner.models.gmail import ScanRunStatus
+
+    scan = MagicMock()
+    scan.id = "00000000-0000-0000-0000-000000000010"
+    scan.status = ScanRunStatus.queued
+
+    result_mock = MagicMock()
+    result_mock.scalar_one_or_none.return_value = scan
+    mock_db_session.execute.return_value = result_mock
+
+    response = client.post(
+        "/gmail/scan/00000000-0000-0000-0000-000000000010/cancel",
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert scan.status == ScanRunStatus.cancelled
+
+
+def test_cancel_scan_signals_running_scan(
+    client, auth_headers, override_get_db, mock_db_session
+):
+    """Cancelling a scan running in this process flags it in the registry."""
+    from uuid import UUID
+
+    from travel_planner.models.gmail import ScanRunStatus
+    from travel_planner.routers._gmail_cancel import _running_scans, unregister_scan
+
+    scan_id = UUID("00000000-0000-0000-0000-000000000011")
+    scan = MagicMock()
+    scan.id = scan_id
+    scan.status = ScanRunStatus.running
+
+    result_mock = MagicMock()
+    result_mock.scalar_one_or_none.return_value = scan
+    mock_db_session.execute.return_value = result_mock
+
+    _running_scans[scan_id] = None
+    try:
+        response = client.post(f"/gmail/scan/{scan_id}/cancel", headers=auth_headers)
+        assert response.status_code == 200
+        assert _running_scans[scan_id] is not None
+    finally:
+        unregister_scan(scan_id)
+
+
 def test_cancel_scan_404_unknown(
     client, auth_headers, override_get_db, mock_db_session
 ):
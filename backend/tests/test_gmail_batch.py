@@ -0,0 +1,200 @@
+"""Tests for bulk parsing through the Message Batches API.
+
+The real anthropic client talks to a local HTTP stand-in for the batches
+endpoints.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import anthropic
+import pytest
+from anthropic.types.message_create_params import MessageCreateParamsNonStreaming
+
+BATCH_ID = "msgbatch_test"
+
+
+def _batch(status: str, processing: int, succeeded: int, errored: int) -> dict:
+    return {
+        "id": BATCH_ID,
+        "type": "message_batch",
+        "processing_status": status,
+        "request_counts": {
+            "processing": processing,
+            "succeeded": succeeded,
+            "errored": errored,
+            "canceled": 0,
+            "expired": 0,
+        },
+        "created_at": "2026-03-01T00:00:00Z",
+        "expires_at": "2026-03-02T00:00:00Z",
+        "ended_at": "2026-03-01T00:05:00Z" if status == "ended" else None,
+        "archived_at": None,
+        "cancel_initiated_at": None,
+        "results_url": (
+            f"/v1/messages/batches/{BATCH_ID}/results" if status == "ended" else None
+        ),
+    }
+
+
+def _succeeded(custom_id: str, text: str) -> dict:
+    return {
+        "custom_id": custom_id,
+        "result": {
+            "type": "succeeded",
+            "message": {
+                "id": f"msg_{custom_id}",
+                "type": "message",
+                "role": "assistant",
+                "model": "claude-haiku-4-5-20251001",
+                "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 100, "output_tokens": 20},
+            },
+        },
+    }
+
+
+def _errored(custom_id: str) -> dict:
+    return {
+        "custom_id": custom_id,
+        "result": {
+            "type": "errored",
+            "error": {
+                "type": "error",
+                "error": {"type": "overloaded_error", "message": "Overloaded"},
+            },
+        },
+    }
+
+
+class _BatchesStandIn:
+    """Minimal in-memory Message Batches endpoint served over local HTTP."""
+
+    def __init__(self, polls_until_ended: int, results: list[dict]) -> None:
+        self.polls_until_ended = polls_until_ended
+        self.results = results
+        self.submitted: list[dict] = []
+        self.cancelled = False
+
+    def respond(self, method: str, path: str, body: bytes) -> tuple[int, bytes]:
+        if method == "POST" and path == "/v1/messages/batches":
+            self.submitted = json.loads(body)["requests"]
+            batch = _batch("in_progress", len(self.submitted), 0, 0)
+            return 200, json.dumps(batch).encode()
+        total = len(self.submitted)
+        if method == "POST" and path.endswith("/cancel"):
+            self.cancelled = True
+            return 200, json.dumps(_batch("canceling", total, 0, 0)).encode()
+        if path == f"/v1/messages/batches/{BATCH_ID}":
+            self.polls_until_ended -= 1
+            if self.polls_until_ended > 0:
+                batch = _batch("in_progress", total, 0, 0)
+            else:
+                errored = sum(r["result"]["type"] == "errored" for r in self.results)
+                batch = _batch("ended", 0, total - errored, errored)
+            return 200, json.dumps(batch).encode()
+        if path == f"/v1/messages/batches/{BATCH_ID}/results":
+            return 200, "\n".join(json.dumps(r) for r in self.results).encode()
+        return 404, b'{"type": "error"}'
+
+
+@pytest.fixture
+def serve_batches():
+    """Serve a _BatchesStandIn locally; returns a client pointed at it."""
+    servers: list[ThreadingHTTPServer] = []
+
+    def _serve(stand_in: _BatchesStandIn) -> anthropic.AsyncAnthropic:
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                status, body = stand_in.respond(
+                    self.command, self.path, self.rfile.read(length)
+                )
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:  # noqa: N802
+                self._handle()
+
+            def do_POST(self) -> None:  # noqa: N802
+                self._handle()
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return anthropic.AsyncAnthropic(
+            api_key="test", base_url=f"http://127.0.0.1:{server.server_port}"
+        )
+
+    yield _serve
+    for server in servers:
+        server.shutdown()
+
+
+def _params(text: str) -> MessageCreateParamsNonStreaming:
+    return {
+        "model": "claude-haiku-4-5-20251001",
+        "max_tokens": 512,
+        "messages": [{"role": "user", "content": text}],
+    }
+
+
+@pytest.mark.asyncio
+async def test_message_batches_poll_until_ended(serve_batches):
+    from travel_planner.routers._gmail_batch import run_message_batches
+
+    stand_in = _BatchesStandIn(
+        polls_until_ended=2,
+        results=[_succeeded("email1", '{"title": "Flight"}'), _errored("email2")],
+    )
+    progress: list[dict[str, int]] = []
+
+    async def on_progress(counts: dict[str, int]) -> bool:
+        progress.append(counts)
+        return True
+
+    replies = await run_message_batches(
+        serve_batches(stand_in),
+        {"email1": _params("a"), "email2": _params("b")},
+        poll_interval=0,
+        on_progress=on_progress,
+    )
+
+    assert [r["custom_id"] for r in stand_in.submitted] == ["email1", "email2"]
+    assert stand_in.submitted[0]["params"]["max_tokens"] == 512
+    assert [p["processing"] for p in progress] == [2, 2, 0]
+    assert progress[-1]["succeeded"] == 1
+    assert progress[-1]["errored"] == 1
+    reply = replies["email1"]
+    assert reply is not None
+    assert reply.content[0].type == "text"
+    assert replies["email2"] is None
+
+
+@pytest.mark.asyncio
+async def test_message_batches_cancel_when_progress_returns_false(serve_batches):
+    from travel_planner.routers._gmail_batch import run_message_batches
+
+    stand_in = _BatchesStandIn(polls_until_ended=5, results=[])
+
+    async def on_progress(counts: dict[str, int]) -> bool:
+        return False
+
+    replies = await run_message_batches(
+        serve_batches(stand_in),
+        {"email1": _params("a")},
+        poll_interval=0,
+        on_progress=on_progress,
+    )
+
+    assert replies == {}
+    assert stand_in.cancelled is True
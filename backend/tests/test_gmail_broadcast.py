@@ -0,0 +1,219 @@
+"""Tests for the per-scan SSE progress fan-out."""
+
+import asyncio
+import json
+import uuid
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from typing import cast
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from travel_planner.config import settings
+from travel_planner.models.gmail import ScanEvent, ScanRunStatus
+from travel_planner.routers._gmail_broadcast import (
+    _RESYNC,
+    _Subscriber,
+    stream_scan_events,
+)
+
+
+class _FakeDb:
+    """Serves a scan's ScanRun and ScanEvents, counting the queries made."""
+
+    def __init__(self, scan_run, events: list[ScanEvent]) -> None:
+        self.scan_run = scan_run
+        self.events = events
+        self.queue_position = 1
+        self.queries: list[str] = []
+
+    async def execute(self, stmt):
+        sql = str(stmt)
+        params = stmt.compile().params
+        result = MagicMock()
+        if "count(" in sql:
+            self.queries.append("queue_position")
+            result.scalar_one.return_value = self.queue_position
+        elif "max(" in sql:
+            self.queries.append("max_seq")
+            result.scalar.return_value = max((e.seq for e in self.events), default=0)
+        elif "FROM scan_runs" in sql:
+            self.queries.append("scan_run")
+            result.scalar_one_or_none.return_value = self.scan_run
+        else:
+            self.queries.append("events")
+            after = params["seq_1"]
+            upto = params.get("seq_2", float("inf"))
+            result.scalars.return_value.all.return_value = [
+                e for e in self.events if after < e.seq <= upto
+            ]
+        return result
+
+    async def refresh(self, obj) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+@pytest.fixture
+def scan():
+    scan_id = uuid.uuid4()
+    scan_run = MagicMock(
+        id=scan_id,
+        status=ScanRunStatus.running,
+        emails_found=0,
+        imported_count=0,
+        skipped_count=0,
+        unmatched_count=0,
+        stats={},
+    )
+    events = [
+        ScanEvent(scan_run_id=scan_id, seq=seq, email_id=f"e{seq}", status="skipped")
+        for seq in (1, 2, 3)
+    ]
+    db = _FakeDb(scan_run, events)
+
+    @asynccontextmanager
+    async def session():
+        yield db
+
+    @asynccontextmanager
+    async def subscribe(scan_id, queue=False):
+        yield asyncio.Event()
+
+    with (
+        patch("travel_planner.routers._gmail_broadcast.async_session", session),
+        patch(
+            "travel_planner.routers._gmail_broadcast.get_scan_notifier",
+            return_value=MagicMock(subscribe=subscribe),
+        ),
+        patch.object(settings, "gmail_stream_poll_seconds", 0.01),
+    ):
+        yield scan_id, db
+
+
+async def _collect(scan_id, last_seq=0) -> list[dict]:
+    return [
+        message
+        async for message in stream_scan_events(scan_id, last_seq)
+        if "comment" not in message
+    ]
+
+
+async def test_subscribers_share_one_producer(scan):
+    scan_id, db = scan
+    watchers = [asyncio.create_task(_collect(scan_id)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+
+    db.events.append(
+        ScanEvent(scan_run_id=scan_id, seq=4, email_id="e4", status="skipped")
+    )
+    db.scan_run.status = ScanRunStatus.completed
+    results = await asyncio.gather(*watchers)
+
+    for messages in results:
+        assert [m.get("id") for m in messages] == ["1", "2", "3", "4", None]
+        assert messages[-1]["event"] == "done"
+    # One producer loaded the scan, however many streams watched it
+    assert db.queries.count("scan_run") == 1
+    assert db.queries.count("max_seq") == 1
+
+
+async def test_stream_resumes_after_last_seq(scan):
+    scan_id, db = scan
+    db.scan_run.status = ScanRunStatus.completed
+
+    messages = await _collect(scan_id, last_seq=2)
+
+    assert [m.get("id") for m in messages] == ["3", None]
+    assert json.loads(messages[0]["data"])["email_id"] == "e3"
+
+
+async def test_queued_scan_reports_its_position(scan):
+    scan_id, db = scan
+    db.events.clear()
+    db.scan_run.status = ScanRunStatus.queued
+    db.queue_position = 3
+    watcher = asyncio.create_task(_collect(scan_id))
+    await asyncio.sleep(0.05)
+
+    db.queue_position = 1
+    await asyncio.sleep(0.05)
+    db.scan_run.status = ScanRunStatus.completed
+    messages = await watcher
+
+    assert [(m["event"], json.loads(m["data"])) for m in messages[:2]] == [
+        ("queued", {"position": 3}),
+        ("queued", {"position": 1}),
+    ]
+    assert [m["event"] for m in messages[2:]] == ["done"]
+
+
+async def test_listing_reports_emails_found_as_it_grows(scan):
+    scan_id, db = scan
+    db.events.clear()
+    db.scan_run.emails_found = 500
+    watcher = asyncio.create_task(_collect(scan_id))
+    await asyncio.sleep(0.05)
+
+    db.scan_run.emails_found = 1000
+    await asyncio.sleep(0.05)
+    db.scan_run.status = ScanRunStatus.completed
+    messages = await watcher
+
+    assert [(m["event"], json.loads(m["data"])) for m in messages[:2]] == [
+        ("found", {"emails_found": 500}),
+        ("found", {"emails_found": 1000}),
+    ]
+    assert [m["event"] for m in messages[2:]] == ["done"]
+
+
+async def test_stream_joining_while_feed_shuts_down_still_gets_done(scan):
+    scan_id, db = scan
+    unsubscribed = asyncio.Event()
+
+    @asynccontextmanager
+    async def slow_unsubscribe(scan_id, queue=False):
+        yield asyncio.Event()
+        # UNLISTEN takes a while after the feed published done
+        await unsubscribed.wait()
+
+    notifier = MagicMock(subscribe=slow_unsubscribe)
+    with patch(
+        "travel_planner.routers._gmail_broadcast.get_scan_notifier",
+        return_value=notifier,
+    ):
+        # An open stream that has not read its done yet keeps the feed alive
+        early = cast(AsyncGenerator[dict, None], stream_scan_events(scan_id))
+        await anext(early)
+        db.scan_run.status = ScanRunStatus.completed
+        await asyncio.sleep(0.05)
+
+        late = await asyncio.wait_for(_collect(scan_id), 1)
+        unsubscribed.set()
+        await early.aclose()
+
+    assert late[-1]["event"] == "done"
+
+
+async def test_stream_ends_when_scan_is_missing(scan):
+    scan_id, db = scan
+    db.scan_run = None
+
+    messages = await _collect(scan_id)
+
+    assert messages == [
+        {"event": "error", "data": json.dumps({"code": "scan_not_found"})}
+    ]
+
+
+def test_slow_subscriber_drops_its_buffer_and_resyncs():
+    subscriber = _Subscriber(maxsize=2)
+
+    for seq in (1, 2, 3):
+        subscriber.put((seq, {"id": str(seq)}))
+
+    queued = [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+    assert queued == [_RESYNC, (3, {"id": "3"})]
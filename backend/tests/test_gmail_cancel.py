@@ -0,0 +1,89 @@
+"""Tests for in-process Gmail scan cancellation signalling."""
+
+import uuid
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def _make_scan_run():
+    from travel_planner.models.gmail import ScanRunStatus
+
+    scan_run = MagicMock()
+    scan_run.id = uuid.uuid4()
+    scan_run.status = ScanRunStatus.running
+    scan_run.finished_at = None
+    return scan_run
+
+
+@pytest.mark.asyncio
+async def test_cancel_check_sees_registry_without_querying():
+    from travel_planner.routers._gmail_cancel import (
+        CancelCheck,
+        request_cancel,
+        unregister_scan,
+    )
+
+    db = MagicMock()
+    db.execute = AsyncMock()
+    scan_run = _make_scan_run()
+    check = CancelCheck(db, scan_run, db_interval=60)
+    try:
+        assert await check.cancelled() is False
+        request_cancel(scan_run.id)
+        assert await check.cancelled() is True
+    finally:
+        unregister_scan(scan_run.id)
+
+    db.execute.assert_not_awaited()
+    assert check.latency is not None
+    assert check.latency >= 0
+
+
+@pytest.mark.asyncio
+async def test_request_cancel_ignores_scans_not_running_here():
+    from travel_planner.routers._gmail_cancel import _running_scans, request_cancel
+
+    scan_id = uuid.uuid4()
+    request_cancel(scan_id)
+
+    assert scan_id not in _running_scans
+
+
+@pytest.mark.asyncio
+async def test_cancel_check_falls_back_to_db_after_interval():
+    """A cancel from another process is seen on the periodic status read."""
+    from travel_planner.models.gmail import ScanRunStatus
+    from travel_planner.routers._gmail_cancel import CancelCheck, unregister_scan
+
+    scan_run = _make_scan_run()
+
+    result = MagicMock()
+    result.one.return_value = (
+        ScanRunStatus.cancelled,
+        datetime.now(tz=UTC) - timedelta(seconds=2),
+    )
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+
+    with patch("travel_planner.routers._gmail_cancel.time") as mock_time:
+        mock_time.monotonic.return_value = 100.0
+        check = CancelCheck(db, scan_run, db_interval=5)
+        try:
+            mock_time.monotonic.return_value = 104.0
+            assert await check.cancelled() is False
+            db.execute.assert_not_awaited()
+
+            mock_time.monotonic.return_value = 105.0
+            assert await check.cancelled() is True
+        finally:
+            unregister_scan(scan_run.id)
+
+    db.execute.assert_awaited_once()
+    # The tracked row is left alone, so unflushed changes to it survive and
+    # are not flushed outside the writer's lease check either
+    assert scan_run.status == ScanRunStatus.running
+    db.no_autoflush.__enter__.assert_called_once()
+    assert check.latency is not None
+    assert 2 <= check.latency < 3
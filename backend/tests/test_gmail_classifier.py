@@ -0,0 +1,55 @@
+"""Tests for the rule-based travel pre-classifier.
+
+The precision/recall benchmark runs the classifier over a labelled corpus of
+emails that all match TRAVEL_SEARCH. Recall matters most: a rejected booking
+never reaches the inbox.
+"""
+
+import json
+from pathlib import Path
+
+CORPUS = Path(__file__).parent / "fixtures" / "travel_classifier_corpus.json"
+
+
+def test_classifier_precision_recall_on_corpus():
+    from travel_planner.routers._gmail_classifier import is_probable_travel
+
+    corpus = json.loads(CORPUS.read_text())
+    tp = fp = fn = 0
+    for email in corpus:
+        predicted = is_probable_travel(email["subject"], email["sender"], email["body"])
+        tp += predicted and email["travel"]
+        fp += predicted and not email["travel"]
+        fn += not predicted and email["travel"]
+
+    precision = tp / (tp + fp)
+    recall = tp / (tp + fn)
+    rejected = sum(not e["travel"] for e in corpus) - fp
+    assert recall == 1.0
+    assert precision >= 0.9
+    # Half the corpus is rejected before it costs an LLM call
+    assert rejected / len(corpus) >= 0.4
+
+
+def test_classifier_accepts_booking_from_unknown_sender():
+    from travel_planner.routers._gmail_classifier import is_probable_travel
+
+    assert is_probable_travel(
+        "Your reservation",
+        "Pension Alpina <info@pension-alpina.at>",
+        "Reservation number: PA48213. Check-in date: 2 Aug. 4 nights, 2 guests.",
+    )
+
+
+def test_classifier_booking_code_must_look_like_a_code():
+    from travel_planner.routers._gmail_classifier import travel_score
+
+    assert travel_score("", "", "Your confirmation email is below") == 0
+    assert travel_score("", "", "Your confirmation code is K7XQ2P") == 2
+
+
+def test_classifier_matches_travel_subdomains():
+    from travel_planner.routers._gmail_classifier import travel_score
+
+    assert travel_score("", "Delta <skymiles@t.delta.com>", "") == 2
+    assert travel_score("", "Fake <a@notdelta.com>", "") == 0
@@ -0,0 +1,305 @@
+"""Tests for the async Gmail REST client, against an httpx mock transport."""
+
+import json
+import re
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+
+from travel_planner.routers._gmail_client import GmailApiError, GmailClient
+
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+
+
+def _creds(token: str | None = "live", expired: bool = False) -> Credentials:
+    # google.auth compares expiry as naive UTC
+    now = datetime.now(tz=UTC).replace(tzinfo=None)
+    expiry = now + timedelta(hours=-1 if expired else 1)
+    return Credentials(
+        token=token,
+        refresh_token="refresh",
+        token_uri=TOKEN_URL,
+        client_id="cid",
+        client_secret="secret",
+        expiry=expiry,
+    )
+
+
+def _client(handler, creds: Credentials | None = None) -> GmailClient:
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return GmailClient(creds or _creds(), http=http)
+
+
+def _error(status: int, reason: str) -> httpx.Response:
+    return httpx.Response(
+        status,
+        json={
+            "error": {"code": status, "message": reason, "errors": [{"reason": reason}]}
+        },
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_backoff():
+    with patch(
+        "travel_planner.routers._gmail_client.asyncio.sleep", AsyncMock()
+    ) as sleep:
+        yield sleep
+
+
+# ---------------------------------------------------------------------------
+# Listing and history
+# ---------------------------------------------------------------------------
+
+
+async def test_iter_message_ids_yields_each_page_before_listing_the_next():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if "pageToken" not in request.url.params:
+            return httpx.Response(
+                200,
+                json={"messages": [{"id": "a"}, {"id": "b"}], "nextPageToken": "p2"},
+            )
+        return httpx.Response(200, json={"messages": [{"id": "c"}]})
+
+    pages = _client(handler).iter_message_ids("q")
+
+    assert await anext(pages) == ["a", "b"]
+    assert len(seen) == 1
+    assert [page async for page in pages] == [["c"]]
+    assert [r.url.params.get("pageToken") for r in seen] == [None, "p2"]
+    assert seen[0].url.path == "/gmail/v1/users/me/messages"
+    assert seen[0].url.params["q"] == "q"
+    assert seen[0].headers["Authorization"] == "Bearer live"
+
+
+async def test_list_added_message_ids_collects_history():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if "pageToken" not in request.url.params:
+            return httpx.Response(
+                200,
+                json={
+                    "history": [
+                        {"messagesAdded": [{"message": {"id": "a"}}]},
+                        {"messagesAdded": [{"message": {"id": "b"}}]},
+                    ],
+                    "nextPageToken": "p2",
+                },
+            )
+        return httpx.Response(
+            200, json={"history": [{"messagesAdded": [{"message": {"id": "a"}}]}]}
+        )
+
+    assert await _client(handler).list_added_message_ids("1234") == {"a", "b"}
+    assert seen[0].url.params["startHistoryId"] == "1234"
+    assert seen[0].url.params["historyTypes"] == "messageAdded"
+
+
+async def test_list_added_message_ids_expired_checkpoint():
+    """A 404 from history.list means the checkpoint expired → full scan."""
+    client = _client(lambda request: _error(404, "notFound"))
+
+    assert await client.list_added_message_ids("1234") is None
+
+
+# ---------------------------------------------------------------------------
+# Message fetches
+# ---------------------------------------------------------------------------
+
+
+async def test_get_messages_single_id_is_a_plain_get():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"id": "a"})
+
+    params = {"format": "metadata", "metadataHeaders": ["From", "Subject"]}
+    result = await _client(handler).get_messages(["a"], params)
+
+    assert result == {"a": {"id": "a"}}
+    assert seen[0].url.path == "/gmail/v1/users/me/messages/a"
+    assert seen[0].url.params.get_list("metadataHeaders") == ["From", "Subject"]
+
+
+async def test_get_messages_single_id_returns_error_in_place():
+    result = await _client(lambda request: _error(404, "notFound")).get_messages(
+        ["a"], {"format": "full"}
+    )
+
+    assert isinstance(result["a"], GmailApiError)
+    assert result["a"].status == 404
+
+
+def _batch_reply(parts: list[tuple[str, int, dict]]) -> httpx.Response:
+    body = "".join(
+        "--resp_boundary\r\n"
+        "Content-Type: application/http\r\n"
+        f"Content-ID: <response-{content_id}>\r\n\r\n"
+        f"HTTP/1.1 {status} X\r\n"
+        "Content-Type: application/json; charset=UTF-8\r\n\r\n"
+        f"{json.dumps(payload)}\r\n"
+        for content_id, status, payload in parts
+    )
+    return httpx.Response(
+        200,
+        content=f"{body}--resp_boundary--\r\n".encode(),
+        headers={"Content-Type": "multipart/mixed; boundary=resp_boundary"},
+    )
+
+
+async def test_get_messages_batches_several_ids():
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        rate_limited = {
+            "error": {"code": 429, "errors": [{"reason": "rateLimitExceeded"}]}
+        }
+        return _batch_reply(
+            [
+                ("item0", 200, {"id": "a"}),
+                ("item1", 429, rate_limited),
+                # item2 is missing from the reply
+            ]
+        )
+
+    result = await _client(handler).get_messages(["a", "b", "c"], {"format": "full"})
+
+    (request,) = seen
+    assert request.url == "https://gmail.googleapis.com/batch/gmail/v1"
+    assert request.headers["Content-Type"].startswith("multipart/mixed; boundary=")
+    assert re.findall(r"GET (\S+) HTTP/1.1", request.content.decode()) == [
+        f"/gmail/v1/users/me/messages/{eid}?format=full" for eid in ("a", "b", "c")
+    ]
+    assert result["a"] == {"id": "a"}
+    b, c = result["b"], result["c"]
+    assert isinstance(b, GmailApiError) and b.rate_limited
+    assert isinstance(c, GmailApiError) and not c.rate_limited
+
+
+# ---------------------------------------------------------------------------
+# Retries and token refresh
+# ---------------------------------------------------------------------------
+
+
+async def test_retries_server_errors_with_backoff(no_backoff):
+    replies = [_error(503, "backendError"), httpx.Response(200, json={"id": "a"})]
+
+    result = await _client(lambda request: replies.pop(0)).get_message("a", {})
+
+    assert result == {"id": "a"}
+    no_backoff.assert_awaited_once()
+
+
+async def test_retry_after_header_sets_the_delay(no_backoff):
+    replies = [
+        httpx.Response(429, headers={"Retry-After": "7"}),
+        httpx.Response(200, json={"id": "a"}),
+    ]
+
+    await _client(lambda request: replies.pop(0)).get_message("a", {})
+
+    (delay,) = no_backoff.await_args.args
+    assert 7.0 <= delay <= 10.5
+
+
+async def test_retry_after_is_capped(no_backoff):
+    replies = [
+        httpx.Response(429, headers={"Retry-After": "3600"}),
+        httpx.Response(200, json={"id": "a"}),
+    ]
+
+    await _client(lambda request: replies.pop(0)).get_message("a", {})
+
+    (delay,) = no_backoff.await_args.args
+    assert 60.0 <= delay <= 90.0
+
+
+async def test_retries_transport_errors():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise httpx.ConnectError("reset", request=request)
+        return httpx.Response(200, json={"historyId": "9"})
+
+    assert await _client(handler).get_profile() == {"historyId": "9"}
+
+
+async def test_gives_up_after_max_retries():
+    client = _client(lambda request: _error(403, "userRateLimitExceeded"))
+
+    with pytest.raises(GmailApiError) as exc_info:
+        await client.get_message("a", {})
+
+    assert exc_info.value.rate_limited
+
+
+async def test_non_retryable_error_is_raised_at_once():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return _error(403, "forbidden")
+
+    with pytest.raises(GmailApiError):
+        await _client(handler).get_message("a", {})
+    assert calls == 1
+
+
+async def test_unauthorized_refreshes_token_once_and_resends():
+    creds = _creds()
+    auth_headers: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == TOKEN_URL:
+            form = dict(httpx.QueryParams(request.content.decode()))
+            assert form["grant_type"] == "refresh_token"
+            assert form["refresh_token"] == "refresh"
+            return httpx.Response(200, json={"access_token": "new", "expires_in": 3600})
+        auth_headers.append(request.headers["Authorization"])
+        if request.headers["Authorization"] == "Bearer live":
+            return _error(401, "authError")
+        return httpx.Response(200, json={"historyId": "9"})
+
+    assert await _client(handler, creds).get_profile() == {"historyId": "9"}
+    assert auth_headers == ["Bearer live", "Bearer new"]
+    assert creds.token == "new"
+    assert not creds.expired
+
+
+async def test_expired_token_is_refreshed_before_the_request():
+    creds = _creds(token="old", expired=True)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if str(request.url) == TOKEN_URL:
+            return httpx.Response(200, json={"access_token": "new"})
+        assert request.headers["Authorization"] == "Bearer new"
+        return httpx.Response(200, json={"historyId": "9"})
+
+    await _client(handler, creds).get_profile()
+
+    assert creds.token == "new"
+
+
+async def test_failed_refresh_raises_refresh_error():
+    creds = _creds(expired=True)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(400, json={"error": "invalid_grant"})
+
+    with pytest.raises(RefreshError):
+        await _client(handler, creds).get_profile()
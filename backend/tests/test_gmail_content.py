@@ -0,0 +1,69 @@
+"""Tests for relevance-aware email text selection.
+
+The accuracy check packs each fixture email into a small token budget and
+verifies every labelled booking fact survives, next to the plain truncation
+the scan used before.
+"""
+
+import json
+from pathlib import Path
+
+CORPUS = Path(__file__).parent / "fixtures" / "relevance_corpus.json"
+BUDGET = 150
+
+
+def test_relevant_text_keeps_booking_facts_within_budget():
+    from travel_planner.routers._gmail_content import (
+        estimate_tokens,
+        select_relevant_text,
+    )
+
+    corpus = json.loads(CORPUS.read_text())
+    kept = truncated_kept = 0
+    full_tokens = sent_tokens = 0
+    for email in corpus:
+        text = "\n\n".join(email["paragraphs"])
+        selected = select_relevant_text(text, BUDGET)
+        assert estimate_tokens(selected) <= BUDGET, email["name"]
+        kept += all(fact in selected for fact in email["facts"])
+        truncated = text[: BUDGET * 4]
+        truncated_kept += all(fact in truncated for fact in email["facts"])
+        full_tokens += estimate_tokens(text)
+        sent_tokens += estimate_tokens(selected)
+
+    assert kept == len(corpus)
+    assert truncated_kept < kept
+    # About a third of each email's tokens are sent
+    assert sent_tokens <= full_tokens / 2
+
+
+def test_relevant_text_returns_short_text_unchanged():
+    from travel_planner.routers._gmail_content import select_relevant_text
+
+    text = "Line one\n\n\nLine two"
+    assert select_relevant_text(text, 100) == text
+
+
+def test_relevant_text_keeps_paragraph_order():
+    from travel_planner.routers._gmail_content import select_relevant_text
+
+    text = "\n\n".join(
+        [
+            "Check-in: Mar 3 at 3:00 PM",
+            "x" * 400,
+            "Unsubscribe | Privacy | © 2026 All rights reserved",
+            "Confirmation number: HMXY4T2Q",
+        ]
+    )
+
+    selected = select_relevant_text(text, 40)
+
+    assert selected == "Check-in: Mar 3 at 3:00 PM\n\nConfirmation number: HMXY4T2Q"
+
+
+def test_relevant_text_without_signals_degrades_to_truncation():
+    from travel_planner.routers._gmail_content import select_relevant_text
+
+    text = "\n\n".join(["a" * 100, "b" * 100, "c" * 100])
+
+    assert select_relevant_text(text, 52) == "a" * 100 + "\n\n" + "b" * 100
@@ -0,0 +1,145 @@
+"""Tests for the deterministic sender template extractors."""
+
+from datetime import date
+
+RECEIVED = date(2026, 2, 20)
+
+UNITED_BODY = (
+    "Thanks for choosing United. Confirmation number: K7XQ2P\n"
+    "Flight UA 1234 DEN → AUS\n"
+    "Departing Sat, Mar 15 at 8:05 AM, arriving 11:20 AM. Seat 14C."
+)
+AIRBNB_BODY = (
+    "Your reservation is confirmed. You're going to Boulder! "
+    "Check-in: Fri, Apr 4 after 3:00 PM. Checkout: Mon, Apr 7 11:00 AM. "
+    "3 nights, 2 guests. Confirmation code HMXY4T2Q."
+)
+
+
+def test_flight_extractor_matches_claude_shape():
+    from travel_planner.routers._gmail_extractors import extract_booking
+
+    parsed = extract_booking(
+        "Your flight confirmation",
+        "United Airlines <unitedairlines@united.com>",
+        UNITED_BODY,
+        RECEIVED,
+    )
+
+    assert parsed == {
+        "title": "Flight UA1234 DEN→AUS",
+        "category": "transport",
+        "date": "2026-03-15",
+        "start_time": "08:05",
+        "end_time": "11:20",
+        "location": "AUS",
+        "confirmation_number": "K7XQ2P",
+        "notes": None,
+    }
+
+
+def test_lodging_extractor_reads_check_in():
+    from travel_planner.routers._gmail_extractors import extract_booking
+
+    parsed = extract_booking(
+        "Reservation confirmed", "Airbnb <automated@airbnb.com>", AIRBNB_BODY, RECEIVED
+    )
+
+    assert parsed is not None
+    assert parsed["title"] == "Airbnb Boulder 3-night stay"
+    assert parsed["category"] == "lodging"
+    assert parsed["date"] == "2026-04-04"
+    assert parsed["start_time"] == "15:00"
+    assert parsed["location"] == "Boulder"
+    assert parsed["confirmation_number"] == "HMXY4T2Q"
+
+
+def test_lodging_extractor_skips_greeting_for_the_stay():
+    from travel_planner.routers._gmail_extractors import extract_booking
+
+    body = (
+        "Welcome to Marriott Bonvoy! Your stay at Courtyard Paris Gare de Lyon "
+        "is confirmed. Check-in: Thu, May 7 after 3:00 PM. "
+        "Confirmation number: 84512093."
+    )
+
+    parsed = extract_booking(
+        "Reservation confirmation",
+        "Marriott <reservations@marriott.com>",
+        body,
+        RECEIVED,
+    )
+
+    assert parsed is not None
+    assert parsed["location"] == "Courtyard Paris Gare de Lyon"
+    assert parsed["title"] == "Marriott Courtyard Paris Gare de Lyon"
+
+
+def test_extractor_matches_sender_subdomains():
+    from travel_planner.routers._gmail_extractors import find_extractor
+
+    assert find_extractor("Delta <DeltaAirLines@t.delta.com>") is not None
+    assert find_extractor("Someone <a@notdelta.com>") is None
+    assert find_extractor("Someone <a@example.com>") is None
+
+
+def test_extractor_leaves_schedule_changes_to_claude():
+    from travel_planner.routers._gmail_extractors import extract_booking
+
+    parsed = extract_booking(
+        "Schedule change for your trip",
+        "United <unitedairlines@united.com>",
+        UNITED_BODY,
+        RECEIVED,
+    )
+
+    assert parsed is None
+
+
+def test_extractor_falls_back_when_a_field_is_missing():
+    from travel_planner.routers._gmail_extractors import extract_booking
+
+    no_code = UNITED_BODY.replace("Confirmation number: K7XQ2P", "")
+    no_date = UNITED_BODY.replace("Sat, Mar 15 ", "")
+
+    for body in (no_code, no_date):
+        assert (
+            extract_booking(
+                "Your flight confirmation", "United <u@united.com>", body, RECEIVED
+            )
+            is None
+        )
+
+
+def test_extractor_errors_fall_back():
+    from travel_planner.routers import _gmail_extractors as extractors
+
+    def broken(subject, body, received):
+        raise ValueError("unexpected layout")
+
+    extractors.register("broken-airline.test", broken)
+    try:
+        assert extractors.extract_booking("Hi", "x@broken-airline.test", "") is None
+    finally:
+        del extractors._EXTRACTORS["broken-airline.test"]
+
+
+def test_find_date_infers_year_from_received_date():
+    from travel_planner.routers._gmail_extractors import find_date
+
+    assert find_date("Departing Mar 15", date(2026, 2, 20)) == date(2026, 3, 15)
+    # A January trip booked in December is next year
+    assert find_date("Check-in: Jan 5", date(2026, 12, 10)) == date(2027, 1, 5)
+    assert find_date("12 June 2026", None) == date(2026, 6, 12)
+    assert find_date("Departing Mar 15", None) is None
+    assert find_date("Terminal 4, Seat 14C", RECEIVED) is None
+
+
+def test_find_time_converts_to_24h():
+    from travel_planner.routers._gmail_extractors import find_time
+
+    assert find_time("at 8:05 AM") == "08:05"
+    assert find_time("after 3:00 p.m.") == "15:00"
+    assert find_time("12:30 AM") == "00:30"
+    assert find_time("from 15:00") == "15:00"
+    assert find_time("no time here") is None
@@ -0,0 +1,101 @@
+"""Tests for scan progress LISTEN/NOTIFY fan-out."""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from travel_planner.routers._gmail_notify import (
+    ScanNotifier,
+    notify_scan,
+    scan_channel,
+)
+
+
+class _FakeDriver:
+    """Stand-in for the asyncpg connection's listener API."""
+
+    def __init__(self) -> None:
+        self.listeners: dict[str, set] = {}
+        self.on_terminate = None
+
+    def add_termination_listener(self, callback) -> None:
+        self.on_terminate = callback
+
+    async def add_listener(self, channel, callback) -> None:
+        self.listeners.setdefault(channel, set()).add(callback)
+
+    async def remove_listener(self, channel, callback) -> None:
+        self.listeners.pop(channel, None)
+
+    def notify(self, channel: str) -> None:
+        for callback in self.listeners.get(channel, ()):
+            callback(self, 1, channel, "")
+
+
+@pytest.fixture
+def driver():
+    driver = _FakeDriver()
+    with (
+        patch("travel_planner.routers._gmail_notify.engine") as engine,
+        patch(
+            "travel_planner.routers._gmail_notify._driver_connection",
+            AsyncMock(return_value=driver),
+        ),
+    ):
+        engine.connect = AsyncMock(return_value=AsyncMock())
+        yield driver
+
+
+async def test_notify_scan_sends_pg_notify_on_the_scan_channel():
+    scan_id = uuid.uuid4()
+    db = MagicMock()
+    db.execute = AsyncMock()
+
+    await notify_scan(db, scan_id)
+
+    (stmt,) = db.execute.await_args.args
+    compiled = stmt.compile(dialect=postgresql.dialect())
+    assert "pg_notify" in str(compiled)
+    assert scan_channel(scan_id) in compiled.params.values()
+
+
+async def test_subscribers_wake_on_their_scan_only(driver):
+    notifier = ScanNotifier()
+    scan_a, scan_b = uuid.uuid4(), uuid.uuid4()
+
+    async with (
+        notifier.subscribe(scan_a) as wake_a,
+        notifier.subscribe(scan_a) as wake_a2,
+        notifier.subscribe(scan_b) as wake_b,
+    ):
+        driver.notify(scan_channel(scan_a))
+
+        assert wake_a.is_set() and wake_a2.is_set()
+        assert not wake_b.is_set()
+
+    # The last subscriber leaving UNLISTENs
+    assert driver.listeners == {}
+
+
+async def test_lost_connection_wakes_subscribers_and_relistens(driver):
+    notifier = ScanNotifier()
+    scan_id = uuid.uuid4()
+
+    async with notifier.subscribe(scan_id) as wake:
+        driver.listeners.clear()
+        driver.on_terminate(driver)
+        assert wake.is_set()
+
+        assert notifier._reconnect_task is not None
+        await notifier._reconnect_task
+        assert scan_channel(scan_id) in driver.listeners
+
+
+async def test_listen_failure_falls_back_to_polling():
+    notifier = ScanNotifier()
+    with patch("travel_planner.routers._gmail_notify.engine") as engine:
+        engine.connect = AsyncMock(side_effect=OSError("database down"))
+        async with notifier.subscribe(uuid.uuid4()) as wake:
+            assert not wake.is_set()
@@ -0,0 +1,80 @@
+"""Tests for the persistent Claude parse cache."""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+
+def _session_factory(db):
+    session_cm = MagicMock()
+    session_cm.__aenter__ = AsyncMock(return_value=db)
+    session_cm.__aexit__ = AsyncMock(return_value=False)
+    return MagicMock(return_value=session_cm)
+
+
+def test_parse_cache_key_covers_every_input():
+    from travel_planner.routers._gmail_parse_cache import parse_cache_key
+
+    key = parse_cache_key("v1", "Flight", "a@airline.com", "body")
+
+    assert key == parse_cache_key("v1", "Flight", "a@airline.com", "body")
+    assert len(key) == 64
+    assert key != parse_cache_key("v2", "Flight", "a@airline.com", "body")
+    assert key != parse_cache_key("v1", "Flight!", "a@airline.com", "body")
+    assert key != parse_cache_key("v1", "Flight", "b@airline.com", "body")
+    assert key != parse_cache_key("v1", "Flight", "a@airline.com", "body2")
+    # Field boundaries are part of the hash
+    assert parse_cache_key("v1", "ab", "c", "") != parse_cache_key("v1", "a", "bc", "")
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_counts_hits_and_misses():
+    from travel_planner.routers._gmail_parse_cache import ParseCache
+
+    parsed = {"title": "Hotel"}
+    hit_result = MagicMock()
+    hit_result.first.return_value = (parsed,)
+    miss_result = MagicMock()
+    miss_result.first.return_value = None
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=[hit_result, miss_result])
+    cache = ParseCache(_session_factory(db))
+
+    assert await cache.get("k1") == (True, parsed)
+    assert await cache.get("k2") == (False, None)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_errors_degrade_to_misses():
+    from travel_planner.routers._gmail_parse_cache import ParseCache
+
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=ConnectionError("db down"))
+    db.commit = AsyncMock()
+    cache = ParseCache(_session_factory(db))
+
+    assert await cache.get("k1") == (False, None)
+    await cache.put("k1", {"title": "Hotel"})
+    await cache.evict(ttl=timedelta(days=1), max_entries=10)
+
+    assert cache.misses == 1
+    db.commit.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_parse_cache_put_ignores_conflicts():
+    from travel_planner.routers._gmail_parse_cache import ParseCache
+
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    cache = ParseCache(_session_factory(db))
+
+    await cache.put("k1", None)
+
+    stmt = db.execute.call_args.args[0]
+    assert "ON CONFLICT" in str(stmt.compile(dialect=postgresql.dialect()))
+    db.commit.assert_awaited_once()
@@ -0,0 +1,265 @@
+"""Tests for the bounded-concurrency Gmail scan pipeline."""
+
+import asyncio
+
+import pytest
+
+from travel_planner.routers._gmail_pipeline import run_pipeline
+
+
+async def _identity(item):
+    return item
+
+
+async def _single(item):
+    return [item]
+
+
+async def test_pipeline_writes_every_item():
+    written: list[int] = []
+
+    async def write(item: int) -> bool:
+        written.append(item)
+        return True
+
+    stats = await run_pipeline(
+        range(50),
+        _single,
+        _identity,
+        write,
+        fetch_workers=4,
+        parse_workers=2,
+        queue_size=3,
+    )
+
+    assert sorted(written) == list(range(50))
+    assert stats.processed == 50
+    assert stats.stopped is False
+    assert stats.emails_per_second > 0
+
+
+async def test_pipeline_starts_before_async_source_is_exhausted():
+    """Items flow while the source is still producing, e.g. mid-listing."""
+    written: list[int] = []
+    first_page_written = asyncio.Event()
+
+    async def pages():
+        yield [0, 1]
+        # The next page is only listed once the first has been written
+        await asyncio.wait_for(first_page_written.wait(), 1)
+        yield [2, 3]
+
+    async def fetch(page: list[int]) -> list[int]:
+        return page
+
+    async def write(item: int) -> bool:
+        written.append(item)
+        if len(written) == 2:
+            first_page_written.set()
+        return True
+
+    stats = await run_pipeline(
+        pages(),
+        fetch,
+        _identity,
+        write,
+        fetch_workers=2,
+        parse_workers=2,
+        queue_size=4,
+    )
+
+    assert sorted(written) == [0, 1, 2, 3]
+    assert stats.first_result_at is not None
+    assert stats.finished_at is not None
+    assert stats.started_at <= stats.first_result_at <= stats.finished_at
+
+
+async def test_pipeline_fans_out_fetched_chunks():
+    written: list[int] = []
+
+    async def fetch(chunk: range) -> list[int]:
+        return list(chunk)
+
+    async def write(item: int) -> bool:
+        written.append(item)
+        return True
+
+    stats = await run_pipeline(
+        [range(0, 10), range(10, 20), range(20, 25)],
+        fetch,
+        _identity,
+        write,
+        fetch_workers=2,
+        parse_workers=2,
+        queue_size=4,
+    )
+
+    assert sorted(written) == list(range(25))
+    assert stats.processed == 25
+
+
+async def test_pipeline_bounds_fetch_concurrency():
+    in_flight = peak = 0
+
+    async def fetch(item: int) -> list[int]:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return [item]
+
+    async def write(item: int) -> bool:
+        return True
+
+    await run_pipeline(
+        range(20),
+        fetch,
+        _identity,
+        write,
+        fetch_workers=3,
+        parse_workers=1,
+        queue_size=2,
+    )
+
+    assert peak == 3
+
+
+async def test_pipeline_fetches_concurrently():
+    """Fetch latency overlaps across workers instead of adding up."""
+
+    async def fetch(item: int) -> list[int]:
+        await asyncio.sleep(0.05)
+        return [item]
+
+    async def write(item: int) -> bool:
+        return True
+
+    stats = await run_pipeline(
+        range(10),
+        fetch,
+        _identity,
+        write,
+        fetch_workers=10,
+        parse_workers=1,
+        queue_size=10,
+    )
+
+    assert stats.elapsed < 0.3
+
+
+async def test_pipeline_stops_when_writer_returns_false():
+    fetched: list[int] = []
+    written: list[int] = []
+
+    async def fetch(item: int) -> list[int]:
+        fetched.append(item)
+        return [item]
+
+    async def write(item: int) -> bool:
+        if len(written) == 3:
+            return False
+        written.append(item)
+        return True
+
+    stats = await run_pipeline(
+        range(1000),
+        fetch,
+        _identity,
+        write,
+        fetch_workers=2,
+        parse_workers=1,
+        queue_size=2,
+    )
+
+    assert stats.stopped is True
+    assert stats.processed == 3
+    # Bounded queues mean the fetchers never ran far ahead of the writer
+    assert len(fetched) < 20
+
+
+async def test_pipeline_reraises_stage_errors():
+    async def fetch(item: int) -> list[int]:
+        if item == 5:
+            raise PermissionError("auth revoked")
+        return [item]
+
+    async def write(item: int) -> bool:
+        return True
+
+    with pytest.raises(PermissionError, match="auth revoked"):
+        await run_pipeline(
+            range(20),
+            fetch,
+            _identity,
+            write,
+            fetch_workers=2,
+            parse_workers=2,
+            queue_size=2,
+        )
+
+
+async def test_pipeline_calls_on_idle_while_writer_waits():
+    written: list[int] = []
+    idle_calls = 0
+
+    async def fetch(item: int) -> list[int]:
+        await asyncio.sleep(0.03)
+        return [item]
+
+    async def write(item: int) -> bool:
+        written.append(item)
+        return True
+
+    async def on_idle() -> bool:
+        nonlocal idle_calls
+        idle_calls += 1
+        return True
+
+    await run_pipeline(
+        range(5),
+        fetch,
+        _identity,
+        write,
+        fetch_workers=1,
+        parse_workers=1,
+        queue_size=2,
+        on_idle=on_idle,
+        idle_interval=0.01,
+    )
+
+    assert idle_calls > 0
+    # Idle ticks must not drop the item a pending get was waiting for
+    assert written == list(range(5))
+
+
+async def test_pipeline_stops_when_on_idle_returns_false():
+    written: list[int] = []
+
+    async def fetch(item: int) -> list[int]:
+        await asyncio.sleep(0.5 if item else 0)
+        return [item]
+
+    async def write(item: int) -> bool:
+        written.append(item)
+        return True
+
+    async def on_idle() -> bool:
+        return False
+
+    stats = await run_pipeline(
+        range(5),
+        fetch,
+        _identity,
+        write,
+        fetch_workers=1,
+        parse_workers=1,
+        queue_size=2,
+        on_idle=on_idle,
+        idle_interval=0.01,
+    )
+
+    assert stats.stopped is True
+    assert written == [0]
+    # The slow fetch was abandoned rather than awaited
+    assert stats.elapsed < 0.4
@@ -0,0 +1,148 @@
+"""Tests for claiming queued Gmail scans."""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from travel_planner.routers._gmail_queue import (
+    LeaseLostError,
+    ScanJob,
+    check_lease,
+    claim_scan,
+    release_scans,
+    renew_leases,
+    requeue_expired_scans,
+)
+
+
+def _sql(db: AsyncMock, call: int = 0) -> str:
+    (stmt,) = db.execute.await_args_list[call].args
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+async def test_claim_scan_returns_claimed_job():
+    scan_id, user_id = uuid4(), uuid4()
+    db = AsyncMock()
+    result = MagicMock()
+    result.first.return_value = (scan_id, user_id, False, True)
+    db.execute.return_value = result
+
+    job = await claim_scan(db, "worker-1")
+
+    assert job == ScanJob(scan_id, user_id, rescan_rejected=False, bulk_parse=True)
+    db.commit.assert_awaited_once()
+    params = db.execute.await_args_list[0].args[0].compile().params
+    assert params["owner_id"] == "worker-1"
+
+
+async def test_claim_scan_skips_locked_rows():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(first=MagicMock(return_value=None))
+
+    assert await claim_scan(db, "worker-1") is None
+
+    sql = _sql(db)
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "ORDER BY scan_runs.started_at" in sql
+    assert sql.startswith("UPDATE scan_runs SET status=")
+    # Reclaiming a requeued scan must not reset when it started
+    assert "started_at=coalesce(scan_runs.started_at, now())" in sql
+
+
+async def test_claim_scan_waits_while_running_scans_are_at_the_cap():
+    db = AsyncMock()
+    db.execute.side_effect = [None, MagicMock(scalar_one=MagicMock(return_value=16))]
+
+    assert await claim_scan(db, "worker-1", max_running=16) is None
+
+    assert "pg_advisory_xact_lock" in _sql(db, 0)
+    assert "count(*)" in _sql(db, 1)
+    # Nothing was claimed; the commit releases the advisory lock
+    assert db.execute.await_count == 2
+    db.commit.assert_awaited_once()
+
+
+async def test_claim_scan_under_the_cap_claims_and_notifies_the_queue():
+    scan_id, user_id = uuid4(), uuid4()
+    claimed = MagicMock()
+    claimed.first.return_value = (scan_id, user_id, False, False)
+    db = AsyncMock()
+    db.execute.side_effect = [
+        None,
+        MagicMock(scalar_one=MagicMock(return_value=3)),
+        claimed,
+        None,
+    ]
+
+    job = await claim_scan(db, "worker-1", max_running=16)
+
+    assert job is not None and job.scan_run_id == scan_id
+    assert _sql(db, 2).startswith("UPDATE scan_runs SET status=")
+    assert "pg_notify" in _sql(db, 3)
+
+
+def _returning(ids: list) -> MagicMock:
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = ids
+    return result
+
+
+async def test_renew_leases_returns_scans_still_held():
+    kept, lost = uuid4(), uuid4()
+    db = AsyncMock()
+    db.execute.return_value = _returning([kept])
+
+    assert await renew_leases(db, "worker-1", [kept, lost]) == {kept}
+
+    sql = _sql(db)
+    assert "SET heartbeat_at=now()" in sql
+    assert "scan_runs.owner_id = %(owner_id_1)s" in sql
+    db.commit.assert_awaited_once()
+
+
+async def test_check_lease_locks_the_scan_row_for_its_owner():
+    scan_id = uuid4()
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(
+        scalar_one_or_none=MagicMock(return_value=scan_id)
+    )
+
+    await check_lease(db, scan_id, "worker-1")
+
+    sql = _sql(db)
+    assert "scan_runs.owner_id = %(owner_id_1)s" in sql
+    assert sql.endswith("FOR UPDATE")
+
+
+async def test_check_lease_raises_once_another_worker_holds_the_scan():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+
+    with pytest.raises(LeaseLostError):
+        await check_lease(db, uuid4(), "worker-1")
+
+
+async def test_release_scans_only_touches_own_running_scans():
+    db = AsyncMock()
+
+    await release_scans(db, "worker-1", [uuid4()])
+
+    sql = _sql(db)
+    assert "scan_runs.owner_id = %(owner_id_1)s" in sql
+    assert "scan_runs.status = %(status_1)s" in sql
+    db.commit.assert_awaited_once()
+
+
+async def test_requeue_expired_scans_only_takes_lapsed_leases():
+    expired = uuid4()
+    db = AsyncMock()
+    db.execute.return_value = _returning([expired])
+
+    assert await requeue_expired_scans(db, timedelta(seconds=60)) == [expired]
+
+    sql = _sql(db)
+    assert "scan_runs.heartbeat_at IS NULL OR scan_runs.heartbeat_at <" in sql
+    assert "owner_id=%(owner_id)s" in sql
@@ -0,0 +1,227 @@
+"""Tests for the request limiters shared by running scans."""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import anthropic
+import pytest
+
+from travel_planner.config import settings
+from travel_planner.routers._gmail_scheduler import AdaptiveLimiter, FairLimiter
+
+
+async def test_limiter_caps_in_flight_requests():
+    limiter = FairLimiter(2)
+    peak = 0
+
+    async def request():
+        nonlocal peak
+        async with limiter.slot("scan"):
+            peak = max(peak, limiter.in_use)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(request() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.in_use == 0
+
+
+async def test_limiter_grants_slots_round_robin_across_keys():
+    limiter = FairLimiter(1)
+    await limiter.acquire("big")
+    order: list[str] = []
+
+    async def request(key: str):
+        async with limiter.slot(key):
+            order.append(key)
+
+    # The big scan queues three requests before the small one queues its first
+    waiters = [asyncio.create_task(request("big")) for _ in range(3)]
+    await asyncio.sleep(0)
+    waiters.append(asyncio.create_task(request("small")))
+    await asyncio.sleep(0)
+    assert limiter.waiting == 4
+
+    limiter.release()
+    await asyncio.gather(*waiters)
+
+    assert order == ["big", "small", "big", "big"]
+
+
+async def test_cancelled_waiter_gives_up_its_place():
+    limiter = FairLimiter(1)
+    await limiter.acquire("a")
+    waiter = asyncio.create_task(limiter.acquire("b"))
+    await asyncio.sleep(0)
+
+    waiter.cancel()
+    await asyncio.gather(waiter, return_exceptions=True)
+    limiter.release()
+
+    assert limiter.waiting == 0
+    assert limiter.in_use == 0
+
+
+# ---------------------------------------------------------------------------
+# Adaptive LLM limiter
+# ---------------------------------------------------------------------------
+
+
+async def test_adaptive_limiter_grows_additively_and_halves_on_rate_limit():
+    limiter = AdaptiveLimiter(initial=4, ceiling=8)
+
+    for _ in range(4):
+        limiter.on_success()
+    assert limiter.window == pytest.approx(4.92, abs=0.01)
+    assert limiter.capacity == 4
+
+    limiter.on_rate_limited(time.monotonic())
+    assert limiter.window == pytest.approx(2.46, abs=0.01)
+    assert limiter.capacity == 2
+
+
+async def test_adaptive_limiter_cuts_once_per_round():
+    limiter = AdaptiveLimiter(initial=8, ceiling=8)
+    sent = time.monotonic()
+
+    # Four requests sent under the same window all come back 429
+    for _ in range(4):
+        limiter.on_rate_limited(sent)
+
+    assert limiter.window == 4
+    assert limiter.rate_limits == 4
+
+
+async def test_adaptive_limiter_stays_within_bounds():
+    limiter = AdaptiveLimiter(initial=2, ceiling=3, floor=2)
+
+    limiter.on_rate_limited(time.monotonic())
+    assert limiter.window == 2
+    for _ in range(20):
+        limiter.on_success()
+    assert limiter.window == 3
+
+
+async def test_growing_window_admits_waiters():
+    limiter = AdaptiveLimiter(initial=1, ceiling=4)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+
+    limiter.on_success()
+    await waiter
+
+    assert limiter.in_use == 2
+
+
+# ---------------------------------------------------------------------------
+# Rate-limit retries against a local Messages API stub
+# ---------------------------------------------------------------------------
+
+_REPLY = json.dumps(
+    {
+        "id": "msg_test",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude-haiku-4-5-20251001",
+        "content": [{"type": "text", "text": '{"title": "Flight UA1"}'}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": 10, "output_tokens": 5},
+    }
+).encode()
+
+_RATE_LIMITED = json.dumps(
+    {
+        "type": "error",
+        "error": {"type": "rate_limit_error", "message": "Too many requests"},
+    }
+).encode()
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Requests still to answer with 429; negative means always
+    rate_limited = 0
+    requests = 0
+
+
+class _MessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:  # noqa: N802
+        assert isinstance(self.server, _StubServer)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.requests += 1
+        if self.server.rate_limited:
+            self.server.rate_limited -= 1
+            status, body = 429, _RATE_LIMITED
+        else:
+            status, body = 200, _REPLY
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("retry-after", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def messages_api():
+    server = _StubServer(("127.0.0.1", 0), _MessagesHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = anthropic.AsyncAnthropic(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_port}"
+    )
+    limiter = AdaptiveLimiter(initial=4, ceiling=8)
+    with (
+        patch("travel_planner.routers.gmail.get_llm_client", return_value=client),
+        patch("travel_planner.routers._gmail_scheduler._llm_requests", limiter),
+    ):
+        yield server, limiter
+    server.shutdown()
+    server.server_close()
+
+
+async def test_rate_limited_parse_is_retried_and_shrinks_the_window(messages_api):
+    from travel_planner.routers.gmail import _parse_with_claude, _TokenUsage
+
+    server, limiter = messages_api
+    server.rate_limited = 2
+    usage = _TokenUsage()
+
+    parsed = await _parse_with_claude("Your flight", usage=usage)
+
+    assert parsed == {"title": "Flight UA1"}
+    assert server.requests == 3
+    assert usage.rate_limited_retries == 2
+    # Each retry was sent after the previous cut, so both count: 4 -> 2 -> 1,
+    # then the success grows it back
+    assert limiter.rate_limits == 2
+    assert limiter.window == 2
+
+
+async def test_rate_limit_past_the_retry_budget_is_raised(messages_api):
+    from travel_planner.routers.gmail import _parse_with_claude
+
+    server, limiter = messages_api
+    server.rate_limited = -1
+
+    with (
+        patch.object(settings, "llm_retry_budget_seconds", 0.05),
+        pytest.raises(anthropic.RateLimitError),
+    ):
+        await _parse_with_claude("Your flight")
+
+    assert server.requests > 1
+    assert limiter.window == 1
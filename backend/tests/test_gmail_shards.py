@@ -0,0 +1,183 @@
+"""Tests for date-sharded listing of a scan's Gmail search."""
+
+import asyncio
+from datetime import date
+from typing import cast
+
+import pytest
+
+from travel_planner.routers._gmail_client import GmailClient
+from travel_planner.routers._gmail_shards import ListShard, list_shards, plan_shards
+
+TODAY = date(2026, 6, 1)
+
+
+# ---------------------------------------------------------------------------
+# Planning
+# ---------------------------------------------------------------------------
+
+
+def test_no_trips_is_one_open_ended_shard():
+    shards = plan_shards(date(2025, 6, 1), [], TODAY, max_shards=8, min_days=30)
+
+    assert shards == [ListShard(after=date(2025, 6, 1), before=None)]
+    assert shards[0].query("travel", first=True) == "travel after:2025/06/01"
+
+
+def test_shards_cut_at_booking_windows_with_upcoming_trips_first():
+    trips = [
+        (date(2024, 5, 1), date(2024, 5, 10)),  # past
+        (date(2026, 7, 1), date(2026, 7, 14)),  # upcoming
+    ]
+    since = date(2024, 2, 1)  # 90 days before the earliest trip
+
+    shards = plan_shards(since, trips, TODAY, max_shards=8, min_days=30)
+
+    assert [(s.after, s.before, s.upcoming) for s in shards] == [
+        # Booking window of the upcoming trip, open-ended up to now
+        (date(2026, 4, 2), None, True),
+        (date(2024, 5, 11), date(2026, 4, 2), False),
+        (date(2024, 2, 1), date(2024, 5, 11), False),
+    ]
+
+
+def test_short_shards_merge_into_neighbours_up_to_the_cap():
+    # A week-long trip every two months for two years
+    trips = [
+        (date(2024, month, 1), date(2024, month, 7)) for month in range(1, 13, 2)
+    ] + [(date(2025, month, 1), date(2025, month, 7)) for month in range(1, 13, 2)]
+    since = date(2023, 10, 3)
+
+    shards = plan_shards(since, trips, TODAY, max_shards=4, min_days=30)
+
+    assert len(shards) == 4
+    spans = sorted((s.after, s.before or date.max) for s in shards)
+    # Contiguous cover of the whole window
+    assert spans[0][0] == since
+    assert all(a[1] == b[0] for a, b in zip(spans, spans[1:], strict=False))
+    assert all((before - after).days >= 30 for after, before in spans[:-1])
+
+
+def test_window_starting_after_today_is_a_single_shard():
+    trips = [(date(2027, 1, 1), date(2027, 1, 5))]
+
+    shards = plan_shards(date(2026, 10, 3), trips, TODAY, max_shards=8, min_days=30)
+
+    assert shards == [ListShard(after=date(2026, 10, 3), before=None)]
+
+
+def test_later_shards_reach_back_a_day_for_timezones():
+    shard = ListShard(after=date(2025, 3, 10), before=date(2025, 6, 1))
+
+    assert shard.query("travel", first=False) == (
+        "travel after:2025/03/09 before:2025/06/01"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Listing
+# ---------------------------------------------------------------------------
+
+
+class _FakeGmail:
+    """Lists per-query pages, letting the test pace each query's pages."""
+
+    def __init__(self, pages: dict[str, list[list[str]]]) -> None:
+        self.pages = pages
+        self.started: list[str] = []
+        self.listed: list[str] = []
+        self.release = asyncio.Event()
+
+    async def iter_message_ids(self, query: str):
+        self.started.append(query)
+        for page in self.pages[query]:
+            if page == ["boom"]:
+                raise RuntimeError("list failed")
+            self.listed.extend(page)
+            yield page
+            await self.release.wait()
+
+
+async def test_shards_list_concurrently_but_yield_in_priority_order():
+    upcoming = ListShard(after=date(2026, 3, 1), before=None, upcoming=True)
+    archive = ListShard(after=date(2025, 1, 1), before=date(2026, 3, 1))
+    gmail = _FakeGmail(
+        {
+            "q after:2026/02/28": [["u1"], ["u2"]],
+            "q after:2025/01/01 before:2026/03/01": [["a1"], ["a2"]],
+        }
+    )
+
+    pages = list_shards(
+        cast(GmailClient, gmail), "q", [upcoming, archive], concurrency=2
+    )
+
+    assert await anext(pages) == ["u1"]
+    # The archive shard is already listing
+    assert len(gmail.started) == 2
+    gmail.release.set()
+    assert [page async for page in pages] == [["u2"], ["a1"], ["a2"]]
+
+
+async def test_shard_stops_listing_once_its_buffer_is_full():
+    upcoming = ListShard(after=date(2026, 3, 1), before=None, upcoming=True)
+    archive = ListShard(after=date(2025, 1, 1), before=date(2026, 3, 1))
+    gmail = _FakeGmail(
+        {
+            "q after:2026/02/28": [["u1"], ["u2"]],
+            "q after:2025/01/01 before:2026/03/01": [[f"a{i}"] for i in range(6)],
+        }
+    )
+    gmail.release.set()
+
+    pages = list_shards(
+        cast(GmailClient, gmail), "q", [upcoming, archive], 2, max_buffered=2
+    )
+
+    assert await anext(pages) == ["u1"]
+    for _ in range(10):
+        await asyncio.sleep(0)
+    # Two pages buffered, one more waiting to be put
+    assert "a2" in gmail.listed
+    assert "a3" not in gmail.listed
+    assert [page async for page in pages] == [["u2"]] + [[f"a{i}"] for i in range(6)]
+
+
+async def test_later_shards_wait_for_a_slot_in_shard_order():
+    shards = [
+        ListShard(after=date(2026, 3, 1), before=None, upcoming=True),
+        ListShard(after=date(2025, 6, 1), before=date(2026, 3, 1)),
+        ListShard(after=date(2025, 1, 1), before=date(2025, 6, 1)),
+    ]
+    gmail = _FakeGmail(
+        {
+            "q after:2026/02/28": [["u1"]],
+            "q after:2025/05/31 before:2026/03/01": [["b1"], ["b2"], ["b3"]],
+            "q after:2025/01/01 before:2025/06/01": [["c1"]],
+        }
+    )
+    gmail.release.set()
+
+    pages = list_shards(cast(GmailClient, gmail), "q", shards, 1, max_buffered=1)
+
+    assert [page async for page in pages] == [
+        ["u1"],
+        ["b1"],
+        ["b2"],
+        ["b3"],
+        ["c1"],
+    ]
+    assert gmail.started == [
+        "q after:2026/02/28",
+        "q after:2025/05/31 before:2026/03/01",
+        "q after:2025/01/01 before:2025/06/01",
+    ]
+
+
+async def test_listing_error_is_raised_to_the_consumer():
+    shard = ListShard(after=date(2025, 1, 1), before=None)
+    gmail = _FakeGmail({"q after:2025/01/01": [["boom"]]})
+
+    with pytest.raises(RuntimeError, match="list failed"):
+        async for _ in list_shards(cast(GmailClient, gmail), "q", [shard], 1):
+            pass
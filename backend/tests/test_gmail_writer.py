@@ -0,0 +1,115 @@
+"""Tests for the buffered Gmail scan row writer."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+def _make_db():
+    db = MagicMock()
+    db.commit = AsyncMock()
+    return db
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_after_max_events():
+    from travel_planner.routers._gmail_writer import ScanEventWriter
+
+    db = _make_db()
+    writer = ScanEventWriter(db, max_events=3, max_delay=60)
+
+    writer.add("event1")
+    writer.add("event2", "import2")
+    await writer.maybe_flush()
+    db.commit.assert_not_awaited()
+
+    writer.add("event3")
+    await writer.maybe_flush()
+
+    db.add_all.assert_called_once_with(["event1", "event2", "import2", "event3"])
+    db.commit.assert_awaited_once()
+    assert writer.flushes == 1
+    assert writer.due is False
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_when_oldest_row_is_stale():
+    from travel_planner.routers._gmail_writer import ScanEventWriter
+
+    db = _make_db()
+    writer = ScanEventWriter(db, max_events=50, max_delay=0.5)
+
+    with patch("travel_planner.routers._gmail_writer.time") as mock_time:
+        mock_time.monotonic.return_value = 100.0
+        writer.add("event1")
+        mock_time.monotonic.return_value = 100.4
+        writer.add("event2")
+        await writer.maybe_flush()
+        db.commit.assert_not_awaited()
+
+        mock_time.monotonic.return_value = 100.5
+        await writer.maybe_flush()
+
+    db.add_all.assert_called_once_with(["event1", "event2"])
+    db.commit.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_writer_flush_skips_empty_buffer():
+    from travel_planner.routers._gmail_writer import ScanEventWriter
+
+    db = _make_db()
+    writer = ScanEventWriter(db, max_events=1, max_delay=0)
+
+    await writer.flush()
+    await writer.maybe_flush()
+
+    db.add_all.assert_not_called()
+    db.commit.assert_not_awaited()
+    assert writer.flushes == 0
+
+
+@pytest.mark.asyncio
+async def test_writer_notifies_scan_channel_before_commit():
+    import uuid
+
+    from travel_planner.routers._gmail_writer import ScanEventWriter
+
+    db = _make_db()
+    db.execute = AsyncMock()
+    order: list[str] = []
+    db.execute.side_effect = lambda stmt: order.append("notify")
+    db.commit.side_effect = lambda: order.append("commit")
+    writer = ScanEventWriter(db, max_events=1, max_delay=0, scan_id=uuid.uuid4())
+
+    writer.add("event1")
+    await writer.flush()
+
+    # NOTIFY is transactional: delivered when the rows are committed
+    assert order == ["notify", "commit"]
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_rows_once_the_lease_is_lost():
+    import uuid
+
+    from travel_planner.routers._gmail_queue import LeaseLostError
+    from travel_planner.routers._gmail_writer import ScanEventWriter
+
+    db = _make_db()
+    db.rollback = AsyncMock()
+    # The lease check finds the scan owned by someone else
+    db.execute = AsyncMock(
+        return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=None))
+    )
+    writer = ScanEventWriter(
+        db, max_events=1, max_delay=0, scan_id=uuid.uuid4(), owner_id="worker-1"
+    )
+
+    writer.add("event1")
+    with pytest.raises(LeaseLostError):
+        await writer.flush()
+
+    db.add_all.assert_not_called()
+    db.commit.assert_not_awaited()
+    db.rollback.assert_awaited_once()
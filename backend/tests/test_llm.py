@@ -0,0 +1,31 @@
+import anthropic
+
+from travel_planner.config import settings
+from travel_planner.llm import close_llm_client, create_llm_client, get_llm_client
+
+
+def test_create_llm_client_uses_configured_timeouts(monkeypatch):
+    monkeypatch.setattr(settings, "llm_timeout_seconds", 30.0)
+    monkeypatch.setattr(settings, "llm_connect_timeout_seconds", 2.0)
+
+    client = create_llm_client()
+
+    assert isinstance(client.timeout, anthropic.Timeout)
+    assert client.timeout.read == 30.0
+    assert client.timeout.connect == 2.0
+
+
+async def test_get_llm_client_is_shared_until_closed():
+    client = get_llm_client()
+    assert get_llm_client() is client
+
+    await close_llm_client()
+
+    assert client.is_closed()
+    assert get_llm_client() is not client
+    await close_llm_client()
+
+
+async def test_close_llm_client_without_client_is_noop():
+    await close_llm_client()
+    await close_llm_client()
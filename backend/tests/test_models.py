@@ -103,7 +103,7 @@ def test_remaining_models_importable():
     assert len(models) == 5
 
 
-def test_all_16_tables_exist():
+def test_all_17_tables_exist():
     table_names = set(Base.metadata.tables.keys())
     expected = {
         "user_profiles",
@@ -122,5 +122,6 @@ def test_all_16_tables_exist():
         "scan_runs",
         "scan_events",
         "unmatched_imports",
+        "parse_cache_entries",
     }
     assert expected == table_names
@@ -0,0 +1,151 @@
+"""Tests for the scan worker loop."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from travel_planner.config import settings
+from travel_planner.routers._gmail_queue import ScanJob
+
+
+@pytest.fixture(autouse=True)
+def leases():
+    """Stub lease upkeep: every lease renews and none have expired."""
+
+    async def _renew(db, owner_id, scan_ids):
+        return set(scan_ids)
+
+    with (
+        patch("travel_planner.worker.renew_leases", AsyncMock(side_effect=_renew)),
+        patch(
+            "travel_planner.worker.requeue_expired_scans", AsyncMock(return_value=[])
+        ) as requeue_expired,
+    ):
+        yield requeue_expired
+
+
+def _job() -> ScanJob:
+    return ScanJob(uuid4(), uuid4(), rescan_rejected=False, bulk_parse=False)
+
+
+async def _run_until(stop: asyncio.Event, condition, settle: float = 0) -> None:
+    from travel_planner.worker import run_worker
+
+    worker = asyncio.create_task(run_worker(stop, "worker-1"))
+    for _ in range(200):
+        if condition():
+            break
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(settle)
+    stop.set()
+    await worker
+
+
+async def test_worker_runs_claimed_scans(monkeypatch):
+    monkeypatch.setattr(settings, "scan_worker_poll_seconds", 0.01)
+    jobs = [_job(), _job()]
+    ran: list = []
+
+    async def _run_scan(scan_run_id, user_id, rescan_rejected, bulk_parse, owner_id):
+        ran.append(scan_run_id)
+        owners.add(owner_id)
+
+    owners: set = set()
+    with (
+        patch("travel_planner.worker.async_session", MagicMock()),
+        patch(
+            "travel_planner.worker.claim_scan",
+            AsyncMock(
+                side_effect=lambda db, owner, max_running: jobs.pop(0) if jobs else None
+            ),
+        ),
+        patch("travel_planner.worker.run_scan", _run_scan),
+        patch("travel_planner.worker._requeue_scans", AsyncMock()) as fail,
+    ):
+        await _run_until(asyncio.Event(), lambda: len(ran) == 2)
+
+    assert len(ran) == 2
+    # Scans write under the lease of the worker that claimed them
+    assert len(owners) == 1 and None not in owners
+    fail.assert_not_awaited()
+
+
+async def test_worker_respects_concurrency_and_requeues_interrupted_scans(
+    monkeypatch,
+):
+    monkeypatch.setattr(settings, "scan_worker_poll_seconds", 0.01)
+    monkeypatch.setattr(settings, "scan_worker_concurrency", 2)
+    jobs = [_job() for _ in range(3)]
+    started: list = []
+
+    async def _run_scan(scan_run_id, user_id, rescan_rejected, bulk_parse, owner_id):
+        started.append(scan_run_id)
+        await asyncio.Event().wait()
+
+    claim = AsyncMock(
+        side_effect=lambda db, owner, max_running: jobs.pop(0) if jobs else None
+    )
+    with (
+        patch("travel_planner.worker.async_session", MagicMock()),
+        patch("travel_planner.worker.claim_scan", claim),
+        patch("travel_planner.worker.run_scan", _run_scan),
+        patch("travel_planner.worker._requeue_scans", AsyncMock()) as fail,
+    ):
+        await _run_until(asyncio.Event(), lambda: len(started) == 2, settle=0.05)
+
+    # The third scan stays queued while both slots are busy
+    assert len(started) == 2
+    assert claim.await_count == 2
+    fail.assert_awaited_once()
+    owner, interrupted = fail.await_args_list[0].args
+    assert owner == "worker-1"
+    assert sorted(interrupted) == sorted(started)
+
+
+async def test_worker_requeues_expired_leases_on_startup(leases):
+    with (
+        patch("travel_planner.worker.async_session", MagicMock()),
+        patch("travel_planner.worker.claim_scan", AsyncMock(return_value=None)),
+    ):
+        await _run_until(asyncio.Event(), lambda: leases.await_count > 0)
+
+    leases.assert_awaited()
+
+
+async def test_worker_cancels_scans_whose_lease_was_taken_over(monkeypatch):
+    monkeypatch.setattr(settings, "scan_worker_poll_seconds", 0.01)
+    monkeypatch.setattr(settings, "scan_heartbeat_seconds", 0.01)
+    jobs = [_job()]
+    cancelled: list = []
+
+    async def _run_scan(scan_run_id, user_id, rescan_rejected, bulk_parse, owner_id):
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.append(scan_run_id)
+            raise
+
+    async def _renew(db, owner_id, scan_ids):
+        # Renewal finds the scan already reclaimed by another worker
+        await asyncio.sleep(0.02)
+        return set()
+
+    with (
+        patch("travel_planner.worker.async_session", MagicMock()),
+        patch(
+            "travel_planner.worker.claim_scan",
+            AsyncMock(
+                side_effect=lambda db, owner, max_running: jobs.pop(0) if jobs else None
+            ),
+        ),
+        patch("travel_planner.worker.run_scan", _run_scan),
+        patch("travel_planner.worker.renew_leases", AsyncMock(side_effect=_renew)),
+        patch("travel_planner.worker._requeue_scans", AsyncMock()) as requeue,
+    ):
+        await _run_until(asyncio.Event(), lambda: bool(cancelled))
+
+    assert len(cancelled) == 1
+    # Another worker owns it now, so it is not handed back on shutdown
+    requeue.assert_not_awaited()
@@ -21,7 +21,7 @@ vi.mock('../hooks/useGmail', () => ({
     inbox: ['gmail', 'inbox'],
   },
   useGmailScan: () => ({
-    state: { isRunning: false, summary: null, error: null, events: [], emailsFound: 0, scanId: null },
+    state: { isRunning: false, summary: null, error: null, events: [], emailsFound: 0, scanId: null, queuePosition: null },
     startScan: vi.fn(),
     cancelScan: vi.fn(),
   }),
@@ -104,7 +104,15 @@ export function GmailScanPanel({ onScanComplete, onScanRunningChange }: GmailSca
           <div className="flex items-center gap-2 text-sm text-cloud-600">
             <Loader2 size={14} className="animate-spin" />
             <span>
-              {total > 0 ? `${total} emails processed` : 'Starting scan...'}
+              {total > 0
+                ? state.emailsFound > 0
+                  ? `${total} of ${state.emailsFound} emails processed`
+                  : `${total} emails processed`
+                : state.emailsFound > 0
+                  ? `Found ${state.emailsFound} emails...`
+                  : state.queuePosition
+                    ? `Queued — position ${state.queuePosition}`
+                    : 'Starting scan...'}
             </span>
           </div>
           <button
@@ -128,9 +136,7 @@ export function GmailScanPanel({ onScanComplete, onScanRunningChange }: GmailSca
         <p className="text-sm text-red-600">
           {state.error === 'gmail_auth_failed'
             ? 'Gmail disconnected — please reconnect'
-            : state.error === 'timeout'
-              ? 'Scan is taking longer than expected — it may still be running in the background'
-              : 'Scan failed — try again'}
+            : 'Scan failed — try again'}
         </p>
       )}
 
@@ -146,13 +146,20 @@ export function useDismissAllUnmatched() {
 }
 
 // SSE-based scan hook
+
+// Consecutive failed stream connections before giving up
+const MAX_STREAM_RECONNECTS = 5
+
 interface ScanState {
   scanId: string | null
   isRunning: boolean
   events: ScanProgressEvent[]
   summary: { imported: number; skipped: number; unmatched: number } | null
   error: string | null
+  // Grows while the scan is still listing the mailbox
   emailsFound: number
+  // 1-based place in the scan queue while waiting for a worker
+  queuePosition: number | null
 }
 
 export function useGmailScan() {
@@ -166,6 +173,7 @@ export function useGmailScan() {
     summary: null,
     error: null,
     emailsFound: 0,
+    queuePosition: null,
   })
 
   const startScan = useCallback(
@@ -177,6 +185,7 @@ export function useGmailScan() {
         summary: null,
         error: null,
         emailsFound: 0,
+        queuePosition: null,
       })
 
       let success = false
@@ -203,92 +212,130 @@ export function useGmailScan() {
         scanIdRef.current = scan_id
         setState((s) => ({ ...s, scanId: scan_id }))
 
-        const {
-          data: { session },
-        } = await supabase.auth.getSession()
-        const token = session?.access_token
-        if (!token) throw new Error('Not authenticated')
-
         abortRef.current = new AbortController()
-        const response = await fetch(`/api/gmail/scan/${scan_id}/stream`, {
-          signal: abortRef.current.signal,
-          headers: { Authorization: `Bearer ${token}` },
-        })
-
-        if (!response.ok) {
-          const errorCode = response.status === 401 ? 'gmail_auth_failed' : 'scan_failed'
-          setState((s) => ({ ...s, isRunning: false, error: errorCode }))
-          return false
-        }
-        if (!response.body) throw new Error('No response body')
-        const reader = response.body.getReader()
-        const decoder = new TextDecoder()
-        let buffer = ''
+        const signal = abortRef.current.signal
         let receivedTerminalEvent = false
+        // SSE id of the last event received; a reconnect resumes after it
+        let lastEventId: string | null = null
+        let reconnects = 0
 
-        while (true) {
-          const { done, value } = await reader.read()
-          if (done) break
-
-          buffer += decoder.decode(value, { stream: true })
-          const lines = buffer.split('\n')
-          buffer = lines.pop() ?? ''
-
-          let eventType = ''
-          let dataLine = ''
-
-          for (const line of lines) {
-            if (line.startsWith('event: ')) {
-              eventType = line.slice(7).trim()
-            } else if (line.startsWith('data: ')) {
-              dataLine = line.slice(6).trim()
-            } else if ((line === '' || line === '\r') && dataLine) {
-              try {
-                const payload = JSON.parse(dataLine) as Record<string, unknown>
-                if (eventType === 'progress') {
-                  setState((s) => ({
-                    ...s,
-                    events: [...s.events, payload as unknown as ScanProgressEvent],
-                  }))
-                } else if (eventType === 'done') {
-                  receivedTerminalEvent = true
-                  success = true
-                  setState((s) => ({
-                    ...s,
-                    isRunning: false,
-                    summary: payload as unknown as ScanState['summary'],
-                  }))
-                  queryClient.invalidateQueries({ queryKey: gmailKeys.inbox })
-                  queryClient.invalidateQueries({ queryKey: gmailKeys.latestScan })
-                } else if (eventType === 'error') {
-                  receivedTerminalEvent = true
-                  setState((s) => ({
-                    ...s,
-                    isRunning: false,
-                    error: (payload.code as string) ?? 'scan_failed',
-                  }))
-                }
-              } catch (parseErr) {
-                console.error('[GmailScan] Failed to parse SSE event:', eventType, dataLine, parseErr)
-                if (eventType === 'done') {
-                  receivedTerminalEvent = true
-                  setState((s) => ({ ...s, isRunning: false, error: 'scan_failed' }))
+        while (!receivedTerminalEvent) {
+          const {
+            data: { session },
+          } = await supabase.auth.getSession()
+          const token = session?.access_token
+          if (!token) throw new Error('Not authenticated')
+
+          const headers: Record<string, string> = { Authorization: `Bearer ${token}` }
+          if (lastEventId) headers['Last-Event-ID'] = lastEventId
+
+          try {
+            const response = await fetch(`/api/gmail/scan/${scan_id}/stream`, {
+              signal,
+              headers,
+            })
+
+            if (!response.ok) {
+              const errorCode = response.status === 401 ? 'gmail_auth_failed' : 'scan_failed'
+              setState((s) => ({ ...s, isRunning: false, error: errorCode }))
+              return false
+            }
+            if (!response.body) throw new Error('No response body')
+            reconnects = 0
+            const reader = response.body.getReader()
+            const decoder = new TextDecoder()
+            let buffer = ''
+
+            while (true) {
+              const { done, value } = await reader.read()
+              if (done) break
+
+              buffer += decoder.decode(value, { stream: true })
+              const lines = buffer.split('\n')
+              buffer = lines.pop() ?? ''
+
+              let eventType = ''
+              let eventId = ''
+              let dataLine = ''
+
+              for (const line of lines) {
+                if (line.startsWith('event: ')) {
+                  eventType = line.slice(7).trim()
+                } else if (line.startsWith('id: ')) {
+                  eventId = line.slice(4).trim()
+                } else if (line.startsWith('data: ')) {
+                  dataLine = line.slice(6).trim()
+                } else if ((line === '' || line === '\r') && dataLine) {
+                  if (eventId) lastEventId = eventId
+                  try {
+                    const payload = JSON.parse(dataLine) as Record<string, unknown>
+                    if (eventType === 'progress') {
+                      setState((s) => ({
+                        ...s,
+                        queuePosition: null,
+                        events: [...s.events, payload as unknown as ScanProgressEvent],
+                      }))
+                    } else if (eventType === 'queued') {
+                      setState((s) => ({ ...s, queuePosition: payload.position as number }))
+                    } else if (eventType === 'found') {
+                      setState((s) => ({
+                        ...s,
+                        queuePosition: null,
+                        emailsFound: payload.emails_found as number,
+                      }))
+                    } else if (eventType === 'done') {
+                      receivedTerminalEvent = true
+                      success = true
+                      setState((s) => ({
+                        ...s,
+                        isRunning: false,
+                        queuePosition: null,
+                        summary: payload as unknown as ScanState['summary'],
+                      }))
+                      queryClient.invalidateQueries({ queryKey: gmailKeys.inbox })
+                      queryClient.invalidateQueries({ queryKey: gmailKeys.latestScan })
+                    } else if (eventType === 'error') {
+                      receivedTerminalEvent = true
+                      setState((s) => ({
+                        ...s,
+                        isRunning: false,
+                        error: (payload.code as string) ?? 'scan_failed',
+                      }))
+                    }
+                  } catch (parseErr) {
+                    console.error(
+                      '[GmailScan] Failed to parse SSE event:',
+                      eventType,
+                      dataLine,
+                      parseErr,
+                    )
+                    if (eventType === 'done') {
+                      receivedTerminalEvent = true
+                      setState((s) => ({ ...s, isRunning: false, error: 'scan_failed' }))
+                    }
+                  }
+                  eventType = ''
+                  eventId = ''
+                  dataLine = ''
                 }
               }
-              eventType = ''
-              dataLine = ''
             }
+          } catch (streamErr: unknown) {
+            if (streamErr instanceof Error && streamErr.name === 'AbortError') throw streamErr
+            console.warn('[GmailScan] Stream interrupted:', streamErr)
           }
-        }
 
-        // Stream ended — clean up if we never got a terminal event
-        if (!receivedTerminalEvent) {
-          setState((s) => {
-            if (s.isRunning) {
-              return { ...s, isRunning: false, error: 'scan_failed' }
+          // Stream dropped before a terminal event: reconnect and pick up
+          // after the last event received
+          if (!receivedTerminalEvent) {
+            reconnects += 1
+            if (reconnects > MAX_STREAM_RECONNECTS) {
+              setState((s) => (s.isRunning ? { ...s, isRunning: false, error: 'scan_failed' } : s))
+              break
             }
-            return s
-          })
+            await new Promise((resolve) => setTimeout(resolve, 1000 * reconnects))
+            if (signal.aborted) return false
+          }
         }
       } catch (err: unknown) {
         if (err instanceof Error && err.name === 'AbortError') return false
@@ -213,10 +213,11 @@ export interface SupportedCountry {
 
 export interface ScanRun {
   id: string
-  status: 'running' | 'completed' | 'failed' | 'cancelled'
+  status: 'queued' | 'running' | 'completed' | 'failed' | 'cancelled'
   started_at: string
   finished_at: string | null
   emails_found: number
+  processed_count: number
   imported_count: number
   skipped_count: number
   unmatched_count: number